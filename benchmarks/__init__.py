@@ -0,0 +1 @@
+"""PyHDLio benchmarks."""
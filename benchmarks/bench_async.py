@@ -0,0 +1,133 @@
+"""
+Benchmark how parsing affects an asyncio event loop, and per-file timeouts.
+
+A heartbeat coroutine wakes up every few milliseconds and records how late
+it is, while generated files are parsed by calling Document.FromFile in the
+event loop (which blocks it), by awaiting Document.FromFileAsync for each
+file, and with `async for` over Document.FromFilesAsync. The total time and
+the worst and 99th percentile heartbeat delays are reported. Worker
+processes preload the DFAs of a warm-up parse.
+
+A batch with a few large files is then parsed with a timeout shorter than
+their parse time: the large files are reported as timed out, and the small
+files after them still parse (the worker processes of the large parses are
+killed and replaced).
+Last, a batch is cancelled while it runs, and the time until the consuming
+task finishes is reported.
+
+Usage:
+    python -m benchmarks.bench_async [--files N] [--entities E] [--jobs J] [--timeout T]
+"""
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, List, Tuple
+
+from . import corpus
+
+# Interval of the heartbeat, in seconds
+TICK = 0.005
+
+
+async def with_heartbeat(work: Callable[[], Awaitable[object]]) -> Tuple[float, List[float]]:
+    """Run `work` while measuring the event loop's delays; return its time and the delays."""
+    delays: List[float] = []
+    running = True
+
+    async def heartbeat() -> None:
+        while running:
+            start = time.perf_counter()
+            await asyncio.sleep(TICK)
+            delays.append(time.perf_counter() - start - TICK)
+
+    beat = asyncio.ensure_future(heartbeat())
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    await work()
+    elapsed = time.perf_counter() - start
+    running = False
+    await beat
+    return elapsed, delays
+
+
+def report(name: str, elapsed: float, delays: List[float]) -> None:
+    p99 = statistics.quantiles(delays, n=100)[98] if len(delays) >= 2 else max(delays, default=0)
+    print(f"{name:<28} {elapsed:>8.2f} s {max(delays, default=0) * 1000:>10.1f} ms {p99 * 1000:>10.1f} ms")
+
+
+async def run(args: argparse.Namespace, directory: Path) -> None:
+    from pyhdlio.vhdl import Document
+    from pyhdlio.vhdl.async_batch import create_executor
+    from pyhdlio.vhdl.dfa import save_dfa
+
+    paths = corpus.write(directory / "src", args.files, entities=args.entities)
+    Document.FromFile(paths[0])
+    dfa_cache = directory / "vhdl.dfa"
+    save_dfa(dfa_cache)
+    executor = create_executor(args.jobs, dfa_cache=dfa_cache)
+    await Document.FromFileAsync(paths[0], executor=executor)   # start the workers
+
+    async def blocking() -> None:
+        for path in paths:
+            Document.FromFile(path)
+            await asyncio.sleep(0)
+
+    async def one_by_one() -> None:
+        for path in paths:
+            await Document.FromFileAsync(path, executor=executor)
+
+    async def batch() -> None:
+        async for result in Document.FromFilesAsync(paths, executor=executor, jobs=args.jobs):
+            assert result.error is None, result.error
+
+    print(f"{args.files} files of {args.entities} entities, {args.jobs} workers\n")
+    print(f"{'':<28} {'time':>10} {'max delay':>13} {'p99 delay':>13}")
+    report("FromFile in the event loop", *await with_heartbeat(blocking))
+    report("await FromFileAsync", *await with_heartbeat(one_by_one))
+    report("async for FromFilesAsync", *await with_heartbeat(batch))
+
+    large = [directory / f"large_{i}.vhd" for i in range(2)]
+    for path in large:
+        path.write_text(corpus.generate(entities=20 * args.entities), encoding='utf-8')
+    start = time.perf_counter()
+    results = [result async for result in Document.FromFilesAsync(large + paths, executor=executor, jobs=args.jobs,
+                                                                   timeout=args.timeout, ordered=True)]
+    timed_out = [result.path.name for result in results if isinstance(result.error, TimeoutError)]
+    parsed = sum(result.document is not None for result in results)
+    print(f"\ntimeout {args.timeout} s: {len(timed_out)} timed out ({', '.join(timed_out)}), {parsed} parsed "
+          f"in {time.perf_counter() - start:.2f} s")
+
+    async def consume() -> None:
+        async for _ in Document.FromFilesAsync(paths * 10, executor=executor, jobs=args.jobs):
+            pass
+
+    task = asyncio.ensure_future(consume())
+    await asyncio.sleep(0.2)
+    start = time.perf_counter()
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    print(f"cancelled a batch of {len(paths) * 10} files in {(time.perf_counter() - start) * 1000:.1f} ms")
+    executor.shutdown()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure event loop delays while parsing, and per-file timeouts")
+    parser.add_argument('--files', type=int, default=20, help='generated files')
+    parser.add_argument('--entities', type=int, default=5, help='entity/architecture pairs per file')
+    parser.add_argument('--jobs', type=int, default=2, help='worker processes')
+    parser.add_argument('--timeout', type=float, default=1.0, help='per-file timeout of the timeout test, in s')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        asyncio.run(run(args, Path(directory)))
+
+
+if __name__ == "__main__":
+    main()
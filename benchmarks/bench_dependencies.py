@@ -0,0 +1,115 @@
+"""
+Benchmark the dependency scan and the compile-order sort on a large generated design.
+
+The design has packages, and entities whose architectures use a package
+and instantiate two entities with lower numbers, one directly
+(`entity work.unit_<n>(rtl)`) and one as a component. The files are indexed
+in a Library from a shuffled list, with one and with several workers, and
+ordered with DependencyGraph.levels(). The order is checked: every file
+must come after the files it depends on. The per-file scan time is compared
+with a full parse of a sample of the files. The sort alone is then timed on
+a synthetic graph of many more files.
+
+Usage:
+    python -m benchmarks.bench_dependencies [--files N] [--packages P] [--jobs J] [--sort-files S]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+PORTS = "port (clk : in std_logic; d : in std_logic; q : out std_logic)"
+
+
+def unit_source(index: int, packages: int, rng: random.Random) -> str:
+    """Return an entity and an architecture instantiating two entities with lower numbers."""
+    lines = ["library ieee;", "use ieee.std_logic_1164.all;", f"use work.pkg_{index % packages}.all;",
+             f"entity unit_{index} is", f"    {PORTS};", "end entity;", f"architecture rtl of unit_{index} is"]
+    children = [rng.randrange(index) for _ in range(2)] if index else []
+    if children:
+        lines.append(f"    component unit_{children[1]} is {PORTS}; end component;")
+    lines.append("begin")
+    if children:
+        lines.append(f"    u0 : entity work.unit_{children[0]}(rtl) port map (clk => clk, d => d, q => open);")
+        lines.append(f"    u1 : unit_{children[1]} port map (clk => clk, d => d, q => q);")
+    lines.append("end architecture;")
+    return "\n".join(lines) + "\n"
+
+
+def write(directory: Path, files: int, packages: int) -> List[Path]:
+    """Write the packages and units of the design and return their paths, shuffled."""
+    directory.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(0)
+    paths = []
+    for p in range(packages):
+        path = directory / f"pkg_{p}.vhd"
+        use = f"use work.pkg_{p - 1}.all;\n" if p else ""
+        path.write_text(f"{use}package pkg_{p} is\n    constant C{p} : integer := {p};\nend package;\n",
+                        encoding='utf-8')
+        paths.append(path)
+    for f in range(files):
+        path = directory / f"unit_{f}.vhd"
+        path.write_text(unit_source(f, packages, rng), encoding='utf-8')
+        paths.append(path)
+    rng.shuffle(paths)
+    return paths
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Time the dependency scan and compile-order sort")
+    parser.add_argument('--files', type=int, default=2000, help='entity/architecture files in the design')
+    parser.add_argument('--packages', type=int, default=20, help='package files in the design')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(), help='workers of the parallel scan')
+    parser.add_argument('--sample', type=int, default=20, help='files parsed to compare with the scan')
+    parser.add_argument('--sort-files', type=int, default=20000, help='files in the synthetic graph sorted')
+    args = parser.parse_args()
+
+    from pyhdlio.vhdl import DependencyGraph, Document, Library
+    from pyhdlio.vhdl.dependencies import Reference, UnitDependencies
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write(Path(directory) / "src", args.files, args.packages)
+        print(f"{len(paths)} files ({args.packages} packages), {os.cpu_count()} CPUs\n")
+
+        for jobs in sorted({1, args.jobs}):
+            with Library() as library:
+                start = time.perf_counter()
+                result = library.scan(paths, jobs=jobs)
+                scan = time.perf_counter() - start
+                assert not result.errors, result.errors
+                start = time.perf_counter()
+                graph = library.dependency_graph()
+                levels = graph.levels()
+                order = time.perf_counter() - start
+            print(f"scan, {jobs} jobs: {scan:.2f} s ({scan / len(paths) * 1000:.2f} ms per file); "
+                  f"graph and sort: {order * 1000:.1f} ms; {len(levels)} levels")
+
+        dependencies = graph.dependencies()
+        position = {path: i for i, path in enumerate(path for level in levels for path in level)}
+        assert all(position[target] < position[path] for path, targets in dependencies.items() for target in targets)
+        unresolved = {(reference.library, reference.name) for _, reference in graph.unresolved()}
+        print(f"order checked: {sum(map(len, dependencies.values()))} dependencies; unresolved: {sorted(unresolved)}")
+
+        start = time.perf_counter()
+        for path in paths[:args.sample]:
+            Document.FromFile(path)
+        parse = (time.perf_counter() - start) / args.sample
+        print(f"full parse: {parse * 1000:.2f} ms per file")
+
+    rng = random.Random(1)
+    graph = DependencyGraph()
+    for f in range(args.sort_files):
+        references = [Reference("entity", None, f"e{rng.randrange(f)}", None, 1) for _ in range(3)] if f else []
+        graph.add_units(f"f{f}.vhd", [UnitDependencies("entity", f"e{f}", None, 1, 1, references)])
+    start = time.perf_counter()
+    levels = graph.levels()
+    print(f"\nsort of {args.sort_files} synthetic files: {(time.perf_counter() - start) * 1000:.0f} ms, "
+          f"{len(levels)} levels")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Benchmark parsing in a fresh process with a cold and a preloaded (warm) DFA cache.
+
+Each run is a new interpreter, as in a short-lived CI job: the cold run starts
+with empty DFAs, the warm run first loads a DFA cache file saved by a
+training run over the same sources.
+
+Usage:
+    python -m benchmarks.bench_dfa [--files N] [--entities N]
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from . import corpus
+
+SAMPLE = Path(__file__).resolve().parent.parent / "examples" / "vhdl_in" / "sample.vhd"
+
+
+def child(paths: List[Path], load: Optional[Path], save: Optional[Path]) -> None:
+    """Parse `paths` in this process and print timings as JSON."""
+    start = time.perf_counter()
+    from pyhdlio.vhdl import Document, load_dfa, save_dfa
+    import pyhdlio.vhdl.grammar.VHDLParser  # noqa: F401
+    imported = time.perf_counter()
+    if load is not None and not load_dfa(load):
+        raise SystemExit(f"could not load {load}")
+    loaded = time.perf_counter()
+
+    times = []
+    for path in paths:
+        t = time.perf_counter()
+        Document.FromFile(path)
+        times.append(time.perf_counter() - t)
+    if save is not None:
+        save_dfa(save)
+    print(json.dumps({"import": imported - start, "load": loaded - imported, "files": times}))
+
+
+def spawn(paths: List[Path], load: Optional[Path] = None, save: Optional[Path] = None) -> Dict:
+    """Run child() in a new interpreter and return its timings."""
+    cmd = [sys.executable, "-m", "benchmarks.bench_dfa", "--child"]
+    if load is not None:
+        cmd += ["--load", str(load)]
+    if save is not None:
+        cmd += ["--save", str(save)]
+    cmd += [str(p) for p in paths]
+    out = subprocess.run(cmd, check=True, capture_output=True, text=True,
+                         cwd=Path(__file__).resolve().parent.parent).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def report(name: str, timings: Dict, lines: int) -> None:
+    files = timings["files"]
+    parse = sum(files)
+    print(f"{name:<6} {timings['load']:>9.3f} {files[0]:>10.3f} {parse:>10.3f} {lines / parse:>10.0f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare cold and preloaded DFA caches in fresh processes")
+    parser.add_argument('--files', type=int, default=5, help='generated files parsed per run')
+    parser.add_argument('--entities', type=int, default=10, help='entity/architecture pairs per generated file')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--load', type=Path, help=argparse.SUPPRESS)
+    parser.add_argument('--save', type=Path, help=argparse.SUPPRESS)
+    parser.add_argument('paths', nargs='*', type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.paths, args.load, args.save)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        paths = [SAMPLE] + corpus.write(tmp / "src", args.files, entities=args.entities)
+        lines = sum(p.read_text(encoding='utf-8').count("\n") + 1 for p in paths)
+        dfa_file = tmp / "vhdl.dfa"
+
+        cold = spawn(paths, save=dfa_file)
+        warm = spawn(paths, load=dfa_file)
+
+        print(f"{len(paths)} files, {lines} lines; DFA cache file {dfa_file.stat().st_size / 1024:.0f} KiB")
+        print(f"{'run':<6} {'load [s]':>9} {'first [s]':>10} {'total [s]':>10} {'lines/s':>10}")
+        report("cold", cold, lines)
+        report("warm", warm, lines)
+        print(f"speedup: first file {cold['files'][0] / warm['files'][0]:.1f}x, "
+              f"total {sum(cold['files']) / (sum(warm['files']) + warm['load']):.1f}x (including load)")
+
+
+if __name__ == "__main__":
+    main()
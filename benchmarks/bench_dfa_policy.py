@@ -0,0 +1,116 @@
+"""
+Benchmark the DFA cache of a long-running process with and without a DFACachePolicy.
+
+A service parsing user-submitted code keeps meeting new constructs, and the
+prediction DFAs grow with each of them. This benchmark simulates such a
+process in fresh interpreters: the DFAs are first warmed on a generated
+corpus and saved as a baseline, then a stream of architectures with random
+expressions is parsed, once without a policy and once with a
+DFACachePolicy (with the saved baseline). After every tenth of the stream,
+the number of DFA states, the resident set size (the peak where the current
+one is not available) and the parse time of the corpus code (which the
+baseline keeps warm) are reported.
+
+Usage:
+    python -m benchmarks.bench_dfa_policy [--sources N] [--max-states S] [--check-every C]
+"""
+
+import argparse
+import json
+import random
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List
+
+from . import corpus
+
+# The current RSS is read from /proc where available; peak RSS is reported by getrusage in KiB on
+# Linux and in bytes on macOS
+CHILD = """
+import json, os, resource, sys, time
+from benchmarks.bench_dfa_policy import expression_source
+from benchmarks import corpus
+from pyhdlio.vhdl import DFACachePolicy, Document, Session, load_dfa, set_dfa_policy
+from pyhdlio.vhdl.dfa import dfa_states
+scale = 1 if sys.platform == "darwin" else 1024
+def rss():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+baseline, sources, max_states, check_every = sys.argv[1], int(sys.argv[2]), int(sys.argv[3]), int(sys.argv[4])
+load_dfa(baseline)
+common = corpus.generate(entities=10, statements=3, packages=1)
+policy = DFACachePolicy(max_states, check_every, baseline) if max_states else None
+set_dfa_policy(policy)
+session = Session.current()
+for i in range(sources):
+    try:
+        Document.FromStr(expression_source(i), session=session)
+    except Exception:
+        pass
+    if (i + 1) % max(1, sources // 10) == 0:
+        start = time.perf_counter()
+        Document.FromStr(common, session=session)
+        print(json.dumps({"sources": i + 1, "states": dfa_states(), "common": time.perf_counter() - start,
+                          "rss": rss(), "clears": policy.clears if policy else 0}), flush=True)
+"""
+
+# Operands and operators of the random expressions
+OPERANDS = ["a", "b(3)", "c(i + 1)", "x.y", "f(a, b)", "'1'", "16#FF#", "to_unsigned(5, 8)", "s(7 downto 0)"]
+OPERATORS = [" + ", " - ", " and ", " or ", " * ", " & ", " = "]
+
+
+def expression(rng: random.Random, depth: int) -> str:
+    """Return a random expression nested up to `depth` levels."""
+    if depth == 0 or rng.random() < 0.3:
+        return rng.choice(OPERANDS)
+    text = expression(rng, depth - 1) + rng.choice(OPERATORS) + expression(rng, depth - 1)
+    return f"({text})" if rng.random() < 0.5 else text
+
+
+def expression_source(index: int, statements: int = 5) -> str:
+    """Return an entity and an architecture of assignments with random expressions, the same for each index."""
+    rng = random.Random(index)
+    body = "\n".join(f"    s{s} <= {expression(rng, rng.randint(1, 5))};" for s in range(statements))
+    return f"entity e{index} is end;\narchitecture a of e{index} is\nbegin\n{body}\nend;\n"
+
+
+def run(baseline: Path, sources: int, max_states: int, check_every: int) -> List[Dict[str, Any]]:
+    """Parse the stream in a new interpreter and return its reports."""
+    out = subprocess.run([sys.executable, "-c", CHILD, str(baseline), str(sources), str(max_states),
+                          str(check_every)], check=True, capture_output=True, text=True,
+                         cwd=Path(__file__).resolve().parent.parent).stdout
+    return [json.loads(line) for line in out.strip().splitlines()]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare DFA growth with and without a DFACachePolicy")
+    parser.add_argument('--sources', type=int, default=200, help='sources with random expressions parsed')
+    parser.add_argument('--max-states', type=int, default=3000, help='ceiling of the policy in DFA states')
+    parser.add_argument('--check-every', type=int, default=10, help='sources parsed between checks of the policy')
+    args = parser.parse_args()
+
+    from pyhdlio.vhdl import Document, save_dfa
+
+    with tempfile.TemporaryDirectory() as directory:
+        baseline = Path(directory) / "baseline.dfa"
+        Document.FromStr(corpus.generate(entities=10, statements=3, packages=1))
+        print(f"baseline: {save_dfa(baseline)} DFA states\n")
+
+        results = {
+            "unbounded": run(baseline, args.sources, 0, args.check_every),
+            f"max {args.max_states}": run(baseline, args.sources, args.max_states, args.check_every),
+        }
+    print(f"{'policy':<12} {'sources':>8} {'states':>8} {'clears':>7} {'RSS [MiB]':>10} {'corpus [ms]':>12}")
+    for name, reports in results.items():
+        for report in reports:
+            print(f"{name:<12} {report['sources']:>8} {report['states']:>8} {report['clears']:>7} "
+                  f"{report['rss'] / 2**20:>10.1f} {report['common'] * 1000:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Benchmark import and first-parse start-up costs, and guard against eager imports.
+
+Each scenario runs in a fresh interpreter with `-X importtime`. The import
+scenarios fail (exit status 1) if they load a module that should only be
+loaded when parsing, such as the generated grammar, or if they take longer
+than an optional budget.
+
+Usage:
+    python -m benchmarks.bench_import [--repeat R] [--budget MS]
+"""
+
+import argparse
+import re
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+SAMPLE = Path(__file__).resolve().parent.parent / "examples" / "vhdl_in" / "sample.vhd"
+
+# name: (statement, module prefixes that must not be imported)
+SCENARIOS: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    "import pyhdlio.vhdl": (
+        "import pyhdlio.vhdl",
+        ("pyhdlio.vhdl.grammar", "pyhdlio.vhdl.visitor", "pyhdlio.vhdl.model", "antlr4", "pyVHDLModel"),
+    ),
+    "query ParseCache": (
+        "from pyhdlio.vhdl import ParseCache; ParseCache(sys.argv[1]).size",
+        ("pyhdlio.vhdl.grammar", "pyhdlio.vhdl.visitor", "antlr4", "pyVHDLModel"),
+    ),
+    "import Document": (
+        "from pyhdlio.vhdl import Document",
+        ("pyhdlio.vhdl.grammar", "pyhdlio.vhdl.visitor", "antlr4"),
+    ),
+    "first parse": (
+        f"from pyhdlio.vhdl import Document; Document.FromFile({str(SAMPLE)!r}, interface_only=True)",
+        (),
+    ),
+}
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s+)(\S+)")
+
+
+def _run(args: List[str]) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *args], check=True, capture_output=True, text=True,
+                          cwd=Path(__file__).resolve().parent.parent)
+
+
+def importtime(statement: str, *args: str) -> List[Tuple[int, str]]:
+    """Run `statement` in a new interpreter with -X importtime; return (cumulative us, module) per top-level import."""
+    result = _run(["-X", "importtime", "-c", f"import sys; {statement}", *args])
+    modules = []
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if match and len(match.group(3)) == 1:
+            modules.append((int(match.group(2)), match.group(4)))
+    return modules
+
+
+def loaded_modules(statement: str, *args: str) -> List[str]:
+    """Return the names of all modules loaded after running `statement` in a new interpreter."""
+    return _run(["-c", f"import sys; {statement}; print(*sys.modules)", *args]).stdout.split()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure pyhdlio import times and check for eager imports")
+    parser.add_argument('--repeat', type=int, default=3, help='runs per scenario (best is reported)')
+    parser.add_argument('--budget', type=float, default=None,
+                        help='fail if `import pyhdlio.vhdl` takes longer than this many ms')
+    args = parser.parse_args()
+
+    # Modules imported by the bare interpreter are not charged to any scenario
+    startup = {m for _, m in importtime("pass")}
+
+    failures = []
+    with tempfile.TemporaryDirectory() as cache_dir:
+        print(f"{'scenario':<22} {'imports [ms]':>13}  heaviest imports [ms]")
+        for name, (statement, forbidden) in SCENARIOS.items():
+            runs = []
+            for _ in range(args.repeat):
+                modules = [(us, m) for us, m in importtime(statement, cache_dir) if m not in startup]
+                runs.append((sum(us for us, _ in modules) / 1000, modules))
+            total, modules = min(runs)
+            heaviest = ", ".join(f"{m} {us / 1000:.1f}" for us, m in sorted(modules, reverse=True)[:3])
+            print(f"{name:<22} {total:>13.1f}  {heaviest}")
+
+            bad = [m for m in loaded_modules(statement, cache_dir) if forbidden and m.startswith(forbidden)]
+            if bad:
+                failures.append(f"{name}: imports {', '.join(sorted(bad)[:5])}")
+            if args.budget is not None and name == "import pyhdlio.vhdl" and total > args.budget:
+                failures.append(f"{name}: {total:.1f} ms exceeds budget of {args.budget:.1f} ms")
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
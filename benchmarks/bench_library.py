@@ -0,0 +1,101 @@
+"""
+Benchmark the Library index: scanning, rescanning and lookups.
+
+A set of generated files, each with its own entities, architectures and a
+package of component declarations, is indexed in a SQLite database. The
+benchmark times the first scan, a rescan with no changes, a rescan after a
+few files were edited, and a rescan after all files were touched without
+changing their content (so that they are read and hashed, but not split
+again). It then times lookups of entities and components in the index,
+compared with finding an entity by parsing every file with
+Document.FromFile(interface_only=True).
+
+Usage:
+    python -m benchmarks.bench_library [--files N] [--entities E] [--edited K] [--lookups L]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+from . import corpus
+
+
+def write(directory: Path, files: int, entities: int) -> List[Path]:
+    """Write `files` sources, each with `entities` uniquely named entity/architecture pairs and a package."""
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for f in range(files):
+        first = f * entities
+        parts = ["library ieee;\nuse ieee.std_logic_1164.all;\n",
+                 corpus.package_source(f"pkg_{f}", entities, first=first)]
+        for i in range(first, first + entities):
+            parts.append(corpus.entity_source(i))
+            parts.append(corpus.architecture_source(i, statements=2))
+        path = directory / f"lib_{f}.vhd"
+        path.write_text("\n".join(parts), encoding='utf-8')
+        paths.append(path)
+    return paths
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Time Library scans and lookups")
+    parser.add_argument('--files', type=int, default=200, help='files in the library')
+    parser.add_argument('--entities', type=int, default=5, help='entity/architecture pairs per file')
+    parser.add_argument('--edited', type=int, default=5, help='files edited before the incremental rescan')
+    parser.add_argument('--lookups', type=int, default=1000, help='lookups timed')
+    args = parser.parse_args()
+
+    from pyhdlio.vhdl import Document, Library
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write(Path(directory) / "src", args.files, args.entities)
+        units = args.files * args.entities
+        print(f"{args.files} files, {units} entities, {units} architectures, {args.files} packages\n")
+
+        with Library(Path(directory) / "library.sqlite") as library:
+            def scan(label: str) -> None:
+                start = time.perf_counter()
+                result = library.scan(paths)
+                elapsed = time.perf_counter() - start
+                assert not result.errors, result.errors
+                print(f"{label:<28} {elapsed * 1000:>9.1f} ms  ({len(result.scanned)} scanned, "
+                      f"{result.unchanged} unchanged)")
+
+            scan("first scan")
+            scan("rescan, no changes")
+            for path in paths[:args.edited]:
+                with path.open("a", encoding='utf-8') as f:
+                    f.write("-- edited\n")
+            scan(f"rescan, {args.edited} files edited")
+            for path in paths:
+                os.utime(path, ns=(0, 0))
+            scan("rescan, all files touched")
+
+            rng = random.Random(0)
+            names = [f"UNIT_{rng.randrange(units)}" for _ in range(args.lookups)]
+            start = time.perf_counter()
+            for name in names:
+                assert len(library.find(name, kind="entity")) == 1
+            entity = (time.perf_counter() - start) / args.lookups
+            start = time.perf_counter()
+            for name in names:
+                assert len(library.find_component(name)) == 1
+            component = (time.perf_counter() - start) / args.lookups
+            print(f"\n{'find entity':<28} {entity * 1e6:>9.1f} us")
+            print(f"{'find component':<28} {component * 1e6:>9.1f} us")
+
+        name = f"unit_{units - 1}"
+        start = time.perf_counter()
+        found = [path for path in paths if name in Document.FromFile(path, interface_only=True).Entities]
+        elapsed = time.perf_counter() - start
+        assert len(found) == 1
+        print(f"{'parse all files to find one':<28} {elapsed * 1e6:>9.0f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Benchmark memory of character streams, and peak memory of parsing a large file.
+
+First, the memory each character stream adds on top of the source text is
+measured with tracemalloc, for ASCII text and for text with non-ASCII
+characters: ANTLR's InputStream (a list of code points), CompactInputStream
+(reads the str) and FileWindowStream (a window of the file).
+
+Then a generated corpus file is parsed in fresh interpreters, with
+Document.FromFile (the whole text, token stream and parse tree are held until
+the document is returned), with Document.FromFile using ANTLR's InputStream
+instead of CompactInputStream, with Document.FromFile(build_tree=False) (the
+model is built while parsing, no parse tree is kept) and with iter_units
+(design units are parsed and released one at a time, so its memory use is
+set by the largest design unit; --components sets the size of the packages,
+the largest units of the corpus). Each child reports its peak resident set
+size before and after parsing; the difference is the memory used by parsing.
+
+Usage:
+    python -m benchmarks.bench_memory [--entities N] [--statements S] [--components C]
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+from . import corpus
+
+# Peak RSS is reported by getrusage in KiB on Linux and in bytes on macOS
+CHILD = """
+import json, resource, sys, time
+scale = 1 if sys.platform == "darwin" else 1024
+from pyhdlio.vhdl import Document, iter_units
+import pyhdlio.vhdl.grammar.VHDLParser, pyhdlio.vhdl.visitor
+before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+start = time.perf_counter()
+path, mode = sys.argv[1], sys.argv[2]
+if mode.startswith("FromFile"):
+    if mode == "FromFile/InputStream":
+        import antlr4, pyhdlio.vhdl.charstream
+        pyhdlio.vhdl.charstream.CompactInputStream = antlr4.InputStream
+    document = Document.FromFile(path, build_tree=mode != "FromFile/listener")
+    units = len(document.Entities) + len(document.Packages)
+else:
+    units = sum(1 for unit in iter_units(path))
+elapsed = time.perf_counter() - start
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+print(json.dumps({"units": units, "seconds": elapsed, "before": before, "peak": peak}))
+"""
+
+MODES = ("FromFile/InputStream", "FromFile", "FromFile/listener", "iter_units")
+
+
+def stream_bytes(factory: Callable[[], Any]) -> int:
+    """Return the memory allocated by `factory()` and still held by its result."""
+    tracemalloc.start()
+    try:
+        stream = factory()
+        stream.LA(1)
+        return tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+
+def stream_table(text: str, path: Path) -> None:
+    """Print the memory per character of each character stream."""
+    from antlr4 import InputStream
+    from pyhdlio.vhdl.charstream import CompactInputStream
+    from pyhdlio.vhdl.streaming import FileWindowStream
+
+    # A character outside Latin-1 makes the str use 2 bytes per character
+    wide = "-- \u03a9\n" + text
+    wide_path = path.with_name("wide.vhd")
+    wide_path.write_text(wide, encoding='utf-8')
+    streams = {
+        "InputStream": lambda t, p: InputStream(t),
+        "CompactInputStream": lambda t, p: CompactInputStream(t),
+        "FileWindowStream": lambda t, p: FileWindowStream(p),
+    }
+    print(f"{len(text) / 2**20:.1f} Mi characters; memory held by the stream besides the caller's text, "
+          f"in bytes per character (FileWindowStream reads the file itself)")
+    print(f"{'stream':<20} {'ASCII':>8} {'non-ASCII':>10}")
+    for name, make in streams.items():
+        ascii_bytes = stream_bytes(lambda: make(text, path))
+        wide_bytes = stream_bytes(lambda: make(wide, wide_path))
+        print(f"{name:<20} {ascii_bytes / len(text):>8.2f} {wide_bytes / len(wide):>10.2f}")
+    print()
+
+
+def run(path: Path, mode: str) -> Dict[str, float]:
+    """Parse `path` in a new interpreter and return its measurements."""
+    out = subprocess.run([sys.executable, "-c", CHILD, str(path), mode], check=True, capture_output=True,
+                         text=True, cwd=Path(__file__).resolve().parent.parent).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare memory of character streams, FromFile and iter_units")
+    parser.add_argument('--entities', type=int, default=300, help='entity/architecture pairs in the generated file')
+    parser.add_argument('--statements', type=int, default=4, help='size of each architecture body')
+    parser.add_argument('--components', type=int, default=10,
+                        help='component declarations per package (sets the size of the largest design unit)')
+    args = parser.parse_args()
+    packages = max(1, -(-args.entities // args.components))
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "large.vhd"
+        start = time.perf_counter()
+        text = corpus.generate(entities=args.entities, statements=args.statements, packages=packages)
+        path.write_text(text, encoding='utf-8')
+        size = path.stat().st_size
+        print(f"generated {size / 2**20:.1f} MiB in {time.perf_counter() - start:.1f} s\n")
+        stream_table(text, path)
+
+        print(f"{'mode':<20} {'units':>6} {'time [s]':>9} {'baseline [MiB]':>15} {'parsing [MiB]':>14}")
+        for mode in MODES:
+            result = run(path, mode)
+            used = (result["peak"] - result["before"]) / 2**20
+            print(f"{mode:<20} {result['units']:>6} {result['seconds']:>9.1f} "
+                  f"{result['before'] / 2**20:>15.1f} {used:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark two-stage (SLL then LL) prediction against full LL prediction.
+
+Usage:
+    python -m benchmarks.bench_prediction [--entities N] [--repeat R]
+"""
+
+import argparse
+import time
+from pathlib import Path
+from typing import Callable
+
+from pyhdlio.vhdl import Document
+
+from . import corpus
+
+SAMPLE = Path(__file__).resolve().parent.parent / "examples" / "vhdl_in" / "sample.vhd"
+
+
+def best_of(repeat: int, fn: Callable[[], object]) -> float:
+    """Return the best wall time of `repeat` calls to `fn`."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def same_tree(vhdl_code: str) -> bool:
+    """Check that both prediction modes produce the same parse tree."""
+    from antlr4 import InputStream, CommonTokenStream
+    from antlr4.error.ErrorListener import ErrorListener
+    from pyhdlio.vhdl.grammar.VHDLLexer import VHDLLexer
+    from pyhdlio.vhdl.grammar.VHDLParser import VHDLParser
+    from pyhdlio.vhdl.model import _parse_design_file
+
+    trees = []
+    for two_stage in (True, False):
+        parser = VHDLParser(CommonTokenStream(VHDLLexer(InputStream(vhdl_code))))
+        tree = _parse_design_file(parser, ErrorListener(), two_stage)
+        trees.append(tree.toStringTree(recog=parser))
+    return trees[0] == trees[1]
+
+
+def run(name: str, vhdl_code: str, repeat: int) -> None:
+    """Time both modes on one source and print a result line."""
+    # Warm the shared DFA cache for both modes before timing
+    Document.FromStr(vhdl_code, two_stage=True)
+    Document.FromStr(vhdl_code, two_stage=False)
+    ll = best_of(repeat, lambda: Document.FromStr(vhdl_code, two_stage=False))
+    sll = best_of(repeat, lambda: Document.FromStr(vhdl_code, two_stage=True))
+    lines = vhdl_code.count("\n") + 1
+    identical = "yes" if same_tree(vhdl_code) else "NO"
+    print(f"{name:<24} {lines:>7} {ll:>9.3f} {sll:>9.3f} {ll / sll:>8.1f}x {identical:>10}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare SLL-then-LL prediction with full LL prediction")
+    parser.add_argument('--entities', type=int, default=20, help='entity/architecture pairs in the generated corpus')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per mode (best is reported)')
+    args = parser.parse_args()
+
+    print(f"{'source':<24} {'lines':>7} {'LL [s]':>9} {'SLL [s]':>9} {'speedup':>9} {'same tree':>10}")
+    run(SAMPLE.name, SAMPLE.read_text(encoding='utf-8'), args.repeat)
+    run(f"generated ({args.entities} units)", corpus.generate(entities=args.entities), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
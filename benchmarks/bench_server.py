@@ -0,0 +1,119 @@
+"""
+Benchmark querying a parse server against parsing in a new script.
+
+A script that looks up the ports of an entity pays for interpreter start-up,
+loading the grammar and warming the DFAs, then parses the file. This
+benchmark times such a script against queries to a `pyhdlio serve` process
+on the same generated files. The queries are sent from this process (the
+round trip only), and from a new `pyhdlio call` process (the round trip plus
+the start-up of a small client). Server queries are timed for a first
+query (parse), a repeated one (cached), one after the file was touched
+(hash check only) and one after it was edited (parse again). The server's
+statistics are printed at the end, with the evictions caused by
+`--max-documents`.
+
+Usage:
+    python -m benchmarks.bench_server [--files N] [--entities E] [--runs R] [--max-documents D]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, List
+
+from . import corpus
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# The script a user would otherwise run for each query
+SCRIPT = """
+import sys
+from pyhdlio.vhdl import Document
+document = Document.FromFile(sys.argv[1], interface_only=True)
+print(sum(len(entity.PortItems) for entity in document.Entities.values()))
+"""
+
+
+def timed(function: Callable[[], object], runs: int) -> float:
+    """Return the median time of `runs` calls, in seconds."""
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare parse server queries with one-off parsing scripts")
+    parser.add_argument('--files', type=int, default=20, help='generated files')
+    parser.add_argument('--entities', type=int, default=10, help='entity/architecture pairs per file')
+    parser.add_argument('--runs', type=int, default=5, help='runs per measurement (median reported)')
+    parser.add_argument('--max-documents', type=int, default=10, help='document cap of the server')
+    args = parser.parse_args()
+
+    from pyhdlio.vhdl.server import ParseClient
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths: List[Path] = corpus.write(Path(directory) / "src", args.files, entities=args.entities)
+        for f, path in enumerate(paths):
+            path.write_text(path.read_text(encoding='utf-8') + f"-- file {f}\n", encoding='utf-8')
+        socket_path = Path(directory) / "server.sock"
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(ROOT), os.environ.get("PYTHONPATH")])))
+
+        script = timed(lambda: subprocess.run([sys.executable, "-c", SCRIPT, str(paths[0])], check=True,
+                                              capture_output=True, env=env), args.runs)
+
+        server = subprocess.Popen([sys.executable, "-m", "pyhdlio.cli", "serve", "--socket", str(socket_path),
+                                   "--max-documents", str(args.max_documents)], env=env,
+                                  stderr=subprocess.PIPE, text=True)
+        try:
+            server.stderr.readline()   # "serving on ..."
+            with ParseClient(socket_path) as client:
+                def query(path: Path) -> object:
+                    return client.call("entities", path=str(path))
+
+                start = time.perf_counter()
+                query(paths[0])
+                first = time.perf_counter() - start
+                cached = timed(lambda: query(paths[0]), args.runs * 20)
+                touched = timed(lambda: (os.utime(paths[0]), query(paths[0])), args.runs * 20)
+
+                def edit_and_query() -> None:
+                    with paths[0].open("a", encoding='utf-8') as f:
+                        f.write("-- edit\n")
+                    query(paths[0])
+                edited = timed(edit_and_query, args.runs)
+
+                call = timed(lambda: subprocess.run(
+                    [sys.executable, "-m", "pyhdlio.cli", "call", "--socket", str(socket_path), "entities",
+                     json.dumps({"path": str(paths[0])})], check=True, capture_output=True, env=env), args.runs)
+
+                start = time.perf_counter()
+                for path in paths:
+                    query(path)
+                sweep = (time.perf_counter() - start) / len(paths)
+                stats = client.call("stats")
+                client.call("shutdown")
+        finally:
+            server.wait(timeout=30)
+
+    print(f"{args.files} files of {args.entities} entities, median of {args.runs} runs\n")
+    print(f"{'new script (start-up, load, parse)':<42} {script * 1000:>9.1f} ms")
+    print(f"{'pyhdlio call (client start-up + cached)':<42} {call * 1000:>9.1f} ms")
+    print(f"{'server: first query (parse)':<42} {first * 1000:>9.1f} ms")
+    print(f"{'server: cached':<42} {cached * 1000:>9.2f} ms")
+    print(f"{'server: touched (hash check)':<42} {touched * 1000:>9.2f} ms")
+    print(f"{'server: edited (parse again)':<42} {edited * 1000:>9.1f} ms")
+    print(f"{'server: sweep over all files (mostly parse)':<42} {sweep * 1000:>9.1f} ms per file")
+    print(f"\nserver stats: {json.dumps(stats)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark parsing many small sources with and without a Session.
+
+Without a session, Document.FromStr builds a new lexer, token stream and
+parser (with its ATN simulators) for every source; with a Session they are
+created once and reset for each source. The set-up alone is timed first
+(creating the objects versus resetting those of a session). Then, since the
+set-up cost matters most for small files, a batch of small generated
+entities (one per source) is parsed both ways, interleaving the rounds, and
+the best time per file is reported. Both ways must build the same model.
+
+Usage:
+    python -m benchmarks.bench_session [--files N] [--ports P] [--repeat R]
+"""
+
+import argparse
+import time
+from typing import Callable, List, Optional
+
+from pyhdlio.vhdl import Document, Session
+
+from . import corpus
+
+
+def parse_all(sources: List[str], session: Optional[Session]) -> List[Document]:
+    """Parse every source and return the documents."""
+    return [Document.FromStr(source, f"file_{i}.vhd", session=session) for i, source in enumerate(sources)]
+
+
+def best_of(repeat: int, fns: List[Callable[[], object]]) -> List[float]:
+    """Return the best wall time of each function over `repeat` interleaved rounds."""
+    best = [float("inf")] * len(fns)
+    for _ in range(repeat):
+        for i, fn in enumerate(fns):
+            start = time.perf_counter()
+            fn()
+            best[i] = min(best[i], time.perf_counter() - start)
+    return best
+
+
+def new_objects() -> object:
+    """Create a lexer, token stream and parser for an empty source, as FromStr does without a session."""
+    from antlr4 import CommonTokenStream
+    from pyhdlio.vhdl.charstream import CompactInputStream
+    from pyhdlio.vhdl.grammar.VHDLLexer import VHDLLexer
+    from pyhdlio.vhdl.grammar.VHDLParser import VHDLParser
+    from pyhdlio.vhdl.scanner import WhitespaceFilter
+
+    return VHDLParser(CommonTokenStream(WhitespaceFilter(VHDLLexer(CompactInputStream("")))))
+
+
+def reset_objects(session: Session) -> object:
+    """Reset the lexer and parser of a session for an empty source."""
+    from pyhdlio.vhdl.scanner import WhitespaceFilter
+
+    return session.parser(WhitespaceFilter(session.lexer("")))
+
+
+def signature(documents: List[Document]) -> List[tuple]:
+    """Describe the entities, generics and ports of the documents, for comparison."""
+    return [(name, [g.Identifiers[0] for g in entity.GenericItems],
+             [(p.Identifiers[0], p.Mode, p.Subtype.Name.Identifier) for p in entity.PortItems])
+            for document in documents for name, entity in document.Entities.items()]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare FromStr with and without a Session on many small sources")
+    parser.add_argument('--files', type=int, default=2000, help='number of sources parsed per round')
+    parser.add_argument('--ports', type=int, default=4, help='ports per entity')
+    parser.add_argument('--repeat', type=int, default=5, help='timed rounds (best is reported)')
+    args = parser.parse_args()
+
+    sources = [corpus.entity_source(i, ports=args.ports, generics=1) for i in range(args.files)]
+    session = Session()
+    # Untimed run: warm the shared DFAs and check both ways build the same model
+    same = signature(parse_all(sources, None)) == signature(parse_all(sources, session))
+
+    count = 10000
+    setup = best_of(args.repeat, [lambda: [new_objects() for _ in range(count)],
+                                  lambda: [reset_objects(session) for _ in range(count)]])
+    print(f"set-up per source: new objects {setup[0] / count * 1e6:.1f} us, "
+          f"Session reset {setup[1] / count * 1e6:.1f} us\n")
+
+    fresh, reused = best_of(args.repeat, [lambda: parse_all(sources, None), lambda: parse_all(sources, session)])
+    print(f"{args.files} sources of {sum(map(len, sources)) // args.files} characters, best of {args.repeat}")
+    print(f"{'parser':<16} {'total [s]':>10} {'per file [us]':>14}")
+    print(f"{'new per file':<16} {fresh:>10.3f} {fresh / args.files * 1e6:>14.1f}")
+    print(f"{'Session':<16} {reused:>10.3f} {reused / args.files * 1e6:>14.1f}")
+    print(f"saved {(fresh - reused) / args.files * 1e6:.1f} us per file ({(1 - reused / fresh) * 100:.1f}%), "
+          f"same model: {'yes' if same else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
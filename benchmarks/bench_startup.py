@@ -0,0 +1,85 @@
+"""
+Benchmark grammar start-up in short-lived processes, with and without ATN snapshots.
+
+Each run is a new interpreter that imports the generated lexer and parser and
+parses the entity declarations of the sample file, as a short CI job or
+editor helper would. Runs alternate between ATN snapshots disabled
+(PYHDLIO_ATN_SNAPSHOT=0, the ATNs are deserialized from `serializedATN()`)
+and enabled (loaded from snapshots written beforehand with
+`pyhdlio snapshot`), using a temporary cache directory.
+
+Usage:
+    python -m benchmarks.bench_startup [--runs N]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+SAMPLE = Path(__file__).resolve().parent.parent / "examples" / "vhdl_in" / "sample.vhd"
+
+# CPU time is reported for the phases inside the child, as it is much less noisy than wall time
+CHILD = f"""
+import json, time
+start = time.process_time()
+from pyhdlio.vhdl.grammar.VHDLLexer import VHDLLexer
+from pyhdlio.vhdl.grammar.VHDLParser import VHDLParser
+grammar = time.process_time()
+from pyhdlio.vhdl import Document
+Document.FromFile({str(SAMPLE)!r}, interface_only=True)
+print(json.dumps({{"grammar": grammar - start, "first parse": time.process_time() - start}}))
+"""
+
+
+def run(env: Dict[str, str]) -> Dict[str, float]:
+    """Run the child script in a new interpreter and return its timings, plus the process wall time."""
+    start = time.perf_counter()
+    out = subprocess.run([sys.executable, "-c", CHILD], check=True, capture_output=True, text=True,
+                         env=env, cwd=Path(__file__).resolve().parent.parent).stdout
+    timings = json.loads(out.strip().splitlines()[-1])
+    timings["process"] = time.perf_counter() - start
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare grammar start-up with and without ATN snapshots")
+    parser.add_argument('--runs', type=int, default=25, help='processes per mode (median is reported)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        base = dict(os.environ, PYHDLIO_CACHE_DIR=cache_dir)
+        modes = {
+            "deserialize": dict(base, PYHDLIO_ATN_SNAPSHOT="0"),
+            "snapshot": dict(base, PYHDLIO_ATN_SNAPSHOT="1"),
+        }
+        # Write the snapshots (and compile bytecode) before timing
+        subprocess.run([sys.executable, "-m", "pyhdlio", "snapshot"], check=True, capture_output=True,
+                       env=modes["snapshot"], cwd=Path(__file__).resolve().parent.parent)
+        run(modes["snapshot"])
+
+        results: Dict[str, List[Dict[str, float]]] = {mode: [] for mode in modes}
+        for _ in range(args.runs):
+            for mode, env in modes.items():
+                results[mode].append(run(env))
+
+    columns = ("grammar", "first parse", "process")
+    print("median CPU time of grammar import and of import + first parse; median wall time of the process")
+    print(f"{'mode':<12} " + " ".join(f"{c + ' [ms]':>17}" for c in columns))
+    medians = {}
+    for mode, runs in results.items():
+        medians[mode] = {c: statistics.median(r[c] for r in runs) * 1000 for c in columns}
+        print(f"{mode:<12} " + " ".join(f"{medians[mode][c]:>17.1f}" for c in columns))
+    saved = medians["deserialize"]["grammar"] - medians["snapshot"]["grammar"]
+    print(f"snapshot saves {saved:.1f} ms of grammar start-up "
+          f"({medians['deserialize']['grammar'] / medians['snapshot']['grammar']:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+Benchmark suite for lexing, parsing and model building, with saved baselines.
+
+Each scenario generates a corpus (see corpus.py) and times the three phases
+of Document.FromStr separately:
+
+- lex: VHDLLexer over the whole source (the token stream is filled, without
+  whitespace tokens, as in FromStr)
+- parse: rule_DesignFile over the buffered tokens, with two-stage prediction
+- visit: VHDLVisitor building the model from the parse tree
+
+Each phase is reported as the best of several runs, in ms and as tokens/s and
+lines/s of the scenario's source. The prediction DFAs are warmed by an untimed
+run first, so the numbers describe steady-state throughput (see bench_dfa.py
+for cold start-up).
+
+Results can be saved as a JSON baseline and later runs compared with it;
+comparing exits with status 1 if any phase is slower than the baseline by
+more than the given threshold.
+
+Usage:
+    python -m benchmarks.bench_suite [--scenario NAME ...] [--repeat R]
+                                     [--save FILE] [--compare FILE] [--threshold PCT]
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import corpus
+
+PHASES = ("lex", "parse", "visit")
+
+# Scenario name -> corpus.generate() arguments
+SCENARIOS: Dict[str, Dict[str, int]] = {
+    "interfaces": dict(entities=100, ports=32, generics=4, statements=0, packages=4),
+    "rtl": dict(entities=40, ports=8, generics=2, statements=16, packages=1),
+    "mixed": dict(entities=100, ports=8, generics=2, statements=4, packages=2),
+}
+
+
+def lex(vhdl_code: str) -> Any:
+    """Lex a source and return the filled token stream."""
+    from antlr4 import CommonTokenStream
+    from pyhdlio.vhdl.charstream import CompactInputStream
+    from pyhdlio.vhdl.grammar.VHDLLexer import VHDLLexer
+    from pyhdlio.vhdl.scanner import WhitespaceFilter
+
+    stream = CommonTokenStream(WhitespaceFilter(VHDLLexer(CompactInputStream(vhdl_code))))
+    stream.fill()
+    return stream
+
+
+def parse(stream: Any) -> Any:
+    """Parse a filled token stream with rule_DesignFile and return the tree."""
+    from pyhdlio.vhdl.grammar.VHDLParser import VHDLParser
+    from pyhdlio.vhdl.model import _error_listener, _parse_design_file
+
+    stream.seek(0)
+    return _parse_design_file(VHDLParser(stream), _error_listener())
+
+
+def visit(tree: Any) -> Any:
+    """Build the model from a parse tree."""
+    from pyhdlio.vhdl.visitor import VHDLVisitor
+
+    return VHDLVisitor().visit(tree)
+
+
+def best_of(repeat: int, phase: Any, arg: Any) -> Tuple[float, Any]:
+    """Return the best wall time of `repeat` calls to `phase(arg)`, and the last result."""
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = phase(arg)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def run_scenario(params: Dict[str, int], repeat: int) -> Dict[str, Any]:
+    """
+    Time the phases on the corpus generated with `params`.
+
+    Returns:
+        Dict with the source size ("lines", "tokens") and, per phase, the best
+        time in seconds and the tokens/s and lines/s it corresponds to
+    """
+    vhdl_code = corpus.generate(**params)
+    # Untimed run: warm the DFAs and check the corpus parses
+    visit(parse(lex(vhdl_code)))
+
+    lex_time, stream = best_of(repeat, lex, vhdl_code)
+    parse_time, tree = best_of(repeat, parse, stream)
+    visit_time, _ = best_of(repeat, visit, tree)
+
+    lines = vhdl_code.count("\n") + 1
+    # All lexed tokens, so that rates can be compared with baselines taken before whitespace was dropped
+    tokens = len(stream.tokens) + stream.tokenSource.dropped
+    result: Dict[str, Any] = {"params": params, "lines": lines, "tokens": tokens}
+    for phase, seconds in zip(PHASES, (lex_time, parse_time, visit_time)):
+        result[phase] = {"seconds": seconds, "tokens_per_s": tokens / seconds, "lines_per_s": lines / seconds}
+    return result
+
+
+def environment() -> Dict[str, str]:
+    """Describe the interpreter and package versions the results were taken with."""
+    from pyhdlio import __version__
+    from pyhdlio.vhdl.cache import runtime_version
+
+    return {
+        "pyhdlio": __version__,
+        "antlr4": runtime_version(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "system": platform.system(),
+    }
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """
+    Print the change of each phase time against a baseline.
+
+    Returns:
+        "scenario/phase" for each phase slower than the baseline by more than `threshold` percent
+    """
+    regressions = []
+    print(f"\ncompared with baseline (pyhdlio {baseline['environment'].get('pyhdlio', '?')}, "
+          f"Python {baseline['environment'].get('python', '?')}):")
+    for name, result in results["scenarios"].items():
+        base = baseline["scenarios"].get(name)
+        if base is None:
+            print(f"{name:<12} not in baseline")
+            continue
+        if base["params"] != result["params"]:
+            print(f"{name:<12} corpus parameters differ from baseline, skipped")
+            continue
+        changes = []
+        for phase in PHASES:
+            change = (result[phase]["seconds"] / base[phase]["seconds"] - 1) * 100
+            changes.append(f"{phase} {change:+6.1f}%")
+            if change > threshold:
+                regressions.append(f"{name}/{phase}")
+        print(f"{name:<12} " + "  ".join(changes))
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Time lexing, parsing and model building on generated corpora")
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS),
+                        help='scenario to run (repeatable; default: all)')
+    parser.add_argument('--repeat', type=int, default=5, help='timed runs per phase (best is reported)')
+    parser.add_argument('--save', type=Path, metavar='FILE', help='write the results as a JSON baseline')
+    parser.add_argument('--compare', type=Path, metavar='FILE', help='compare with a baseline written by --save')
+    parser.add_argument('--threshold', type=float, default=10.0, metavar='PCT',
+                        help='slowdown in percent reported as a regression by --compare (default: 10)')
+    args = parser.parse_args(argv)
+
+    results: Dict[str, Any] = {"environment": environment(), "repeat": args.repeat, "scenarios": {}}
+    print(f"{'scenario':<12} {'lines':>7} {'tokens':>8} {'phase':<6} {'ms':>9} {'ktokens/s':>10} {'klines/s':>9}")
+    for name in args.scenario or SCENARIOS:
+        result = run_scenario(SCENARIOS[name], args.repeat)
+        results["scenarios"][name] = result
+        for phase in PHASES:
+            timing = result[phase]
+            print(f"{name:<12} {result['lines']:>7} {result['tokens']:>8} {phase:<6} "
+                  f"{timing['seconds'] * 1000:>9.1f} {timing['tokens_per_s'] / 1000:>10.1f} "
+                  f"{timing['lines_per_s'] / 1000:>9.1f}")
+
+    if args.save:
+        args.save.parent.mkdir(parents=True, exist_ok=True)
+        args.save.write_text(json.dumps(results, indent=2) + "\n", encoding='utf-8')
+        print(f"\nbaseline written to {args.save}")
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding='utf-8'))
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"slower than baseline by more than {args.threshold:g}%: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+"""
+Stress-test parsing from several threads at once, and measure how batches scale with threads.
+
+The stress test parses generated sources of different shapes from several
+threads in a fresh interpreter, so that all threads start with empty DFAs
+and extend them at the same time; the thread switch interval is made very
+short to interleave the threads as much as possible under the GIL. Every
+thread parses every source (with and without a parse tree, split into
+design units and interface only), each thread in a different order. All
+documents must equal those parsed by a single thread, and no DFA may hold
+two states with the same number (as states added concurrently without
+locking do).
+
+The scaling benchmark parses a batch of generated files with
+Document.FromFiles using worker threads and worker processes, preloading the
+DFAs learnt by a warm-up run in both, and reports the speed-up over parsing
+in one thread. Threads only scale on free-threaded Python builds with the GIL
+disabled (e.g. python3.13t); whether the GIL is enabled is printed.
+
+Usage:
+    python -m benchmarks.bench_threads [--threads T] [--sources S] [--files N] [--entities E] [--jobs J ...]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from . import corpus
+
+# Parses the sources from sys.argv[1] threads and prints the documents and DFA state number duplicates
+CHILD = """
+import json, random, sys, threading
+from concurrent.futures import ThreadPoolExecutor
+from benchmarks.bench_threads import OPTIONS, signature, sources
+from pyhdlio.vhdl import Document, Session
+from pyhdlio.vhdl.concurrency import enable_locking
+from pyhdlio.vhdl.dfa import _recognizers
+enable_locking()
+threads, count = int(sys.argv[1]), int(sys.argv[2])
+texts = sources(count)
+sys.setswitchinterval(1e-6)
+barrier = threading.Barrier(threads)
+def work(thread):
+    barrier.wait()
+    session = Session.current()
+    order = list(range(len(texts)))
+    random.Random(thread).shuffle(order)
+    results = {}
+    for i in order:
+        options = OPTIONS[i % len(OPTIONS)]
+        results[i] = signature(Document.FromStr(texts[i], f"source_{i}.vhd", session=session, **options))
+    return [results[i] for i in range(len(texts))]
+with ThreadPoolExecutor(threads) as pool:
+    documents = list(pool.map(work, range(threads)))
+duplicates = 0
+for cls in _recognizers().values():
+    for dfa in cls.decisionsToDFA:
+        numbers = [state.stateNumber for state in dfa._states]
+        duplicates += len(numbers) - len(set(numbers))
+print(json.dumps({"documents": documents, "duplicates": duplicates}))
+"""
+
+# Document.FromStr options, used in turn for the sources
+OPTIONS: List[Dict[str, bool]] = [{}, {"build_tree": False}, {"split_units": True}, {"interface_only": True}]
+
+
+def sources(count: int) -> List[str]:
+    """Return `count` generated sources of different shapes (and so different prediction paths)."""
+    return [corpus.generate(entities=1 + i % 4, ports=2 + i % 7, generics=i % 3, statements=i % 5, packages=1)
+            for i in range(count)]
+
+
+def signature(document: Any) -> str:
+    """Describe the entities, packages, generics and ports of a document, for comparison."""
+    parts = []
+    for name, entity in document.Entities.items():
+        generics = [(g.Identifiers[0], str(g.Subtype.Name.Identifier)) for g in entity.GenericItems]
+        ports = [(p.Identifiers[0], str(p.Mode), p.Subtype.Name.Identifier) for p in entity.PortItems]
+        parts.append(f"entity {name} {generics} {ports}")
+    for name, package in document.Packages.items():
+        parts.append(f"package {name} {sorted(getattr(package, '_components', {}))}")
+    return "\n".join(parts)
+
+
+def stress(threads: int, count: int) -> bool:
+    """Run the stress test and print its outcome; return True if it passed."""
+    def run(workers: int) -> Dict[str, Any]:
+        out = subprocess.run([sys.executable, "-c", CHILD, str(workers), str(count)], check=True,
+                             capture_output=True, text=True, cwd=Path(__file__).resolve().parent.parent).stdout
+        return json.loads(out.strip().splitlines()[-1])
+
+    start = time.perf_counter()
+    expected = run(1)["documents"][0]
+    result = run(threads)
+    mismatches = sum(documents != expected for documents in result["documents"])
+    print(f"stress: {threads} threads x {count} sources from empty DFAs in {time.perf_counter() - start:.1f} s: "
+          f"{mismatches} threads with differing documents, {result['duplicates']} duplicate DFA states")
+    return mismatches == 0 and result["duplicates"] == 0
+
+
+def scaling(files: int, entities: int, jobs: List[int]) -> None:
+    """Time Document.FromFiles with threads and processes and print the speed-ups."""
+    from pyhdlio.vhdl import Document
+    from pyhdlio.vhdl.concurrency import gil_enabled
+    from pyhdlio.vhdl.dfa import save_dfa
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = corpus.write(Path(directory) / "src", files, entities=entities, statements=2, packages=1)
+        dfa_cache = Path(directory) / "vhdl.dfa"
+        Document.FromFiles(paths[:1], jobs=1)
+        save_dfa(dfa_cache)
+
+        print(f"\n{files} files of {entities} entities, {os.cpu_count()} CPUs, "
+              f"GIL {'enabled' if gil_enabled() else 'disabled'}")
+        print(f"{'workers':<10} {'jobs':>5} {'time [s]':>9} {'speed-up':>9}")
+        base = None
+        for kind in ("threads", "processes"):
+            for count in jobs:
+                start = time.perf_counter()
+                results = Document.FromFiles(paths, jobs=count, dfa_cache=dfa_cache, threads=kind == "threads")
+                elapsed = time.perf_counter() - start
+                assert all(result.error is None for result in results)
+                if base is None:
+                    base = elapsed
+                print(f"{kind:<10} {count:>5} {elapsed:>9.2f} {base / elapsed:>8.2f}x")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Stress-test concurrent parsing and measure thread scaling")
+    parser.add_argument('--threads', type=int, default=8, help='threads of the stress test')
+    parser.add_argument('--sources', type=int, default=24, help='sources parsed by every thread of the stress test')
+    parser.add_argument('--files', type=int, default=64, help='files in the scaling batch')
+    parser.add_argument('--entities', type=int, default=10, help='entity/architecture pairs per file')
+    parser.add_argument('--jobs', type=int, nargs='+', default=[1, 2, 4, 8], help='worker counts to time')
+    args = parser.parse_args()
+
+    passed = stress(args.threads, args.sources)
+    scaling(args.files, args.entities, args.jobs)
+    return 0 if passed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+"""
+Microbenchmark for VHDLVisitor on a large parse tree.
+
+Reports the time to build the model from the parse tree of a generated
+corpus, and the per-node cost of dispatching every node of that tree through
+the visitor's handler table. Dispatch is timed for the handlers of
+VHDLVisitor and for a table covering every parser rule, and compared with an
+isinstance chain of the same lengths, to check that handling more node types
+does not slow down every visit.
+
+Usage:
+    python -m benchmarks.bench_visit [--entities N] [--repeat R]
+"""
+
+import argparse
+import time
+from typing import Any, Callable, List, Sequence
+
+from . import corpus
+
+
+def best_of(repeat: int, fn: Callable[[], object]) -> float:
+    """Return the best wall time of `repeat` calls to `fn`."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def parse(vhdl_code: str) -> Any:
+    from antlr4 import CommonTokenStream, InputStream
+    from pyhdlio.vhdl.grammar.VHDLLexer import VHDLLexer
+    from pyhdlio.vhdl.grammar.VHDLParser import VHDLParser
+    from pyhdlio.vhdl.model import _error_listener, _parse_design_file
+
+    parser = VHDLParser(CommonTokenStream(VHDLLexer(InputStream(vhdl_code))))
+    return _parse_design_file(parser, _error_listener())
+
+
+def nodes_of(tree: Any) -> List[Any]:
+    """All nodes of a parse tree, in pre-order."""
+    nodes, stack = [], [tree]
+    while stack:
+        node = stack.pop()
+        nodes.append(node)
+        stack.extend(reversed(list(node.getChildren())) if node.getChildCount() else ())
+    return nodes
+
+
+def rule_contexts() -> List[type]:
+    """Every parse tree node class of VHDLParser."""
+    from antlr4 import ParserRuleContext
+    from pyhdlio.vhdl.grammar.VHDLParser import VHDLParser
+
+    return [cls for cls in vars(VHDLParser).values()
+            if isinstance(cls, type) and issubclass(cls, ParserRuleContext)]
+
+
+def table_dispatch(node_types: Sequence[type]) -> Callable[[Any], Any]:
+    """VHDLVisitor.visit with a no-op handler for each of `node_types`."""
+    from pyhdlio.vhdl.visitor import VHDLVisitor
+
+    class Visitor(VHDLVisitor):
+        HANDLERS = {node_type: "noop" for node_type in node_types}
+
+        def noop(self, ctx: Any) -> Any:
+            return ctx
+
+    return Visitor().visit
+
+
+def chain_dispatch(node_types: Sequence[type]) -> Callable[[Any], Any]:
+    """An isinstance chain over `node_types`, as VHDLVisitor.visit used to be."""
+    lines = ["def dispatch(tree):"]
+    for i in range(len(node_types)):
+        lines.append(f"    {'if' if i == 0 else 'elif'} isinstance(tree, T[{i}]):\n        return tree")
+    lines.append("    return None")
+    namespace = {"T": list(node_types)}
+    exec("\n".join(lines), namespace)
+    return namespace["dispatch"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Time VHDLVisitor dispatch and model building on a large tree")
+    parser.add_argument('--entities', type=int, default=100, help='entity/architecture pairs in the generated corpus')
+    parser.add_argument('--repeat', type=int, default=5, help='timed runs (best is reported)')
+    args = parser.parse_args()
+
+    from pyhdlio.vhdl.visitor import VHDLVisitor
+
+    tree = parse(corpus.generate(entities=args.entities))
+    nodes = nodes_of(tree)
+    handled = list(VHDLVisitor.HANDLERS)
+    every = rule_contexts()
+    print(f"parse tree: {len(nodes)} nodes; VHDLVisitor handles {len(handled)} of {len(every)} node types")
+
+    build = best_of(args.repeat, lambda: VHDLVisitor().visit(tree))
+    print(f"model from parse tree: {build * 1000:.1f} ms")
+
+    print(f"{'dispatch':<10} {'types':>6} {'ns/node':>9}")
+    for name, make in (("table", table_dispatch), ("isinstance", chain_dispatch)):
+        for node_types in (handled, every):
+            dispatch = make(node_types)
+            elapsed = best_of(args.repeat, lambda: [dispatch(node) for node in nodes])
+            print(f"{name:<10} {len(node_types):>6} {elapsed / len(nodes) * 1e9:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Synthetic VHDL corpus generator for benchmarks.
+
+The generated source is ordinary RTL: entities with generics and grouped
+ports, an architecture per entity with signals, a clocked process and some
+concurrent assignments, plus a package of component declarations.
+"""
+
+from pathlib import Path
+from typing import List
+
+
+def entity_source(index: int, ports: int = 8, generics: int = 2) -> str:
+    """Return the source of one entity declaration."""
+    name = f"unit_{index}"
+    lines = [f"entity {name} is"]
+    if generics:
+        lines.append("    generic (")
+        items = [f"        WIDTH_{g} : positive := {8 * (g + 1)}" for g in range(generics)]
+        lines.append(";\n".join(items))
+        lines.append("    );")
+    lines.append("    port (")
+    items = ["        clk   : in  std_logic", "        reset : in  std_logic"]
+    for p in range(ports):
+        mode = "in " if p % 2 == 0 else "out"
+        width = f"WIDTH_{p % generics}-1" if generics else "7"
+        items.append(f"        p{p}_data : {mode} std_logic_vector({width} downto 0)")
+    lines.append(";\n".join(items))
+    lines.append("    );")
+    lines.append(f"end entity {name};")
+    return "\n".join(lines) + "\n"
+
+
+def architecture_source(index: int, statements: int = 4) -> str:
+    """Return the source of one architecture body for entity `unit_<index>`."""
+    name = f"unit_{index}"
+    lines = [f"architecture rtl of {name} is"]
+    for s in range(statements):
+        lines.append(f"    signal r{s}, r{s}_q : std_logic_vector(7 downto 0);")
+    lines.append("begin")
+    lines.append("    process(clk, reset)")
+    lines.append("    begin")
+    lines.append("        if reset = '1' then")
+    for s in range(statements):
+        lines.append(f"            r{s} <= (others => '0');")
+    lines.append("        elsif rising_edge(clk) then")
+    for s in range(statements):
+        lines.append(f"            if r{s} = x\"FF\" then")
+        lines.append(f"                r{s} <= (others => '0');")
+        lines.append("            else")
+        lines.append(f"                r{s} <= std_logic_vector(unsigned(r{s}) + {s + 1});")
+        lines.append("            end if;")
+    lines.append("        end if;")
+    lines.append("    end process;")
+    for s in range(statements):
+        lines.append(f"    r{s}_q <= r{s} when reset = '0' else (others => '0');")
+    lines.append("end architecture rtl;")
+    return "\n".join(lines) + "\n"
+
+
+def package_source(name: str, components: int, ports: int = 8, generics: int = 2, first: int = 0) -> str:
+    """Return the source of a package holding component declarations for `unit_<first>` onwards."""
+    lines = [f"package {name} is"]
+    for c in range(first, first + components):
+        decl = entity_source(c, ports, generics)
+        decl = decl.replace("entity ", "component ", 1)
+        decl = decl.replace(f"end entity unit_{c};", f"end component unit_{c};")
+        lines.extend("    " + line for line in decl.splitlines())
+        lines.append("")
+    lines.append(f"end package {name};")
+    return "\n".join(lines) + "\n"
+
+
+def generate(entities: int = 20, ports: int = 8, generics: int = 2, statements: int = 4,
+             packages: int = 1) -> str:
+    """
+    Generate a single VHDL source holding packages and `entities` entity/architecture pairs.
+
+    Args:
+        entities: Number of entity/architecture pairs (and package components)
+        ports: Number of data ports per entity, in addition to clock and reset
+        generics: Number of generics per entity
+        statements: Size of each architecture body (signals and assignments)
+        packages: Number of packages the component declarations are spread over
+
+    Returns:
+        VHDL source text
+    """
+    parts: List[str] = []
+    per_package = -(-entities // packages) if packages else 0
+    for p in range(packages):
+        first = p * per_package
+        name = "bench_pkg" if packages == 1 else f"bench_pkg_{p}"
+        parts.append("library ieee;\nuse ieee.std_logic_1164.all;\nuse ieee.numeric_std.all;\n")
+        parts.append(package_source(name, max(0, min(per_package, entities - first)), ports, generics, first))
+    for i in range(entities):
+        parts.append("library ieee;\nuse ieee.std_logic_1164.all;\nuse ieee.numeric_std.all;\n")
+        parts.append(entity_source(i, ports, generics))
+        parts.append(architecture_source(i, statements))
+    return "\n".join(parts)
+
+
+def write(directory: Path, files: int, **kwargs) -> List[Path]:
+    """Write `files` generated sources to `directory` and return their paths."""
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for f in range(files):
+        path = directory / f"bench_{f}.vhd"
+        path.write_text(generate(**kwargs), encoding='utf-8')
+        paths.append(path)
+    return paths
@@ -1,5 +1,4 @@
 import os, sys, traceback, argparse
-import re
 from typing import Union, Tuple
 
 from pyhdlio.vhdl import (
@@ -18,17 +17,8 @@ from pyhdlio.vhdl import (
 
 
 def name_type_str(x : Union[PortSignalInterfaceItem, GenericConstantInterfaceItem]) -> Tuple[str, str]:
-    name_str = x.Identifiers[0]
-    type_str = x.Subtype.Name.Identifier
-    constraint_str = ""
-    if hasattr(x.Subtype, 'Constraint') and x.Subtype.Constraint:
-        constraint_str = str(x.Subtype.Constraint)
-        constraint_str = constraint_str.replace('-', ' - ')
-        constraint_str = re.sub(r'([0-9\w])downto([0-9\w])', r'\1 downto \2', constraint_str)
-        constraint_str = re.sub(r'([0-9\w])\s*downto\s*([0-9\w])', r'\1 downto \2', constraint_str)
-        constraint_str = ' '.join(constraint_str.split())
-        constraint_str = f"({constraint_str})"
-    return name_str, type_str + constraint_str
+    # The subtype name holds the subtype indication as written in the source, constraint included
+    return x.Identifiers[0], x.Subtype.Name.Identifier
 
 def main():
     # Parse command line arguments
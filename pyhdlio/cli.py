@@ -0,0 +1,301 @@
+"""
+Command Line Interface
+
+Examples:
+    pyhdlio parse src/*.vhd
+    pyhdlio parse --jobs 8 --dfa-cache build/vhdl.dfa src/*.vhd
+    pyhdlio cache --remove-stale 30
+    pyhdlio snapshot
+    pyhdlio profile --sort lookahead --top 30 src/*.vhd
+    pyhdlio index --db build/library.sqlite src/*.vhd
+    pyhdlio find --db build/library.sqlite fifo_async
+    pyhdlio order --levels src/*.vhd
+    pyhdlio serve --dfa-cache build/vhdl.dfa &
+    pyhdlio call entities '{"path": "/work/src/fifo.vhd"}'
+"""
+
+__all__ = [
+    "main"
+]
+
+import argparse
+import sys
+from typing import List, Optional
+
+# Described without importing the server module (see server.DEFAULT_SOCKET)
+_DEFAULT_SOCKET = "server.sock in $PYHDLIO_CACHE_DIR or ~/.cache/pyhdlio"
+
+
+def _parse(args: argparse.Namespace) -> int:
+    from .vhdl import Document, ParseCache
+    from .vhdl.dfa import dfa_states, load_dfa, save_dfa
+
+    if args.dfa_cache is not None:
+        load_dfa(args.dfa_cache)
+    loaded = dfa_states()
+
+    cache = ParseCache(args.cache) if args.cache is not None else None
+    results = Document.FromFiles(args.files, jobs=args.jobs, cache=cache, interface_only=args.interface_only,
+                                 split_units=args.split_units, dfa_cache=args.dfa_cache,
+                                 build_tree=not args.no_tree, threads=args.threads)
+    failed = 0
+    for result in results:
+        if result.error is not None:
+            failed += 1
+            print(f"{result.path}: {result.error}", file=sys.stderr)
+        else:
+            document = result.document
+            print(f"{result.path}: {len(document.Entities)} entities, {len(document.Packages)} packages")
+
+    # Only write back if this process learnt something (worker processes do not report their DFAs)
+    if args.dfa_cache is not None and dfa_states() > loaded:
+        save_dfa(args.dfa_cache)
+    return 1 if failed else 0
+
+
+def _cache(args: argparse.Namespace) -> int:
+    from .vhdl import ParseCache
+
+    cache = ParseCache(args.dir)
+    if args.clear:
+        cache.clear()
+    if args.remove_stale is not None:
+        for namespace in cache.remove_stale(args.remove_stale * 24 * 3600):
+            print(f"removed {namespace}")
+    print(f"{cache.directory}: {cache.size} bytes")
+    return 0
+
+
+def _snapshot(args: argparse.Namespace) -> int:
+    from .vhdl.snapshot import save_snapshots
+
+    try:
+        paths = save_snapshots()
+    except (OSError, RuntimeError) as e:
+        print(e, file=sys.stderr)
+        return 1
+    for path in paths:
+        print(f"wrote {path}")
+    return 0
+
+
+def _profile(args: argparse.Namespace) -> int:
+    import json
+    from .vhdl.dfa import load_dfa
+    from .vhdl.profiling import SORT_KEYS, GrammarProfile
+
+    if args.sort not in SORT_KEYS:
+        print(f"unknown sort key {args.sort!r} (choose from {', '.join(SORT_KEYS)})", file=sys.stderr)
+        return 2
+    if args.dfa_cache is not None:
+        load_dfa(args.dfa_cache)
+
+    profile = GrammarProfile()
+    failed = 0
+    for path in args.files:
+        try:
+            profile.profile_file(path, two_stage=not args.ll)
+        except Exception as e:
+            failed += 1
+            print(f"{path}: {e}", file=sys.stderr)
+
+    if args.json:
+        print(json.dumps(profile.as_dict(), indent=2))
+    else:
+        print(profile.report(key=args.sort, top=args.top or None))
+    return 1 if failed else 0
+
+
+def _index(args: argparse.Namespace) -> int:
+    from .vhdl.library import Library
+
+    with Library(args.db) as library:
+        result = library.scan(args.files, prune=args.prune)
+        for path, error in result.errors:
+            print(f"{path}: {error}", file=sys.stderr)
+        print(f"{len(result.scanned)} scanned, {result.unchanged} unchanged, {len(result.removed)} removed; "
+              f"{len(library.files())} files, {len(library.units())} design units")
+    return 1 if result.errors else 0
+
+
+def _find(args: argparse.Namespace) -> int:
+    from .vhdl.library import Library
+
+    with Library(args.db) as library:
+        if args.component:
+            units = library.find_component(args.name)
+        else:
+            units = library.find(args.name, kind=args.kind)
+    for unit in units:
+        print(f"{unit.path}:{unit.start_line}-{unit.end_line}: {unit.kind} {unit.name}")
+    return 0 if units else 1
+
+
+def _order(args: argparse.Namespace) -> int:
+    from .vhdl.dependencies import DependencyCycleError
+    from .vhdl.library import Library
+
+    with Library(args.db or ":memory:") as library:
+        result = library.scan(args.files, library=args.library, jobs=args.jobs)
+        graph = library.dependency_graph(components=not args.no_components)
+    for path, error in result.errors:
+        print(f"{path}: {error}", file=sys.stderr)
+    try:
+        levels = graph.levels()
+    except DependencyCycleError as e:
+        print(e, file=sys.stderr)
+        return 1
+    for number, level in enumerate(levels, 1):
+        if args.levels:
+            print(f"# level {number}")
+        for path in level:
+            print(path)
+    return 0
+
+
+def _serve(args: argparse.Namespace) -> int:
+    from .vhdl.server import DEFAULT_SOCKET, serve
+
+    def ready(server) -> None:
+        print(f"serving on {server.socket_path}", file=sys.stderr, flush=True)
+
+    try:
+        requests, documents = serve(args.socket or DEFAULT_SOCKET, max_documents=args.max_documents,
+                                    max_memory=args.max_memory * 1024 * 1024, dfa_cache=args.dfa_cache,
+                                    max_dfa_states=args.max_dfa_states, warm=args.files, ready=ready)
+    except OSError as e:
+        print(e, file=sys.stderr)
+        return 1
+    print(f"served {requests} requests, {documents} documents cached", file=sys.stderr)
+    return 0
+
+
+def _call(args: argparse.Namespace) -> int:
+    import json
+    from .vhdl.server import DEFAULT_SOCKET, ParseClient
+
+    try:
+        params = json.loads(args.params)
+    except ValueError as e:
+        print(f"params: not valid JSON: {e}", file=sys.stderr)
+        return 2
+    if not isinstance(params, dict):
+        print("params: must be a JSON object, e.g. '{\"path\": \"top.vhd\"}'", file=sys.stderr)
+        return 2
+    try:
+        with ParseClient(args.socket or DEFAULT_SOCKET) as client:
+            result = client.call(args.method, **params)
+    except (OSError, RuntimeError) as e:
+        print(f"{args.method}: {e}", file=sys.stderr)
+        return 1
+    print(json.dumps(result, indent=2))
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Run the pyhdlio command line tool.
+
+    Args:
+        argv: Command line arguments (default: sys.argv[1:])
+
+    Returns:
+        Process exit status
+    """
+    parser = argparse.ArgumentParser(prog="pyhdlio", description="HDL input and output library")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    parse = commands.add_parser("parse", help="parse VHDL files and report their design units")
+    parse.add_argument("files", nargs="+", help="VHDL files to parse")
+    parse.add_argument("-j", "--jobs", type=int, default=1,
+                       help="number of workers (0: number of CPUs; default: 1)")
+    parse.add_argument("--threads", action="store_true", default=None,
+                       help="use worker threads instead of processes (the default when Python runs without the GIL)")
+    parse.add_argument("--interface-only", action="store_true",
+                       help="only parse entity and package declarations")
+    parse.add_argument("--split-units", action="store_true",
+                       help="parse each design unit separately")
+    parse.add_argument("--no-tree", action="store_true",
+                       help="build the model while parsing instead of from a parse tree (uses less memory)")
+    parse.add_argument("--cache", metavar="DIR", help="use an on-disk parse cache in DIR")
+    parse.add_argument("--dfa-cache", metavar="FILE",
+                       help="preload the prediction DFA cache from FILE and save it back after parsing")
+    parse.set_defaults(handler=_parse)
+
+    cache = commands.add_parser("cache", help="report the size of the parse cache, or clear it")
+    cache.add_argument("--dir", help="cache directory (default: $PYHDLIO_CACHE_DIR or ~/.cache/pyhdlio)")
+    cache.add_argument("--clear", action="store_true", help="remove the entries of this pyhdlio version")
+    cache.add_argument("--remove-stale", type=float, metavar="DAYS",
+                       help="delete the entries of other versions not used for DAYS days")
+    cache.set_defaults(handler=_cache)
+
+    snapshot = commands.add_parser("snapshot", help="write snapshots of the grammar ATNs to speed up start-up")
+    snapshot.set_defaults(handler=_snapshot)
+
+    # The subcommands' modules are only imported by their handlers, so that e.g. `find` does not load ANTLR
+    profile = commands.add_parser("profile", help="report the grammar decisions that cost the most to predict")
+    profile.add_argument("files", nargs="+", help="VHDL files to parse")
+    profile.add_argument("--sort", default="time",
+                         help="metric to rank decisions and rules by: time, invocations, lookahead, ... "
+                              "(see pyhdlio.vhdl.profiling.SORT_KEYS; default: time)")
+    profile.add_argument("--top", type=int, default=20, help="number of decisions to list (0: all; default: 20)")
+    profile.add_argument("--ll", action="store_true",
+                         help="parse in LL prediction mode only, which retries SLL conflicts with full context "
+                              "and reports ambiguities (default: an SLL pass first, then LL on failure)")
+    profile.add_argument("--dfa-cache", metavar="FILE",
+                         help="preload the prediction DFA cache from FILE, to profile warm prediction")
+    profile.add_argument("--json", action="store_true", help="print all decisions as JSON")
+    profile.set_defaults(handler=_profile)
+
+    index = commands.add_parser("index", help="index the design units of VHDL files in a library database")
+    index.add_argument("files", nargs="*", help="VHDL files to index")
+    index.add_argument("--db", metavar="FILE", required=True, help="library database (created if missing)")
+    index.add_argument("--prune", action="store_true", help="drop indexed files that are not listed")
+    index.set_defaults(handler=_index)
+
+    find = commands.add_parser("find", help="look up design units in a library database")
+    find.add_argument("name", help="design unit name (case-insensitive)")
+    find.add_argument("--db", metavar="FILE", required=True, help="library database")
+    find.add_argument("--kind", help='only units of this kind, e.g. "entity" or "package body"')
+    find.add_argument("--component", action="store_true", help="find the packages declaring component NAME")
+    find.set_defaults(handler=_find)
+
+    order = commands.add_parser("order", help="print VHDL files in dependency (compile) order")
+    order.add_argument("files", nargs="+", help="VHDL files to order")
+    order.add_argument("--levels", action="store_true",
+                       help="print a '# level N' line before each group of files that can be analyzed in parallel")
+    order.add_argument("--library", default="work", help="VHDL library the files are analyzed into (default: work)")
+    order.add_argument("--no-components", action="store_true",
+                       help="do not order component instantiations after the entities they are bound to by default")
+    order.add_argument("--db", metavar="FILE", help="keep the scanned references in a library database")
+    order.add_argument("-j", "--jobs", type=int, default=1,
+                       help="number of workers scanning files (0: number of CPUs; default: 1)")
+    order.set_defaults(handler=_order)
+
+    serve = commands.add_parser("serve", help="keep a warm parser and parsed documents in a server process")
+    serve.add_argument("files", nargs="*", help="VHDL files to parse before serving")
+    serve.add_argument("--socket", help=f"Unix socket (default: {_DEFAULT_SOCKET})")
+    serve.add_argument("--max-documents", type=int, default=1024,
+                       help="maximum number of cached documents (default: 1024)")
+    serve.add_argument("--max-memory", type=int, default=512, metavar="MIB",
+                       help="maximum estimated memory of the cached documents in MiB (default: 512)")
+    serve.add_argument("--dfa-cache", metavar="FILE",
+                       help="preload the prediction DFA cache from FILE and save it back on exit")
+    serve.add_argument("--max-dfa-states", type=int, metavar="N",
+                       help="clear the DFA cache back to its initial state when it exceeds N states")
+    serve.set_defaults(handler=_serve)
+
+    call = commands.add_parser("call", help="call a method of a running server and print the result as JSON")
+    call.add_argument("method", help="method name, e.g. entities, components, dependencies, stats")
+    call.add_argument("params", nargs="?", default="{}", help="parameters as a JSON object (default: {})")
+    call.add_argument("--socket", help=f"Unix socket (default: {_DEFAULT_SOCKET})")
+    call.set_defaults(handler=_call)
+
+    args = parser.parse_args(argv)
+    if getattr(args, "jobs", None) == 0:
+        args.jobs = None
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
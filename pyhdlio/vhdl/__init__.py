@@ -9,19 +9,85 @@ __all__ = [
     "Component",
     "PortSignalInterfaceItem",
     "GenericConstantInterfaceItem",
-    "VHDLSyntaxError"
+    "VHDLSyntaxError",
+    "ParseCache",
+    "FileResult",
+    "Diagnostic",
+    "Diagnostics",
+    "ParseStats",
+    "Session",
+    "iter_units",
+    "DFACachePolicy",
+    "clear_dfa",
+    "load_dfa",
+    "save_dfa",
+    "set_dfa_policy",
+    "Library",
+    "LibraryUnit",
+    "DependencyCycleError",
+    "DependencyGraph",
+    "scan_dependencies"
 ]
 
-from .model import (
-    Document,
-    Context,
-    Entity,
-    Architecture,
-    Configuration,
-    Package,
-    PackageBody,
-    Component,
-    PortSignalInterfaceItem,
-    GenericConstantInterfaceItem,
-    VHDLSyntaxError
-)
+import importlib
+from typing import TYPE_CHECKING, Any, List
+
+if TYPE_CHECKING:
+    from .model import (
+        Document,
+        Context,
+        Entity,
+        Architecture,
+        Configuration,
+        Package,
+        PackageBody,
+        Component,
+        PortSignalInterfaceItem,
+        GenericConstantInterfaceItem,
+        VHDLSyntaxError
+    )
+    from .cache import ParseCache
+    from .batch import FileResult
+    from .diagnostics import Diagnostic, Diagnostics
+    from .stats import ParseStats
+    from .session import Session
+    from .streaming import iter_units
+    from .dfa import DFACachePolicy, clear_dfa, load_dfa, save_dfa, set_dfa_policy
+    from .library import Library, LibraryUnit
+    from .dependencies import DependencyCycleError, DependencyGraph, scan_dependencies
+
+# Submodule providing each public name. They are imported on first access, so
+# that `import pyhdlio.vhdl` stays cheap: pyVHDLModel is only loaded with the
+# model, and the ANTLR runtime and generated grammar only when parsing.
+_SUBMODULES = {
+    "ParseCache": "cache",
+    "FileResult": "batch",
+    "Diagnostic": "diagnostics",
+    "Diagnostics": "diagnostics",
+    "ParseStats": "stats",
+    "Session": "session",
+    "iter_units": "streaming",
+    "DFACachePolicy": "dfa",
+    "clear_dfa": "dfa",
+    "load_dfa": "dfa",
+    "save_dfa": "dfa",
+    "set_dfa_policy": "dfa",
+    "Library": "library",
+    "LibraryUnit": "library",
+    "DependencyCycleError": "dependencies",
+    "DependencyGraph": "dependencies",
+    "scan_dependencies": "dependencies",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name not in __all__:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module = importlib.import_module(f".{_SUBMODULES.get(name, 'model')}", __name__)
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,456 @@
+"""
+Asynchronous Parsing
+
+Document.FromFile blocks its thread for as long as parsing takes, which
+stalls an asyncio event loop. The coroutines of this module hand the parse
+to a bounded pool of worker processes (or, on free-threaded Python builds,
+threads), as batch.parse_files does, and await the result:
+
+    parse_file_async (Document.FromFileAsync)    one file
+    iter_files_async (Document.FromFilesAsync)   `async for` over many files
+
+iter_files_async applies backpressure: at most `max_pending` files are
+submitted and not yet consumed at any time, so a slow consumer or an endless
+(possibly asynchronous) source of paths does not queue unbounded work.
+Results come in completion order unless `ordered` is set.
+
+Timeouts are per file and count from when a worker starts the file, not
+while the file waits for a worker. The worker processes of a ProcessPool
+(see create_executor) are stopped from this process: a worker whose parse
+runs out of time is killed and replaced by a new one for the next file. A
+thread, or a process of another executor, cannot be stopped: the file is
+reported as timed out on time, but the worker finishes parsing it in the
+background before taking another file. The first files of a new worker
+take longer, while its DFAs warm up, unless they are preloaded (see
+dfa_cache).
+
+Cancelling a coroutine, or closing the iterator, withdraws the files that no
+worker has started; files already being parsed are finished and their
+results discarded.
+
+Examples:
+    document = await Document.FromFileAsync("top.vhd", timeout=10, interface_only=True)
+
+    async for result in Document.FromFilesAsync(paths, jobs=4, timeout=10):
+        if result.error:
+            print(f"{result.path}: {result.error}")
+"""
+
+__all__ = [
+    "ProcessPool",
+    "create_executor",
+    "default_executor",
+    "iter_files_async",
+    "parse_file_async"
+]
+
+import asyncio
+import functools
+import os
+import threading
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import (TYPE_CHECKING, Any, AsyncIterable, AsyncIterator, Callable, Deque, Iterable, List, Optional,
+                    Tuple, Union)
+
+from .batch import FileResult, _init_worker, _parse_file
+
+if TYPE_CHECKING:
+    from .cache import ParseCache
+
+# Executor of parse_file_async when none is given, created on first use
+_default: Optional[Executor] = None
+_default_lock = threading.Lock()
+
+
+def _work(conn: Any, initializer: Optional[Callable[..., Any]], initargs: Tuple[Any, ...]) -> None:
+    """Main function of a ProcessPool worker process: run the calls received over `conn` until told to stop."""
+    if initializer is not None:
+        initializer(*initargs)
+    conn.send(None)
+    while True:
+        try:
+            call = conn.recv()
+        except EOFError:
+            # The pool's process is gone
+            return
+        if call is None:
+            return
+        fn, args, kwargs = call
+        try:
+            result = (True, fn(*args, **kwargs))
+        except BaseException as e:
+            result = (False, e)
+        try:
+            conn.send(result)
+        except Exception as e:
+            conn.send((False, RuntimeError(f"could not send the result back: {type(e).__name__}: {e}")))
+
+
+class ProcessPool(Executor):
+    """
+    Pool of worker processes that can stop a call running out of time.
+
+    Each worker process is driven by a thread of this process, which sends it
+    one call at a time over a pipe and waits for the result. When a call
+    submitted with submit_timed() takes too long, its worker process is
+    killed and replaced by a new one (initialized again) for the next call.
+    Unlike interrupting the parse inside the worker, this cannot leave any
+    state half-changed.
+
+    Worker processes are started with the "forkserver" method where it is
+    available and "spawn" otherwise (see concurrency.process_context()),
+    never by forking this (multi-threaded) process; as with those methods in
+    ProcessPoolExecutor, a script using the pool needs an
+    `if __name__ == "__main__":` guard.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, initializer: Optional[Callable[..., Any]] = None,
+                 initargs: Tuple[Any, ...] = ()) -> None:
+        """
+        Args:
+            max_workers: Number of worker processes (default: number of CPUs)
+            initializer: Optional function called in every worker process when it starts
+            initargs: Arguments of `initializer`
+        """
+        import queue
+        from .concurrency import process_context
+
+        self._context = process_context()
+        self.workers = max_workers or os.cpu_count() or 1
+        self._initializer = initializer
+        self._initargs = initargs
+        self._calls: 'queue.SimpleQueue[Any]' = queue.SimpleQueue()
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._shutdown = False
+
+    def submit(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> 'Future[Any]':
+        """Schedule fn(*args, **kwargs) in a worker process, without a time limit."""
+        return self.submit_timed(None, fn, *args, **kwargs)
+
+    def submit_timed(self, timeout: Optional[float], fn: Callable[..., Any], *args: Any,
+                     **kwargs: Any) -> 'Future[Any]':
+        """
+        Schedule fn(*args, **kwargs) in a worker process, stopping it after `timeout` seconds.
+
+        Args:
+            timeout: Maximum time of the call in seconds, counted from when a
+                worker process starts it (None: no limit)
+            fn: Function to call; it, its arguments and its result must be picklable
+
+        Returns:
+            Future of the result; if the call runs out of time, its exception is a TimeoutError
+        """
+        future: 'Future[Any]' = Future()
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("cannot schedule new calls after shutdown")
+            self._calls.put((future, timeout, fn, args, kwargs))
+            if len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._drive, name=f"ProcessPool-{len(self._threads)}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        return future
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        """
+        Stop the worker processes once the calls already submitted are done.
+
+        Args:
+            wait: Wait until the worker processes have stopped
+            cancel_futures: Cancel the calls that no worker process has started
+        """
+        import queue
+
+        with self._lock:
+            self._shutdown = True
+            threads = list(self._threads)
+        if cancel_futures:
+            while True:
+                try:
+                    call = self._calls.get_nowait()
+                except queue.Empty:
+                    break
+                if call is not None:
+                    call[0].cancel()
+        for _ in threads:
+            self._calls.put(None)
+        if wait:
+            for thread in threads:
+                thread.join()
+
+    def _start(self) -> Tuple[Any, Any]:
+        """Start a worker process and wait until it is initialized; return it and the parent end of its pipe."""
+        conn, child_conn = self._context.Pipe()
+        process = self._context.Process(target=_work, args=(child_conn, self._initializer, self._initargs),
+                                        daemon=True)
+        process.start()
+        child_conn.close()
+        try:
+            conn.recv()
+        except EOFError:
+            process.join()
+            conn.close()
+            raise RuntimeError(f"worker process failed to start (exit code {process.exitcode})") from None
+        return process, conn
+
+    @staticmethod
+    def _stop(worker: Tuple[Any, Any], kill: bool) -> None:
+        """Stop a worker process: kill it, or ask it to exit."""
+        process, conn = worker
+        if not kill:
+            try:
+                conn.send(None)
+                process.join(1)
+            except OSError:
+                pass
+        if process.is_alive():
+            process.kill()
+            process.join()
+        conn.close()
+
+    def _drive(self) -> None:
+        """Send the submitted calls to one worker process at a time, replacing it when it dies or is killed."""
+        worker = None
+        try:
+            while True:
+                call = self._calls.get()
+                if call is None:
+                    return
+                future, timeout, fn, args, kwargs = call
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    if worker is None:
+                        worker = self._start()
+                    worker[1].send((fn, args, kwargs))
+                    if not worker[1].poll(timeout):
+                        self._stop(worker, kill=True)
+                        worker = None
+                        future.set_exception(TimeoutError(f"call took more than {timeout} s"))
+                        continue
+                    ok, value = worker[1].recv()
+                except (EOFError, OSError):
+                    if worker is not None:
+                        self._stop(worker, kill=True)
+                        worker = None
+                    future.set_exception(RuntimeError("worker process died"))
+                    continue
+                except BaseException as e:
+                    # E.g. the call could not be pickled, or its worker process did not start
+                    future.set_exception(e)
+                    continue
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+        finally:
+            if worker is not None:
+                self._stop(worker, kill=False)
+
+
+def _timed_out(path: Path, timeout: float) -> FileResult:
+    return FileResult(path, None, TimeoutError(f"parsing took more than {timeout} s"))
+
+
+def _parse(path: Path, cache: Optional['ParseCache'], options: Any, started: Callable[[], None]) -> FileResult:
+    """Parse one file in a worker thread or a process of another executor, telling `started` when it begins."""
+    started()
+    return _parse_file(path, cache, options)
+
+
+async def _submit(executor: Executor, path: Path, cache: Optional['ParseCache'], options: Any,
+                  timeout: Optional[float]) -> FileResult:
+    """Parse one file in `executor` and await its result, timing it out after `timeout` seconds of parsing."""
+    if isinstance(executor, ProcessPool):
+        # The pool kills a worker process whose parse runs out of time
+        try:
+            return await asyncio.wrap_future(executor.submit_timed(timeout, _parse_file, path, cache, options))
+        except TimeoutError:
+            return _timed_out(path, timeout)
+
+    loop = asyncio.get_running_loop()
+    if isinstance(executor, ThreadPoolExecutor):
+        # The threads share this process's DFAs
+        from .concurrency import enable_locking
+        enable_locking()
+    if timeout is None:
+        return await loop.run_in_executor(executor, _parse_file, path, cache, options)
+
+    # Start the clock when a thread picks the file up (or, for the processes of
+    # other executors, now); the parse itself cannot be stopped
+    started = loop.create_future()
+
+    def notify() -> None:
+        loop.call_soon_threadsafe(lambda: started.done() or started.set_result(None))
+
+    if isinstance(executor, ProcessPoolExecutor):
+        started.set_result(None)
+        call = functools.partial(_parse_file, path, cache, options)
+    else:
+        call = functools.partial(_parse, path, cache, options, notify)
+    future = loop.run_in_executor(executor, call)
+    try:
+        await asyncio.wait([started, future], return_when=asyncio.FIRST_COMPLETED)
+        return await asyncio.wait_for(asyncio.shield(future), timeout)
+    except asyncio.TimeoutError:
+        return _timed_out(path, timeout)
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    finally:
+        started.cancel()
+
+
+def create_executor(jobs: Optional[int] = None, threads: Optional[bool] = None,
+                    dfa_cache: Union[str, Path, None] = None) -> Executor:
+    """
+    Create a pool of workers for parse_file_async and iter_files_async.
+
+    Args:
+        jobs: Number of workers (default: number of CPUs)
+        threads: If True, the workers are threads of this process rather than
+            processes (default: only if the interpreter runs without the GIL)
+        dfa_cache: Optional file written by dfa.save_dfa() to preload in every worker
+
+    Returns:
+        ProcessPool or ThreadPoolExecutor; shut it down when done
+    """
+    if threads is None:
+        from .concurrency import gil_enabled
+        threads = not gil_enabled()
+    if threads:
+        # The threads share this process's grammar, visitor and DFAs
+        from .concurrency import enable_locking
+        enable_locking()
+        _init_worker(dfa_cache)
+        return ThreadPoolExecutor(max_workers=jobs or os.cpu_count())
+    return ProcessPool(jobs, _init_worker, (dfa_cache,))
+
+
+def default_executor() -> Executor:
+    """
+    Return the executor used when none is given, created by create_executor() on first use and then shared.
+
+    It is shut down (without waiting for running parses) when the interpreter exits.
+    """
+    global _default
+    with _default_lock:
+        if _default is None:
+            import atexit
+            _default = create_executor()
+            atexit.register(_default.shutdown, wait=False)
+        return _default
+
+
+async def parse_file_async(file_path: Union[str, Path], executor: Optional[Executor] = None,
+                           timeout: Optional[float] = None, cache: Optional['ParseCache'] = None,
+                           **options: Any) -> Any:
+    """
+    Parse a VHDL file in a worker and await the Document.
+
+    Args:
+        file_path: Path to the VHDL file to parse
+        executor: Workers to parse in (default: default_executor())
+        timeout: Optional maximum parse time in seconds, counted from when a worker starts the file
+        cache: Optional ParseCache
+        options: Options of Document.FromFile (two_stage, interface_only, split_units, build_tree)
+
+    Returns:
+        Document instance containing the parsed design units
+
+    Raises:
+        FileNotFoundError: If the file doesn't exist
+        VHDLSyntaxError: If parsing fails
+        TimeoutError: If parsing takes more than `timeout` seconds
+    """
+    result = await _submit(executor or default_executor(), Path(file_path), cache, options, timeout)
+    if result.error is not None:
+        raise result.error
+    return result.document
+
+
+async def _next(source: AsyncIterator[Any]) -> Tuple[bool, Any]:
+    try:
+        return True, await source.__anext__()
+    except StopAsyncIteration:
+        return False, None
+
+
+async def _aiter(paths: Iterable[Any]) -> AsyncIterator[Any]:
+    for path in paths:
+        yield path
+
+
+async def iter_files_async(paths: Union[Iterable[Union[str, Path]], AsyncIterable[Union[str, Path]]],
+                           jobs: Optional[int] = None, executor: Optional[Executor] = None,
+                           timeout: Optional[float] = None, max_pending: Optional[int] = None,
+                           ordered: bool = False, cache: Optional['ParseCache'] = None,
+                           dfa_cache: Union[str, Path, None] = None, threads: Optional[bool] = None,
+                           **options: Any) -> AsyncIterator[FileResult]:
+    """
+    Parse VHDL files in workers and yield their results as they come.
+
+    Paths are taken from `paths` (an iterable or an asynchronous iterable)
+    only as the number of files submitted and not yet consumed drops below
+    `max_pending`. Errors, including timeouts, are reported per file.
+    Closing the iterator (e.g. with aclose(), or when the task consuming it
+    is cancelled) withdraws the files not started yet.
+
+    Args:
+        paths: Paths of the VHDL files to parse
+        jobs: Number of workers of the executor created for the batch, or of `executor` (default:
+            number of CPUs)
+        executor: Workers to parse in, instead of a pool created (and shut down) for the batch
+        timeout: Optional maximum parse time per file in seconds, counted from when a worker starts it
+        max_pending: Maximum number of files submitted and not yet consumed (default: twice `jobs`)
+        ordered: Yield the results in the order of `paths` rather than as they complete
+        cache: Optional ParseCache shared by all workers
+        dfa_cache: Optional file written by dfa.save_dfa() to preload in every worker of a created executor
+        threads: See create_executor
+        options: Options of Document.FromFile (two_stage, interface_only, split_units, build_tree)
+
+    Returns:
+        Asynchronous iterator over FileResult (path, document, error)
+    """
+    own = executor is None
+    if own:
+        executor = create_executor(jobs, threads, dfa_cache)
+    if max_pending is None:
+        max_pending = 2 * (jobs or os.cpu_count() or 1)
+    source = paths.__aiter__() if hasattr(paths, "__aiter__") else _aiter(paths)
+    pending: Deque['asyncio.Future[FileResult]'] = deque()
+    fetch: Optional['asyncio.Future[Tuple[bool, Any]]'] = None
+    exhausted = False
+    try:
+        while True:
+            if fetch is None and not exhausted and len(pending) < max_pending:
+                fetch = asyncio.ensure_future(_next(source))
+            waiting = set(pending) if fetch is None else {fetch, *pending}
+            if not waiting:
+                return
+            done, _ = await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+            if fetch in done:
+                more, path = fetch.result()
+                fetch = None
+                if more:
+                    pending.append(asyncio.ensure_future(_submit(executor, Path(path), cache, options, timeout)))
+                else:
+                    exhausted = True
+            if ordered:
+                while pending and pending[0].done():
+                    yield pending.popleft().result()
+            else:
+                for task in [task for task in pending if task.done()]:
+                    pending.remove(task)
+                    yield task.result()
+    finally:
+        withdrawn = [*pending, fetch] if fetch is not None else list(pending)
+        for task in withdrawn:
+            task.cancel()
+        if withdrawn:
+            await asyncio.gather(*withdrawn, return_exceptions=True)
+        if own:
+            executor.shutdown(wait=False)
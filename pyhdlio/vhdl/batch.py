@@ -0,0 +1,114 @@
+"""
+Batch Parsing
+
+This module parses many VHDL files at once, spreading them across a pool of
+worker processes or, on free-threaded Python builds, of threads (ANTLR
+parsing in Python is CPU-bound, so threads do not help under the GIL).
+Threads share the prediction DFAs (see concurrency.py) and avoid sending
+documents between processes. Results are returned in the order the files
+were given, with errors reported per file rather than aborting the whole
+batch.
+
+Examples:
+    from pyhdlio.vhdl import Document
+    for result in Document.FromFiles(paths, jobs=8):
+        if result.error:
+            print(f"{result.path}: {result.error}")
+"""
+
+__all__ = [
+    "FileResult",
+    "parse_files"
+]
+
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import repeat
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, NamedTuple, Optional, Union
+
+if TYPE_CHECKING:
+    from .cache import ParseCache
+
+
+class FileResult(NamedTuple):
+    """Outcome of parsing one file in a batch."""
+    path: Path
+    document: Optional[Any]
+    error: Optional[Exception]
+
+
+def _init_worker(dfa_cache: Optional[Path] = None) -> None:
+    """Load the grammar and visitor modules (and a saved DFA cache) once when a worker process starts."""
+    from .grammar import VHDLLexer, VHDLParser  # noqa: F401
+    from . import visitor  # noqa: F401
+    if dfa_cache is not None:
+        from .dfa import load_dfa
+        load_dfa(dfa_cache)
+
+
+def _parse_file(path: Path, cache: Optional['ParseCache'], options: Dict[str, Any]) -> FileResult:
+    """Parse one file with the session of the calling thread, capturing any error in the result."""
+    from .model import Document
+    from .session import Session
+
+    try:
+        document = Document.FromFile(path, cache=cache, session=Session.current(), **options)
+        return FileResult(path, document, None)
+    except Exception as e:
+        # Make sure the error can be sent back from a worker process
+        try:
+            pickle.dumps(e)
+        except Exception:
+            e = RuntimeError(f"{type(e).__name__}: {e}")
+        return FileResult(path, None, e)
+
+
+def parse_files(paths: Iterable[Union[str, Path]], jobs: Optional[int] = None, two_stage: bool = True,
+                cache: Optional['ParseCache'] = None, interface_only: bool = False,
+                split_units: bool = False, dfa_cache: Union[str, Path, None] = None,
+                build_tree: bool = True, threads: Optional[bool] = None) -> List[FileResult]:
+    """
+    Parse several VHDL files, in parallel when `jobs` allows.
+
+    Args:
+        paths: Paths of the VHDL files to parse
+        jobs: Number of workers (default: number of CPUs; 1 parses in this process)
+        two_stage: Try fast SLL prediction before full LL (see Document.FromStr)
+        cache: Optional ParseCache shared by all workers
+        interface_only: Only parse entity and package declarations (see Document.FromStr)
+        split_units: Parse each design unit separately (see Document.FromStr)
+        dfa_cache: Optional file written by dfa.save_dfa() to preload in every worker
+        build_tree: If False, build the models while parsing (see Document.FromStr)
+        threads: If True, the workers are threads of this process rather than
+            processes (default: only if the interpreter runs without the GIL);
+            worker processes are started as by concurrency.process_context()
+
+    Returns:
+        One FileResult per path, in the same order as `paths`
+    """
+    paths = [Path(p) for p in paths]
+    options = dict(two_stage=two_stage, interface_only=interface_only, split_units=split_units,
+                   build_tree=build_tree)
+    if jobs == 1 or len(paths) <= 1:
+        if dfa_cache is not None:
+            from .dfa import load_dfa
+            load_dfa(dfa_cache)
+        return [_parse_file(path, cache, options) for path in paths]
+
+    if threads is None:
+        from .concurrency import gil_enabled
+        threads = not gil_enabled()
+    if threads:
+        # The threads share this process's grammar, visitor and DFAs
+        from .concurrency import enable_locking
+        enable_locking()
+        _init_worker(dfa_cache)
+        with ThreadPoolExecutor(max_workers=jobs or os.cpu_count()) as pool:
+            return list(pool.map(_parse_file, paths, repeat(cache), repeat(options)))
+
+    from .concurrency import process_context
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=process_context(), initializer=_init_worker,
+                             initargs=(dfa_cache,)) as pool:
+        return list(pool.map(_parse_file, paths, repeat(cache), repeat(options)))
@@ -0,0 +1,298 @@
+"""
+Persistent Parse Cache
+
+This module provides an opt-in, on-disk cache of parsed pyVHDLModel Document
+objects. Entries are keyed by a hash of the source text and file name, and the
+cache is namespaced by the pyhdlio version, a fingerprint of the generated
+grammar and the pyVHDLModel version, so upgrading either package invalidates
+all previous entries automatically. The total size of the cache is capped,
+with least recently used entries evicted first.
+
+An entry is only loaded if the file and its directory belong to the current
+user and cannot be written by anybody else, and if its header holds the
+digest of its key and contents; otherwise it counts as a miss.
+
+Namespaces of other versions are left alone, so that several installations
+(e.g. virtual environments) can share a cache directory; remove_stale()
+deletes those not used for a while.
+
+Examples:
+    from pyhdlio.vhdl import Document, ParseCache
+    cache = ParseCache("~/.cache/pyhdlio", max_size=64 * 1024 * 1024)
+    doc = Document.FromFile("counter.vhd", cache=cache)
+"""
+
+__all__ = [
+    "ParseCache",
+    "grammar_version",
+    "model_version",
+    "runtime_version"
+]
+
+import os
+import pickle
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, List, Optional, Union
+
+from .. import __version__
+
+# Directory used when no cache directory is given
+DEFAULT_CACHE_DIR = Path(os.environ.get("PYHDLIO_CACHE_DIR", Path.home() / ".cache" / "pyhdlio"))
+
+# Default cap on the total size of cached entries, in bytes
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+
+# Age in seconds after which remove_stale() deletes the namespace of another version
+DEFAULT_STALE_AGE = 30 * 24 * 3600
+
+
+def _trusted(path: Path) -> bool:
+    """Check that `path` and its directory belong to this user and cannot be written by others."""
+    if not hasattr(os, "getuid"):
+        return True
+    for checked in (path, path.parent):
+        status = checked.stat()
+        if status.st_uid != os.getuid() or status.st_mode & 0o022:
+            return False
+    return True
+
+
+@lru_cache(maxsize=None)
+def grammar_version() -> str:
+    """
+    Return a fingerprint of the generated VHDL grammar.
+
+    The fingerprint is a hash of the generated lexer and parser sources, so it
+    changes whenever the grammar is regenerated, without importing the (large)
+    parser module.
+    """
+    import hashlib
+
+    digest = hashlib.sha256()
+    grammar_dir = Path(__file__).parent / "grammar"
+    for name in ("VHDLLexer.py", "VHDLParser.py"):
+        digest.update((grammar_dir / name).read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def _installed_version(module: str, distribution: str) -> Optional[str]:
+    """
+    Return the version of the distribution installing `module`, or None if unknown.
+
+    The version is taken from the name of the dist-info directory next to the
+    module, which is found without importing it; this is much cheaper than
+    importing importlib.metadata, which is only asked for other layouts
+    (e.g. editable installs).
+    """
+    import importlib.util
+
+    spec = importlib.util.find_spec(module)
+    if spec is None or spec.origin is None:
+        return None
+    # Installers differ in the case of the dist-info name (e.g. pyvhdlmodel-0.29.0.dist-info)
+    prefix = distribution.lower() + "-"
+    for dist_info in Path(spec.origin).parent.parent.glob("*.dist-info"):
+        if dist_info.name.lower().startswith(prefix):
+            return dist_info.name[len(prefix):-len(".dist-info")]
+
+    from importlib import metadata
+    try:
+        return metadata.version(distribution)
+    except metadata.PackageNotFoundError:
+        return None
+
+
+@lru_cache(maxsize=None)
+def runtime_version() -> Optional[str]:
+    """Return the version of the installed ANTLR runtime, or None if unknown."""
+    return _installed_version("antlr4", "antlr4_python3_runtime")
+
+
+@lru_cache(maxsize=None)
+def model_version() -> Optional[str]:
+    """Return the version of the installed pyVHDLModel, or None if unknown."""
+    return _installed_version("pyVHDLModel", "pyVHDLModel")
+
+
+class ParseCache:
+    """
+    On-disk cache of parsed Documents with a size cap and LRU eviction.
+
+    Each entry is stored as a pickle file, after a header line with the
+    digest of its key and pickle. Reading an entry refreshes its
+    modification time, which is used as the recency order for eviction.
+    Entries are written atomically, so a cache directory may be shared by
+    several processes, including processes running other versions of pyhdlio
+    or pyVHDLModel (each version has its own namespace directory).
+    """
+
+    def __init__(self, directory: Union[str, Path, None] = None, max_size: int = DEFAULT_MAX_SIZE):
+        """
+        Open (and create if needed) a parse cache.
+
+        Args:
+            directory: Cache root directory (default: $PYHDLIO_CACHE_DIR or ~/.cache/pyhdlio)
+            max_size: Maximum total size of cache entries in bytes
+        """
+        root = Path(directory).expanduser() if directory is not None else DEFAULT_CACHE_DIR
+        self.max_size = max_size
+        self.directory = root / f"documents-{__version__}-{grammar_version()}-{model_version() or 'unknown'}"
+        self.directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+        self._size: Optional[int] = None
+        # Mark the namespace as in use (see remove_stale)
+        try:
+            os.utime(self.directory)
+        except OSError:
+            pass
+
+    def key(self, vhdl_code: str, filename: Optional[str] = None, **options: Any) -> str:
+        """
+        Return the cache key for a source text.
+
+        Args:
+            vhdl_code: VHDL source code
+            filename: File name associated with the resulting Document
+            options: Parse options that affect the resulting Document
+
+        Returns:
+            Hex digest identifying the cache entry
+        """
+        import hashlib
+
+        digest = hashlib.sha256()
+        digest.update((filename or "").encode('utf-8'))
+        digest.update(b"\0")
+        digest.update(repr(sorted(options.items())).encode('utf-8'))
+        digest.update(b"\0")
+        digest.update(vhdl_code.encode('utf-8'))
+        return digest.hexdigest()
+
+    def _entry(self, key: str) -> Path:
+        return self.directory / f"{key}.pickle"
+
+    @staticmethod
+    def _header(key: str, data: bytes) -> bytes:
+        """Bind the pickled Document `data` to its key."""
+        import hashlib
+
+        digest = hashlib.sha256(key.encode('utf-8') + b"\0" + data).hexdigest()
+        return f"pyhdlio-document {digest}\n".encode()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached Document for `key`, or None on a miss."""
+        path = self._entry(key)
+        try:
+            # Entries that others could have written are not loaded, nor removed
+            if not _trusted(path):
+                return None
+            with open(path, 'rb') as f:
+                header = f.readline()
+                data = f.read()
+            if header != self._header(key, data):
+                raise ValueError(f"{path.name} does not hold the entry of its key")
+            document = pickle.loads(data)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # Corrupt, unreadable or mismatched entry: discard it and treat as a miss
+            path.unlink(missing_ok=True)
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return document
+
+    def put(self, key: str, document: Any) -> None:
+        """Store a Document under `key`, evicting old entries if over the size cap."""
+        import tempfile
+
+        data = pickle.dumps(document, protocol=pickle.HIGHEST_PROTOCOL)
+        data = self._header(key, data) + data
+        if len(data) > self.max_size:
+            return
+        path = self._entry(key)
+        try:
+            # An entry replaced by this one no longer counts
+            replaced = path.stat().st_size
+        except OSError:
+            replaced = 0
+        fd, tmp_name = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_name, path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+        if self._size is None:
+            self._size = self.size
+        else:
+            self._size += len(data) - replaced
+        if self._size > self.max_size:
+            self._evict()
+
+    def _evict(self) -> None:
+        """Remove least recently used entries until the cache fits its size cap."""
+        entries = []
+        for path in self.directory.glob("*.pickle"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_size:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+        self._size = total
+
+    @property
+    def size(self) -> int:
+        """Total size of cache entries in bytes."""
+        total = 0
+        for path in self.directory.glob("*.pickle"):
+            try:
+                total += path.stat().st_size
+            except OSError:
+                pass
+        return total
+
+    def clear(self) -> None:
+        """Remove all entries from the cache."""
+        for path in self.directory.glob("*.pickle"):
+            path.unlink(missing_ok=True)
+        self._size = 0
+
+    def remove_stale(self, max_age: float = DEFAULT_STALE_AGE) -> List[Path]:
+        """
+        Delete the namespaces of other pyhdlio, grammar or pyVHDLModel versions that were not used for a while.
+
+        A namespace counts as used when a ParseCache is opened on it or an
+        entry is added to or removed from it.
+
+        Args:
+            max_age: Minimum time since a namespace was last used, in seconds
+
+        Returns:
+            The namespace directories deleted
+        """
+        import shutil
+        import time
+
+        removed = []
+        for namespace in self.directory.parent.glob("documents-*"):
+            try:
+                if namespace == self.directory or not namespace.is_dir():
+                    continue
+                if time.time() - namespace.stat().st_mtime < max_age:
+                    continue
+            except OSError:
+                continue
+            shutil.rmtree(namespace, ignore_errors=True)
+            removed.append(namespace)
+        return removed
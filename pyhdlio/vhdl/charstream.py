@@ -0,0 +1,48 @@
+"""
+Compact Character Stream
+
+ANTLR's InputStream copies the source text into a Python list of code
+points, which costs a pointer (8 bytes) per character on top of the text
+itself. CompactInputStream reads the code points straight from the str
+instead. The str is already stored compactly (1, 2 or 4 bytes per character
+depending on the widest character, see PEP 393) and is usually held by the
+caller anyway, so the stream adds no memory of its own. Lexing is as fast as
+with InputStream.
+
+The stream is not backed by an mmap of the file: ANTLR indexes characters by
+code point, which a UTF-8 file cannot be indexed by without decoding it, and
+token and error texts are slices of the text. Files too large to hold as a
+str are lexed through a window of the file instead (see streaming.py).
+
+Examples:
+    from antlr4 import CommonTokenStream
+    from pyhdlio.vhdl.charstream import CompactInputStream
+    from pyhdlio.vhdl.grammar.VHDLLexer import VHDLLexer
+    tokens = CommonTokenStream(VHDLLexer(CompactInputStream(vhdl_code)))
+"""
+
+__all__ = [
+    "CompactInputStream"
+]
+
+from antlr4.InputStream import InputStream
+from antlr4.Token import Token
+
+
+class CompactInputStream(InputStream):
+    """ANTLR character stream over a str that does not copy the text."""
+
+    def _loadString(self) -> None:
+        self._index = 0
+        self.data = None
+        self._size = len(self.strdata)
+
+    def LA(self, offset: int) -> int:
+        if offset == 0:
+            return 0  # undefined
+        if offset < 0:
+            offset += 1  # e.g., translate LA(-1) to use offset=0
+        pos = self._index + offset - 1
+        if pos < 0 or pos >= self._size:  # invalid
+            return Token.EOF
+        return ord(self.strdata[pos])
@@ -0,0 +1,164 @@
+"""
+Concurrent Parsing
+
+ANTLR caches the results of adaptive prediction in DFAs shared by all lexer
+and parser instances of a process (see dfa.py) and extends them while
+parsing. The Python runtime does so without locking, which is only safe
+while one thread parses: threads adding the same DFA state concurrently can
+register duplicates of it (with the same state number), and edges added
+concurrently to one state can be lost. On free-threaded CPython builds
+(3.13t and later) such threads really run at the same time.
+
+This module serializes all changes to the shared DFAs, as the Java runtime
+does: LockedLexerATNSimulator and LockedParserATNSimulator add DFA states
+(which also optimizes their configurations against the shared prediction
+context cache) and edges, and set the start states of precedence DFAs, while
+holding DFA_LOCK. Prediction reads the DFAs without locking, so the lock is
+only taken when a DFA misses, which becomes rare once the DFAs are warm.
+
+pyhdlio gives its lexers and parsers these simulators (see thread_safe())
+when the interpreter runs without the GIL, and once enable_locking() was
+called, which its own thread pools do. Call it before parsing from threads
+of your own. Each thread still needs its own lexer and parser, e.g. those of
+Session.current().
+
+Examples:
+    from concurrent.futures import ThreadPoolExecutor
+    from pyhdlio.vhdl import Document, Session
+    from pyhdlio.vhdl.concurrency import enable_locking
+    def parse(path):
+        return Document.FromFile(path, session=Session.current())
+    enable_locking()
+    with ThreadPoolExecutor(8) as pool:
+        documents = list(pool.map(parse, paths))
+"""
+
+__all__ = [
+    "DFA_LOCK",
+    "LockedLexerATNSimulator",
+    "LockedParserATNSimulator",
+    "enable_locking",
+    "gil_enabled",
+    "locking_enabled",
+    "process_context",
+    "thread_safe"
+]
+
+import sys
+import threading
+from typing import Any, TypeVar
+
+from antlr4.atn.LexerATNSimulator import LexerATNSimulator
+from antlr4.atn.ParserATNSimulator import ParserATNSimulator
+from antlr4.dfa.DFA import DFA
+
+# Held while the shared DFAs change; re-entrant, since adding an edge adds its target state
+DFA_LOCK = threading.RLock()
+
+Recognizer = TypeVar("Recognizer")
+
+
+def gil_enabled() -> bool:
+    """Return True unless the interpreter runs without the GIL (free-threaded build with the GIL disabled)."""
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    return is_gil_enabled is None or is_gil_enabled()
+
+
+# Whether new lexers and parsers get the locked simulators (see enable_locking)
+_locking = not gil_enabled()
+
+
+def enable_locking() -> None:
+    """Give the lexers and parsers created or reused from now on simulators that lock the shared DFAs."""
+    global _locking
+    _locking = True
+
+
+def locking_enabled() -> bool:
+    """Return True if lexers and parsers get simulators that lock the shared DFAs."""
+    return _locking
+
+
+def process_context() -> Any:
+    """
+    Return the multiprocessing context that pyhdlio starts worker processes with.
+
+    This is "forkserver" where it is available and "spawn" otherwise. Worker
+    processes are never forked from the calling process: it often runs other
+    threads (servers, asyncio executors, thread pools), and a child forked
+    while one of them holds DFA_LOCK or an import lock would deadlock. Like
+    with "spawn", a script starting worker processes needs an
+    `if __name__ == "__main__":` guard.
+    """
+    import multiprocessing
+
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+class _LockedDFA(DFA):
+    """Precedence DFA whose start states are set while holding DFA_LOCK."""
+
+    # Keep the slots layout of DFA, so that the shared DFAs can be switched to this class
+    __slots__ = ()
+
+    def setPrecedenceStartState(self, precedence: int, startState: Any) -> None:
+        with DFA_LOCK:
+            super().setPrecedenceStartState(precedence, startState)
+
+
+class LockedParserATNSimulator(ParserATNSimulator):
+    """ParserATNSimulator that changes the shared DFAs only while holding DFA_LOCK."""
+
+    def __init__(self, parser: Any, atn: Any, decisionToDFA: list, sharedContextCache: Any) -> None:
+        super().__init__(parser, atn, decisionToDFA, sharedContextCache)
+        with DFA_LOCK:
+            for dfa in decisionToDFA:
+                if dfa.precedenceDfa and type(dfa) is DFA:
+                    dfa.__class__ = _LockedDFA
+
+    def addDFAEdge(self, dfa: DFA, from_: Any, t: int, to: Any) -> Any:
+        with DFA_LOCK:
+            return super().addDFAEdge(dfa, from_, t, to)
+
+    def addDFAState(self, dfa: DFA, D: Any) -> Any:
+        with DFA_LOCK:
+            return super().addDFAState(dfa, D)
+
+
+class LockedLexerATNSimulator(LexerATNSimulator):
+    """LexerATNSimulator that changes the shared DFAs only while holding DFA_LOCK."""
+
+    def addDFAEdge(self, from_: Any, tk: int, to: Any = None, cfgs: Any = None) -> Any:
+        with DFA_LOCK:
+            return super().addDFAEdge(from_, tk, to, cfgs)
+
+    def addDFAState(self, configs: Any) -> Any:
+        with DFA_LOCK:
+            return super().addDFAState(configs)
+
+
+def thread_safe(recognizer: Recognizer) -> Recognizer:
+    """
+    Give a lexer or parser the locked simulator, if locking is enabled.
+
+    Only the runtime's own simulators are replaced, so e.g. a
+    ProfilingATNSimulator is kept.
+
+    Args:
+        recognizer: A VHDLLexer or VHDLParser
+
+    Returns:
+        `recognizer`
+    """
+    if not _locking:
+        return recognizer
+    interp = recognizer._interp
+    if type(interp) is ParserATNSimulator:
+        locked = LockedParserATNSimulator(recognizer, interp.atn, interp.decisionToDFA, interp.sharedContextCache)
+        locked.predictionMode = interp.predictionMode
+        recognizer._interp = locked
+    elif type(interp) is LexerATNSimulator:
+        recognizer._interp = LockedLexerATNSimulator(recognizer, interp.atn, interp.decisionToDFA,
+                                                     interp.sharedContextCache)
+    return recognizer
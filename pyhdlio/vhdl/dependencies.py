@@ -0,0 +1,439 @@
+"""
+Dependency Scan and Compile Order
+
+Simulators analyze VHDL files in dependency order: a package before the
+units that use it, an entity before its architectures, and so on. This
+module finds the references of each design unit from its tokens, without
+running the parser, and sorts files topologically.
+
+The references found are:
+    - use clauses (`use lib.pkg.all`) and context references (`context lib.ctx`)
+    - entity and configuration instantiations and bindings
+      (`u1 : entity work.fifo(rtl)`, `for all : fifo use configuration work.fifo_cfg`)
+    - package instantiations (`package p is new work.generic_pkg`)
+    - component instantiations (`u1 : fifo port map (...)`), which are bound by
+      default to the entity of the same name in the same library
+    - the primary unit of an architecture, configuration or package body
+
+DependencyGraph resolves these references against the design units of the
+files added to it, by library and name. References to units declared
+elsewhere (e.g. `ieee.std_logic_1164`) are reported as unresolved and do not
+affect the order. levels() groups the files into levels that only depend on
+earlier levels, so that the files of one level can be analyzed in parallel;
+compile_order() flattens them. Both raise DependencyCycleError if files
+depend on each other.
+
+Examples:
+    from pyhdlio.vhdl import DependencyGraph
+    graph = DependencyGraph()
+    for path in Path("src").rglob("*.vhd"):
+        graph.add_file(path)
+    for path in graph.compile_order():
+        print(path)
+"""
+
+__all__ = [
+    "DependencyCycleError",
+    "DependencyGraph",
+    "Reference",
+    "UnitDependencies",
+    "scan_dependencies",
+    "unit_references"
+]
+
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple, Union
+
+from antlr4 import Token
+from .concurrency import thread_safe
+from .grammar.VHDLLexer import VHDLLexer
+from .library import _key
+
+_IDENTIFIER = VHDLLexer.LIT_IDENTIFIER
+# Tokens that can follow a dot in a selected name
+_SUFFIXES = {VHDLLexer.LIT_IDENTIFIER, VHDLLexer.KW_ALL, VHDLLexer.LIT_STRING, VHDLLexer.LIT_CHARACTER}
+# Design unit kinds that are primary units, and the kind of reference naming them
+_PRIMARY = {
+    "entity": "entity",
+    "package": "package",
+    "package instance": "package",
+    "configuration": "configuration",
+    "context": "context",
+}
+
+
+class Reference(NamedTuple):
+    """A reference from a design unit to another one."""
+    kind: str                   # "entity", "package", "configuration", "context" or "component"
+    library: Optional[str]      # case-folded library name; None for `work` or no library prefix
+    name: str                   # case-folded unit (or component) name
+    secondary: Optional[str]    # case-folded architecture of an entity reference such as `entity work.e(rtl)`
+    line: int
+
+
+class UnitDependencies(NamedTuple):
+    """A design unit and its references."""
+    kind: str
+    name: str
+    primary: Optional[str]      # entity of an architecture or configuration, package of a package body
+    start_line: int
+    end_line: int
+    references: List[Reference]
+
+
+class DependencyCycleError(Exception):
+    """
+    Exception raised when files depend on each other.
+
+    `cycles` holds one cycle of files for each group of mutually dependent
+    files, each file depending on the next and the last on the first.
+    """
+
+    def __init__(self, cycles: List[List[Path]]):
+        super().__init__("dependency cycle: " + "; ".join(
+            " -> ".join(str(path) for path in cycle + cycle[:1]) for cycle in cycles))
+        self.cycles = cycles
+
+
+def _name(tokens: Sequence[Token], i: int) -> Tuple[List[str], int]:
+    """Read a (selected) name at tokens[i]; return its parts and the index after it."""
+    parts: List[str] = []
+    if i < len(tokens) and tokens[i].type == _IDENTIFIER:
+        parts.append(tokens[i].text)
+        i += 1
+        while i + 1 < len(tokens) and tokens[i].type == VHDLLexer.TOK_DOT and tokens[i + 1].type in _SUFFIXES:
+            parts.append(tokens[i + 1].text)
+            i += 2
+    return parts, i
+
+
+def _names(tokens: Sequence[Token], i: int) -> Iterable[Tuple[List[str], int]]:
+    """Read a comma-separated list of names at tokens[i]; yield the parts and line of each."""
+    while True:
+        if i >= len(tokens):
+            return
+        line = tokens[i].line
+        parts, i = _name(tokens, i)
+        if parts:
+            yield parts, line
+        if i >= len(tokens) or tokens[i].type != VHDLLexer.TOK_COMMA:
+            return
+        i += 1
+
+
+def _library(name: str) -> Optional[str]:
+    """Return the key of a library name, None for `work`."""
+    key = _key(name)
+    return None if key == "work" else key
+
+
+def unit_references(kind: str, name: str, tokens: Sequence[Token]) -> Tuple[Optional[str], List[Reference]]:
+    """
+    Find the references of one design unit.
+
+    Args:
+        kind: Kind of the design unit (see scanner.DesignUnitTokens)
+        name: Name of the design unit
+        tokens: Default-channel tokens of the unit, including its context clause
+
+    Returns:
+        (primary, references): the name of the primary unit of a secondary
+        unit (None for primary units), and the references of the unit in
+        source order, starting with the one to its primary unit
+    """
+    primary = None
+    references: List[Reference] = []
+    libraries = {"work", "std"}
+    count = len(tokens)
+    for i, token in enumerate(tokens):
+        t = token.type
+        previous = tokens[i - 1].type if i else None
+        if t == VHDLLexer.KW_LIBRARY:
+            libraries.update(_key(parts[0]) for parts, _ in _names(tokens, i + 1))
+
+        elif t == VHDLLexer.KW_USE and i + 1 < count and tokens[i + 1].type == _IDENTIFIER:
+            # use lib.pkg.item, lib.pkg; use pkg.item (a package of the same library)
+            for parts, line in _names(tokens, i + 1):
+                if len(parts) >= 3 or (len(parts) == 2 and _key(parts[0]) in libraries):
+                    if _key(parts[1]) != "all":
+                        references.append(Reference("package", _library(parts[0]), _key(parts[1]), None, line))
+                elif len(parts) == 2:
+                    references.append(Reference("package", None, _key(parts[0]), None, line))
+
+        elif (t in (VHDLLexer.KW_ENTITY, VHDLLexer.KW_CONFIGURATION)
+              and previous in (VHDLLexer.TOK_COLON, VHDLLexer.KW_USE)):
+            # Instantiation or binding: [label :] entity lib.e(arch), [use] configuration lib.c
+            parts, j = _name(tokens, i + 1)
+            if parts:
+                library, unit = (_library(parts[0]), parts[1]) if len(parts) >= 2 else (None, parts[0])
+                secondary = None
+                if (t == VHDLLexer.KW_ENTITY and j + 2 < count and tokens[j].type == VHDLLexer.TOK_LP
+                        and tokens[j + 1].type == _IDENTIFIER and tokens[j + 2].type == VHDLLexer.TOK_RP):
+                    secondary = _key(tokens[j + 1].text)
+                kind_name = "entity" if t == VHDLLexer.KW_ENTITY else "configuration"
+                references.append(Reference(kind_name, library, _key(unit), secondary, tokens[i + 1].line))
+
+        elif t == VHDLLexer.KW_CONTEXT and i + 2 < count and tokens[i + 2].type == VHDLLexer.TOK_DOT:
+            # Context reference (a context declaration is `context name is`)
+            for parts, line in _names(tokens, i + 1):
+                if len(parts) >= 2:
+                    references.append(Reference("context", _library(parts[0]), _key(parts[1]), None, line))
+
+        elif (t == VHDLLexer.KW_NEW and previous == VHDLLexer.KW_IS
+              and i >= 3 and tokens[i - 3].type == VHDLLexer.KW_PACKAGE):
+            # package p is new lib.generic_pkg
+            parts, _ = _name(tokens, i + 1)
+            if parts:
+                library, unit = (_library(parts[0]), parts[1]) if len(parts) >= 2 else (None, parts[0])
+                references.append(Reference("package", library, _key(unit), None, tokens[i + 1].line))
+
+        elif t == VHDLLexer.TOK_COLON and previous == _IDENTIFIER and i + 1 < count:
+            # Component instantiation: label : [component] name [generic map | port map]
+            j = i + 1
+            explicit = tokens[j].type == VHDLLexer.KW_COMPONENT
+            if explicit:
+                j += 1
+            parts, k = _name(tokens, j)
+            if parts and (explicit or (k + 1 < count and tokens[k].type in (VHDLLexer.KW_GENERIC, VHDLLexer.KW_PORT)
+                                       and tokens[k + 1].type == VHDLLexer.KW_MAP)):
+                references.append(Reference("component", None, _key(parts[-1]), None, tokens[j].line))
+
+        elif t == VHDLLexer.KW_OF and primary is None and kind in ("architecture", "configuration"):
+            # architecture a of e, configuration c of e
+            parts, _ = _name(tokens, i + 1)
+            if parts:
+                primary = parts[-1]
+                references.insert(0, Reference("entity", None, _key(primary), None, tokens[i + 1].line))
+
+        elif t == VHDLLexer.KW_BODY and primary is None and kind == "package body":
+            primary = name
+            references.insert(0, Reference("package", None, _key(name), None, token.line))
+    return primary, references
+
+
+def scan_dependencies(vhdl_code: str) -> List[UnitDependencies]:
+    """
+    Split a source into design units and find the references of each.
+
+    Incomplete design units (e.g. at the end of a truncated file) are left out.
+
+    Args:
+        vhdl_code: VHDL source text
+
+    Returns:
+        The design units of the source, in source order
+    """
+    from .charstream import CompactInputStream
+    from .scanner import lex_tokens, split_design_units, without_whitespace
+
+    units = []
+    lexer = thread_safe(VHDLLexer(CompactInputStream(vhdl_code)))
+    for unit in split_design_units(without_whitespace(lex_tokens(lexer))):
+        if unit.kind is None or unit.name is None:
+            continue
+        tokens = [token for token in unit.tokens if token.channel == Token.DEFAULT_CHANNEL]
+        primary, references = unit_references(unit.kind, unit.name, tokens)
+        units.append(UnitDependencies(unit.kind, unit.name, primary, unit.start_line, unit.end_line, references))
+    return units
+
+
+def _strongly_connected(dependencies: Dict[Path, List[Path]]) -> List[List[Path]]:
+    """Return the strongly connected components of more than one file (Tarjan's algorithm, without recursion)."""
+    index: Dict[Path, int] = {}
+    low: Dict[Path, int] = {}
+    stack: List[Path] = []
+    on_stack: Set[Path] = set()
+    components = []
+    for root in dependencies:
+        if root in index:
+            continue
+        work = [(root, iter(dependencies[root]))]
+        index[root] = low[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        while work:
+            node, edges = work[-1]
+            for target in edges:
+                if target not in index:
+                    index[target] = low[target] = len(index)
+                    stack.append(target)
+                    on_stack.add(target)
+                    work.append((target, iter(dependencies[target])))
+                    break
+                if target in on_stack:
+                    low[node] = min(low[node], index[target])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    if len(component) > 1:
+                        components.append(component)
+    return components
+
+
+class DependencyGraph:
+    """
+    Files, their design units and the dependencies between them.
+
+    Files are analyzed in the order they were added where dependencies allow.
+    Each file belongs to a VHDL library (`work` by default); a reference
+    without a library prefix, or with `work`, names a unit of the same library.
+    """
+
+    def __init__(self, components: bool = True) -> None:
+        """
+        Args:
+            components: Make a component instantiation depend on the entity it
+                is bound to by default (the entity of the same name). Needed
+                by simulators that bind components when analyzing; leave out
+                for components bound by configurations.
+        """
+        self.components = components
+        self._files: Dict[Path, Tuple[str, List[UnitDependencies]]] = {}
+
+    def add_units(self, path: Union[str, Path], units: Iterable[UnitDependencies], library: str = "work") -> None:
+        """
+        Add a file with the given design units (e.g. from scan_dependencies()), replacing any earlier entry.
+
+        Args:
+            path: Path of the file
+            units: Its design units
+            library: VHDL library the file is analyzed into
+        """
+        self._files[Path(path)] = (_key(library), list(units))
+
+    def add_file(self, path: Union[str, Path], library: str = "work") -> None:
+        """
+        Scan a file and add it.
+
+        Args:
+            path: Path of the VHDL file
+            library: VHDL library the file is analyzed into
+        """
+        self.add_units(path, scan_dependencies(Path(path).read_text(encoding='utf-8')), library)
+
+    def files(self) -> List[Path]:
+        """Return the files, in the order they were added."""
+        return list(self._files)
+
+    def _resolve(self) -> Tuple[Dict[Path, List[Path]], List[Tuple[Path, Reference]]]:
+        primaries: Dict[Tuple[str, str, str], Path] = {}
+        architectures: Dict[Tuple[str, str, str], Path] = {}
+        for path, (library, units) in self._files.items():
+            for unit in units:
+                if unit.kind in _PRIMARY:
+                    primaries.setdefault((library, _PRIMARY[unit.kind], _key(unit.name)), path)
+                elif unit.kind == "architecture" and unit.primary is not None:
+                    architectures.setdefault((library, _key(unit.primary), _key(unit.name)), path)
+
+        order = {path: i for i, path in enumerate(self._files)}
+        dependencies: Dict[Path, List[Path]] = {}
+        unresolved: List[Tuple[Path, Reference]] = []
+        for path, (library, units) in self._files.items():
+            targets: Set[Path] = set()
+            for unit in units:
+                for reference in unit.references:
+                    if reference.kind == "component":
+                        if not self.components:
+                            continue
+                        target = primaries.get((library, "entity", reference.name))
+                    else:
+                        lib = reference.library or library
+                        target = primaries.get((lib, reference.kind, reference.name))
+                        if reference.secondary is not None and target is not None:
+                            architecture = architectures.get((lib, reference.name, reference.secondary))
+                            if architecture is not None:
+                                targets.add(architecture)
+                    if target is None:
+                        unresolved.append((path, reference))
+                    else:
+                        targets.add(target)
+            targets.discard(path)
+            dependencies[path] = sorted(targets, key=order.__getitem__)
+        return dependencies, unresolved
+
+    def dependencies(self) -> Dict[Path, List[Path]]:
+        """Return the files each file depends on, in the order they were added."""
+        return self._resolve()[0]
+
+    def unresolved(self) -> List[Tuple[Path, Reference]]:
+        """Return the references to design units not declared in any of the files, with the file making them."""
+        return self._resolve()[1]
+
+    def cycles(self) -> List[List[Path]]:
+        """
+        Return the dependency cycles.
+
+        Returns:
+            One cycle for each group of mutually dependent files: each file
+            depends on the next, and the last on the first
+        """
+        dependencies = self.dependencies()
+        order = {path: i for i, path in enumerate(dependencies)}
+        cycles = []
+        for component in _strongly_connected(dependencies):
+            members = set(component)
+            cycle = [min(component, key=order.__getitem__)]
+            seen = {cycle[0]: 0}
+            while True:
+                target = next(path for path in dependencies[cycle[-1]] if path in members)
+                if target in seen:
+                    cycles.append(cycle[seen[target]:])
+                    break
+                seen[target] = len(cycle)
+                cycle.append(target)
+        return cycles
+
+    def levels(self) -> List[List[Path]]:
+        """
+        Group the files into levels that only depend on files of earlier levels.
+
+        The files of one level can be analyzed in parallel, once all earlier
+        levels are analyzed.
+
+        Returns:
+            Levels of files, each in the order the files were added
+
+        Raises:
+            DependencyCycleError: If files depend on each other
+        """
+        dependencies = self.dependencies()
+        order = {path: i for i, path in enumerate(dependencies)}
+        waiting = {path: len(targets) for path, targets in dependencies.items()}
+        dependents: Dict[Path, List[Path]] = {path: [] for path in dependencies}
+        for path, targets in dependencies.items():
+            for target in targets:
+                dependents[target].append(path)
+
+        levels = []
+        level = [path for path, count in waiting.items() if count == 0]
+        while level:
+            levels.append(level)
+            ready = []
+            for path in level:
+                for dependent in dependents[path]:
+                    waiting[dependent] -= 1
+                    if waiting[dependent] == 0:
+                        ready.append(dependent)
+            level = sorted(ready, key=order.__getitem__)
+        if sum(len(level) for level in levels) < len(dependencies):
+            raise DependencyCycleError(self.cycles())
+        return levels
+
+    def compile_order(self) -> List[Path]:
+        """
+        Return the files in an order in which each follows the files it depends on.
+
+        Raises:
+            DependencyCycleError: If files depend on each other
+        """
+        return [path for level in self.levels() for path in level]
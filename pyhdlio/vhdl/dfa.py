@@ -0,0 +1,506 @@
+"""
+DFA Cache Persistence and Limits
+
+ANTLR caches the results of adaptive prediction in DFAs shared by all lexer
+and parser instances of a process (`VHDLLexer.decisionsToDFA`,
+`VHDLParser.decisionsToDFA` and `VHDLParser.sharedContextCache`). They start
+empty in every new process, so the first files parsed are much slower than
+later ones. This module saves the warmed DFAs to a file and preloads them in
+another process, so short-lived jobs and worker processes start hot.
+
+In long-running processes the DFAs grow with every new construct parsed. A
+DFACachePolicy installed with set_dfa_policy() puts a ceiling on them: when
+they grow too large they are cleared and a warm baseline is loaded again.
+
+The DFAs are stored as flat tables that refer to ATN states by number and to
+prediction contexts and DFA states by index, and are rebuilt with fresh
+objects on load (ANTLR hashes some of these objects with per-process string
+hashes, so they cannot simply be pickled). A file written for another grammar
+or runtime version is ignored.
+
+Examples:
+    from pyhdlio.vhdl import DFACachePolicy, Document, load_dfa, save_dfa, set_dfa_policy
+    load_dfa("vhdl.dfa")
+    doc = Document.FromFile("counter.vhd")
+    save_dfa("vhdl.dfa")
+
+    set_dfa_policy(DFACachePolicy(max_states=50000, baseline="vhdl.dfa"))
+"""
+
+__all__ = [
+    "DFACachePolicy",
+    "clear_dfa",
+    "dfa_metrics",
+    "dfa_states",
+    "load_dfa",
+    "save_dfa",
+    "set_dfa_policy"
+]
+
+import os
+import pickle
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from antlr4.atn.ATNConfig import ATNConfig, LexerATNConfig
+from antlr4.atn.ATNConfigSet import ATNConfigSet
+from antlr4.atn.ATNSimulator import ATNSimulator
+from antlr4.atn.LexerAction import LexerIndexedCustomAction
+from antlr4.atn.LexerActionExecutor import LexerActionExecutor
+from antlr4.atn.SemanticContext import SemanticContext
+from antlr4.dfa.DFAState import DFAState, PredPrediction
+from antlr4.PredictionContext import (
+    ArrayPredictionContext,
+    PredictionContext,
+    SingletonPredictionContext
+)
+
+# Version of the file layout below
+FORMAT_VERSION = 1
+
+# Default ceiling of DFACachePolicy, in DFA states
+DEFAULT_MAX_STATES = 50000
+
+# Edge targets that are not DFA state indices
+_NO_EDGE = -1
+_ERROR_EDGE = -2
+
+
+def _stamp() -> Tuple[Any, ...]:
+    """Identify the grammar and runtime a DFA file was written for."""
+    from .cache import grammar_version, runtime_version
+    return (FORMAT_VERSION, grammar_version(), runtime_version())
+
+
+def _recognizers() -> Dict[str, Any]:
+    from .grammar.VHDLLexer import VHDLLexer
+    from .grammar.VHDLParser import VHDLParser
+    return {"lexer": VHDLLexer, "parser": VHDLParser}
+
+
+class _NoneSemanticContext:
+    """Stand-in for the SemanticContext.NONE singleton in a pickle."""
+
+
+class _Writer:
+    """Flatten the DFAs of one recognizer class into picklable tables."""
+
+    def __init__(self, atn: Any):
+        self.atn = atn
+        self.contexts: List[Any] = []
+        self._context_index: Dict[int, int] = {}
+
+    def context(self, ctx: Optional[PredictionContext]) -> Optional[int]:
+        """Return the table index of a prediction context, adding it and its parents first."""
+        if ctx is None:
+            return None
+        # Iterative, as context chains can be longer than the recursion limit
+        stack = [ctx]
+        while stack:
+            top = stack[-1]
+            if id(top) in self._context_index:
+                stack.pop()
+                continue
+            parents = top.parents if isinstance(top, ArrayPredictionContext) else [top.parentCtx]
+            missing = [p for p in parents if p is not None and id(p) not in self._context_index]
+            if missing:
+                stack.extend(missing)
+                continue
+            stack.pop()
+            self._context_index[id(top)] = len(self.contexts)
+            if top is PredictionContext.EMPTY:
+                self.contexts.append(None)
+            elif isinstance(top, ArrayPredictionContext):
+                self.contexts.append((
+                    tuple(self._context_index[id(p)] if p is not None else None for p in top.parents),
+                    tuple(top.returnStates)
+                ))
+            else:
+                parent = top.parentCtx
+                self.contexts.append((self._context_index[id(parent)] if parent is not None else None,
+                                      top.returnState))
+        return self._context_index[id(ctx)]
+
+    def semantic(self, semantic: Any) -> Any:
+        return _NoneSemanticContext if semantic is SemanticContext.NONE else semantic
+
+    def executor(self, executor: Optional[LexerActionExecutor]) -> Optional[Tuple[Any, ...]]:
+        """Refer to lexer actions by their index in the ATN."""
+        if executor is None:
+            return None
+        actions = []
+        for action in executor.lexerActions:
+            if isinstance(action, LexerIndexedCustomAction):
+                actions.append((self.atn.lexerActions.index(action.action), action.offset))
+            else:
+                actions.append((self.atn.lexerActions.index(action), None))
+        return tuple(actions)
+
+    def configs(self, configs: ATNConfigSet) -> Tuple[Any, ...]:
+        rows = []
+        for c in configs.configs:
+            row = (c.state.stateNumber, c.alt, self.context(c.context), self.semantic(c.semanticContext),
+                   c.reachesIntoOuterContext, c.precedenceFilterSuppressed)
+            if isinstance(c, LexerATNConfig):
+                row += (self.executor(c.lexerActionExecutor), c.passedThroughNonGreedyDecision)
+            rows.append(row)
+        return (configs.fullCtx, tuple(rows), configs.uniqueAlt, configs.conflictingAlts,
+                configs.hasSemanticContext, configs.dipsIntoOuterContext, configs.readonly)
+
+    def dfa(self, dfa: Any) -> Tuple[Any, ...]:
+        """Flatten one DFA into (number of DFA states in dfa.states, states, s0 index)."""
+        states = list(dfa._states.values())
+        in_dict = len(states)
+        index = {id(s): i for i, s in enumerate(states)}
+
+        def ref(state: Optional[DFAState]) -> int:
+            if state is None:
+                return _NO_EDGE
+            if state is ATNSimulator.ERROR:
+                return _ERROR_EDGE
+            if id(state) not in index:
+                # Reachable, but not registered in dfa.states (e.g. a precedence start state)
+                index[id(state)] = len(states)
+                states.append(state)
+            return index[id(state)]
+
+        s0 = ref(dfa.s0)
+        rows = []
+        i = 0
+        while i < len(states):
+            s = states[i]
+            edges = None if s.edges is None else tuple(ref(t) for t in s.edges)
+            predicates = None if s.predicates is None else tuple(
+                (self.semantic(p.pred), p.alt) for p in s.predicates
+            )
+            rows.append((s.stateNumber, self.configs(s.configs), edges, s.isAcceptState, s.prediction,
+                         self.executor(s.lexerActionExecutor), s.requiresFullContext, predicates))
+            i += 1
+        return (in_dict, tuple(rows), s0)
+
+
+class _Reader:
+    """Rebuild the DFAs of one recognizer class from the tables of _Writer."""
+
+    def __init__(self, atn: Any, contexts: List[Any]):
+        self.atn = atn
+        self.contexts: List[Optional[PredictionContext]] = []
+        for row in contexts:
+            if row is None:
+                self.contexts.append(PredictionContext.EMPTY)
+            elif isinstance(row[0], tuple):
+                parents = [self.contexts[p] if p is not None else None for p in row[0]]
+                self.contexts.append(ArrayPredictionContext(parents, list(row[1])))
+            else:
+                parent = self.contexts[row[0]] if row[0] is not None else None
+                self.contexts.append(SingletonPredictionContext(parent, row[1]))
+
+    def context(self, index: Optional[int]) -> Optional[PredictionContext]:
+        return self.contexts[index] if index is not None else None
+
+    def semantic(self, semantic: Any) -> Any:
+        return SemanticContext.NONE if semantic is _NoneSemanticContext else semantic
+
+    def executor(self, actions: Optional[Tuple[Any, ...]]) -> Optional[LexerActionExecutor]:
+        if actions is None:
+            return None
+        return LexerActionExecutor([
+            self.atn.lexerActions[a] if offset is None
+            else LexerIndexedCustomAction(offset, self.atn.lexerActions[a])
+            for a, offset in actions
+        ])
+
+    def configs(self, row: Tuple[Any, ...]) -> ATNConfigSet:
+        full_ctx, config_rows, unique_alt, conflicting_alts, has_semantic, dips, readonly = row
+        configs = ATNConfigSet(full_ctx)
+        for c in config_rows:
+            config = ATNConfig.__new__(LexerATNConfig if len(c) > 6 else ATNConfig)
+            config.state = self.atn.states[c[0]]
+            config.alt = c[1]
+            config.context = self.context(c[2])
+            config.semanticContext = self.semantic(c[3])
+            config.reachesIntoOuterContext = c[4]
+            config.precedenceFilterSuppressed = c[5]
+            if len(c) > 6:
+                config.lexerActionExecutor = self.executor(c[6])
+                config.passedThroughNonGreedyDecision = c[7]
+            configs.configs.append(config)
+        configs.uniqueAlt = unique_alt
+        configs.conflictingAlts = conflicting_alts
+        configs.hasSemanticContext = has_semantic
+        configs.dipsIntoOuterContext = dips
+        if readonly:
+            configs.setReadonly(True)
+        return configs
+
+    def dfa(self, dfa: Any, table: Tuple[Any, ...]) -> None:
+        in_dict, rows, s0 = table
+        states = []
+        for number, configs, _, accept, prediction, executor, full_context, predicates in rows:
+            state = DFAState(number, self.configs(configs))
+            state.isAcceptState = accept
+            state.prediction = prediction
+            state.lexerActionExecutor = self.executor(executor)
+            state.requiresFullContext = full_context
+            if predicates is not None:
+                state.predicates = [PredPrediction(self.semantic(p), alt) for p, alt in predicates]
+            states.append(state)
+
+        def target(ref: int) -> Optional[DFAState]:
+            if ref == _NO_EDGE:
+                return None
+            if ref == _ERROR_EDGE:
+                return ATNSimulator.ERROR
+            return states[ref]
+
+        for state, row in zip(states, rows):
+            if row[2] is not None:
+                state.edges = [target(ref) for ref in row[2]]
+        dfa._states = {state: state for state in states[:in_dict]}
+        dfa.s0 = target(s0)
+
+
+def dfa_states() -> int:
+    """Return the number of DFA states currently cached by the VHDL lexer and parser."""
+    return sum(len(dfa._states) for cls in _recognizers().values() for dfa in cls.decisionsToDFA)
+
+
+def dfa_metrics() -> Dict[str, int]:
+    """
+    Return the size of the DFA cache of the VHDL lexer and parser.
+
+    Returns:
+        Dict with the DFA states of the lexer ("lexer_states") and of the
+        parser ("parser_states"), and the prediction contexts cached by the
+        parser ("contexts")
+    """
+    recognizers = _recognizers()
+    shared = getattr(recognizers["parser"], "sharedContextCache", None)
+    return {
+        "lexer_states": sum(len(dfa._states) for dfa in recognizers["lexer"].decisionsToDFA),
+        "parser_states": sum(len(dfa._states) for dfa in recognizers["parser"].decisionsToDFA),
+        "contexts": len(shared.cache) if shared is not None else 0,
+    }
+
+
+def clear_dfa() -> int:
+    """
+    Drop the DFA cache of the VHDL lexer and parser, as ANTLR's clearDFA does.
+
+    Every DFA is replaced by an empty one in the shared lists, so lexers and
+    parsers created earlier keep working and relearn what they need; the
+    prediction contexts cached by the parser are dropped as well.
+
+    Returns:
+        Number of DFA states dropped
+    """
+    from .concurrency import DFA_LOCK
+
+    with DFA_LOCK:
+        dropped = dfa_states()
+        for cls in _recognizers().values():
+            dfas = cls.decisionsToDFA
+            for i, dfa in enumerate(dfas):
+                # Keep the class, which may lock (see concurrency.py)
+                dfas[i] = type(dfa)(dfa.atnStartState, dfa.decision)
+            shared = getattr(cls, "sharedContextCache", None)
+            if shared is not None:
+                shared.cache.clear()
+    return dropped
+
+
+def _snapshot() -> Dict[str, Any]:
+    """Flatten the DFA cache of the VHDL lexer and parser into picklable tables."""
+    from .concurrency import DFA_LOCK
+
+    data: Dict[str, Any] = {"stamp": _stamp()}
+    with DFA_LOCK:
+        for name, cls in _recognizers().items():
+            writer = _Writer(cls.atn)
+            dfas = tuple(writer.dfa(dfa) for dfa in cls.decisionsToDFA)
+            shared = getattr(cls, "sharedContextCache", None)
+            cached = tuple(writer.context(ctx) for ctx in shared.cache) if shared is not None else ()
+            data[name] = (writer.contexts, dfas, cached)
+    return data
+
+
+def _read(path: Union[str, Path]) -> Optional[Dict[str, Any]]:
+    """Return the tables saved in a DFA file, or None if it is missing, unreadable or stale."""
+    try:
+        with open(Path(path).expanduser(), 'rb') as f:
+            data = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError, IndexError):
+        return None
+    if not isinstance(data, dict) or data.get("stamp") != _stamp():
+        return None
+    return data
+
+
+def _restore(data: Dict[str, Any]) -> bool:
+    """Rebuild the DFAs that are still empty from the tables of _snapshot; False if they do not fit the grammar."""
+    from .concurrency import DFA_LOCK
+
+    with DFA_LOCK:
+        for name, cls in _recognizers().items():
+            contexts, dfas, cached = data[name]
+            if len(dfas) != len(cls.decisionsToDFA):
+                return False
+            reader = _Reader(cls.atn, contexts)
+            for dfa, table in zip(cls.decisionsToDFA, dfas):
+                if not dfa._states:
+                    reader.dfa(dfa, table)
+            shared = getattr(cls, "sharedContextCache", None)
+            if shared is not None:
+                for index in cached:
+                    shared.add(reader.contexts[index])
+    return True
+
+
+def save_dfa(path: Union[str, Path]) -> int:
+    """
+    Save the DFA cache of the VHDL lexer and parser to a file.
+
+    The file is written atomically, so it can be shared by concurrent jobs.
+    Threads parsing meanwhile wait while the DFAs are read.
+
+    Args:
+        path: File to write
+
+    Returns:
+        Number of DFA states saved
+    """
+    data = _snapshot()
+    path = Path(path).expanduser()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+    return sum(table[0] for name in _recognizers() for table in data[name][1])
+
+
+def load_dfa(path: Union[str, Path]) -> bool:
+    """
+    Preload the DFA cache of the VHDL lexer and parser from a file.
+
+    Call this at startup, before parsing: only DFAs that are still empty are
+    loaded, so states learnt by this process are never replaced.
+
+    Args:
+        path: File written by save_dfa()
+
+    Returns:
+        True if the file was loaded; False if it does not exist, is
+        unreadable, or was written for another grammar or runtime version
+    """
+    data = _read(path)
+    return data is not None and _restore(data)
+
+
+class DFACachePolicy:
+    """
+    Ceiling on the DFA cache of a long-running process.
+
+    The DFAs only ever grow: every new construct, and in particular every
+    unusual one, adds states (of a few KiB each, with their prediction
+    contexts). Once installed with set_dfa_policy(), the policy counts the
+    documents parsed in this process and every `check_every` documents
+    compares the number of DFA states with `max_states`. Above it, the DFA
+    cache is cleared (see clear_dfa) and the baseline is loaded again, so
+    parsing stays warm for common code while what was learnt from unusual
+    sources is dropped. The baseline is the DFA file `baseline` (see
+    save_dfa) or else the DFAs as they were when the policy was installed;
+    it should hold well under `max_states` states.
+
+    Attributes:
+        max_states: Number of DFA states above which the cache is cleared
+        check_every: Number of documents parsed between checks
+        documents: Documents parsed since the policy was created
+        checks: Number of times the size was checked
+        clears: Number of times the cache was cleared
+        states_dropped: DFA states dropped by all clears
+        peak_states: Largest number of DFA states seen by a check
+    """
+
+    def __init__(self, max_states: int = DEFAULT_MAX_STATES, check_every: int = 100,
+                 baseline: Union[str, Path, None] = None):
+        """
+        Args:
+            max_states: Number of DFA states above which the cache is cleared
+            check_every: Number of documents parsed between checks
+            baseline: Optional DFA file (see save_dfa) loaded after each clear;
+                ignored if it is missing or stale
+        """
+        self.max_states = max_states
+        self.check_every = max(1, check_every)
+        self.documents = 0
+        self.checks = 0
+        self.clears = 0
+        self.states_dropped = 0
+        self.peak_states = 0
+        self._baseline = _read(baseline) if baseline is not None else None
+        self._capture = baseline is None
+
+    def document_parsed(self) -> None:
+        """Count a parsed document, checking the size of the cache every `check_every` documents."""
+        from .concurrency import DFA_LOCK
+
+        # Documents are counted by all parsing threads: count and decide under the lock
+        with DFA_LOCK:
+            self.documents += 1
+            due = self.documents % self.check_every == 0
+        if due:
+            self.check()
+
+    def check(self) -> bool:
+        """
+        Clear the DFA cache now if it holds more than `max_states` states.
+
+        Returns:
+            True if the cache was cleared
+        """
+        from .concurrency import DFA_LOCK
+
+        with DFA_LOCK:
+            self.checks += 1
+            states = dfa_states()
+            self.peak_states = max(self.peak_states, states)
+            if states <= self.max_states:
+                return False
+            self.states_dropped += clear_dfa()
+            self.clears += 1
+            if self._baseline is not None:
+                _restore(self._baseline)
+        return True
+
+    def metrics(self) -> Dict[str, int]:
+        """Return the size of the DFA cache (see dfa_metrics) and the counters of the policy."""
+        result = dfa_metrics()
+        result.update(max_states=self.max_states, documents=self.documents, checks=self.checks,
+                      clears=self.clears, states_dropped=self.states_dropped, peak_states=self.peak_states)
+        return result
+
+
+# Policy counting the documents parsed in this process (see set_dfa_policy)
+_policy: Optional[DFACachePolicy] = None
+
+
+def set_dfa_policy(policy: Optional[DFACachePolicy]) -> None:
+    """
+    Install a DFACachePolicy for the documents parsed in this process, or remove it with None.
+
+    Documents parsed by Document.FromStr, FromFile, FromEdit and iter_units
+    are counted, in all threads; worker processes of Document.FromFiles are
+    not covered. A policy without a baseline file takes the current DFAs as
+    its baseline now.
+    """
+    global _policy
+    if policy is not None and policy._capture:
+        policy._baseline = _snapshot()
+        policy._capture = False
+    _policy = policy
@@ -0,0 +1,112 @@
+"""
+Diagnostics
+
+This module provides a collector for the problems found while building the
+model from a parse tree (for example a construct the visitor could not
+convert). Each problem is recorded as a Diagnostic with its severity, message
+and source position, instead of being printed.
+
+Examples:
+    from pyhdlio.vhdl import Diagnostics, Document
+    diagnostics = Diagnostics()
+    doc = Document.FromFile("counter.vhd", diagnostics=diagnostics)
+    for diagnostic in diagnostics.errors:
+        print(diagnostic)
+"""
+
+__all__ = [
+    "Diagnostic",
+    "Diagnostics"
+]
+
+from typing import Iterator, List, NamedTuple, Optional
+
+# Severities, most severe first
+ERROR = "error"
+WARNING = "warning"
+
+
+class Diagnostic(NamedTuple):
+    """One problem found while building the model."""
+    severity: str                    # ERROR or WARNING
+    message: str
+    line: Optional[int] = None       # 1-based line of the node the problem was found in
+    column: Optional[int] = None     # 0-based column of the node the problem was found in
+    rule: Optional[str] = None       # parse tree node type, e.g. "Rule_EntityDeclarationContext"
+    exception: Optional[BaseException] = None
+
+    def __str__(self) -> str:
+        where = f"line {self.line}, column {self.column}: " if self.line is not None else ""
+        return f"{where}{self.severity}: {self.message}"
+
+
+class Diagnostics:
+    """Collector of Diagnostic records, in the order they were reported."""
+
+    def __init__(self) -> None:
+        self._items: List[Diagnostic] = []
+
+    def report(self, severity: str, message: str, node: Optional[object] = None,
+               exception: Optional[BaseException] = None) -> Diagnostic:
+        """
+        Record a diagnostic.
+
+        Args:
+            severity: ERROR or WARNING
+            message: Description of the problem
+            node: Optional parse tree node the problem was found in; its start
+                token gives the position
+            exception: Optional exception that caused the problem
+
+        Returns:
+            The recorded Diagnostic
+        """
+        line = column = rule = None
+        if node is not None:
+            rule = type(node).__name__
+            start = getattr(node, "start", None) or getattr(node, "symbol", None)
+            if start is not None:
+                line, column = start.line, start.column
+        diagnostic = Diagnostic(severity, message, line, column, rule, exception)
+        self._items.append(diagnostic)
+        return diagnostic
+
+    def error(self, message: str, node: Optional[object] = None,
+              exception: Optional[BaseException] = None) -> Diagnostic:
+        """Record an error (see report)."""
+        return self.report(ERROR, message, node, exception)
+
+    def warning(self, message: str, node: Optional[object] = None,
+                exception: Optional[BaseException] = None) -> Diagnostic:
+        """Record a warning (see report)."""
+        return self.report(WARNING, message, node, exception)
+
+    @property
+    def errors(self) -> List[Diagnostic]:
+        """Recorded errors."""
+        return [d for d in self._items if d.severity == ERROR]
+
+    @property
+    def warnings(self) -> List[Diagnostic]:
+        """Recorded warnings."""
+        return [d for d in self._items if d.severity == WARNING]
+
+    def clear(self) -> None:
+        """Remove all recorded diagnostics."""
+        self._items.clear()
+
+    def truncate(self, count: int) -> None:
+        """Remove the diagnostics recorded after the first `count`."""
+        del self._items[count:]
+
+    def __iter__(self) -> Iterator[Diagnostic]:
+        return iter(self._items)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __bool__(self) -> bool:
+        return bool(self._items)
+
+    def __repr__(self) -> str:
+        return f"Diagnostics({self._items!r})"
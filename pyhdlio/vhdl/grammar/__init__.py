@@ -0,0 +1,55 @@
+"""
+Generated VHDL Lexer and Parser
+
+The modules of this package are generated by ANTLR from VHDLLexer.g4 and
+VHDLParser.g4 and are not edited by hand. The recognizers of VHDLLexer and
+VHDLParser deserialize their ATN when the module is executed, through the
+ATNDeserializer that `from antlr4 import *` binds. This package imports both
+modules with a loader that binds snapshot.snapshot_deserializer() there while
+the module runs, so that they can load their ATN from a snapshot instead (see
+pyhdlio.vhdl.snapshot). Regenerating the grammar needs no further step.
+"""
+
+import sys
+import threading
+from importlib.machinery import ModuleSpec, PathFinder, SourceFileLoader
+from types import ModuleType
+from typing import Any, Optional, Sequence
+
+# Generated modules whose ATN may be loaded from a snapshot
+_SNAPSHOT_MODULES = frozenset(f"{__name__}.{name}" for name in ("VHDLLexer", "VHDLParser"))
+
+# Held while antlr4.ATNDeserializer is rebound for a module being executed
+_BIND_LOCK = threading.Lock()
+
+
+class _SnapshotLoader(SourceFileLoader):
+    """Execute a generated module with antlr4.ATNDeserializer loading its ATN from a snapshot."""
+
+    def exec_module(self, module: ModuleType) -> None:
+        import antlr4
+        from antlr4.atn.ATNDeserializer import ATNDeserializer
+        from ..snapshot import snapshot_deserializer
+
+        with _BIND_LOCK:
+            antlr4.ATNDeserializer = snapshot_deserializer(self.name.rpartition(".")[2])
+            try:
+                super().exec_module(module)
+            finally:
+                antlr4.ATNDeserializer = ATNDeserializer
+
+
+class _SnapshotFinder:
+    """Meta path finder giving the generated lexer and parser modules the _SnapshotLoader."""
+
+    def find_spec(self, fullname: str, path: Optional[Sequence[str]],
+                  target: Any = None) -> Optional[ModuleSpec]:
+        if fullname not in _SNAPSHOT_MODULES:
+            return None
+        spec = PathFinder.find_spec(fullname, path)
+        if spec is not None and type(spec.loader) is SourceFileLoader:
+            spec.loader = _SnapshotLoader(spec.loader.name, spec.loader.path)
+        return spec
+
+
+sys.meta_path.insert(0, _SnapshotFinder())
@@ -0,0 +1,225 @@
+"""
+Incremental Reparsing
+
+This module reparses a VHDL source after an edit, doing as little work as
+possible. The character spans of the design units of the sources that recent
+edits produced are remembered (by a digest of the source, not the source
+itself); after an edit, lexing restarts at the first design unit that the
+edit touches and stops as soon as a unit boundary lines up with an unchanged
+unit after the edit. Only the relexed units whose text actually changed are
+parsed, and the Entity and Package objects of all other units are taken from
+the previous Document. The spans of a source that was not produced by an
+edit are found by lexing it once.
+
+Examples:
+    from pyhdlio.vhdl import Document
+    doc = Document.FromStr(old_code, "top.vhd", split_units=True)
+    doc = Document.FromEdit(doc, old_code, new_code)
+"""
+
+__all__ = [
+    "reparse"
+]
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+# Number of sources whose design unit spans are remembered
+SPAN_CACHE_SIZE = 8
+
+
+class _UnitSpan(NamedTuple):
+    """Kind, name and character span [start, stop) of a design unit."""
+    kind: Optional[str]
+    name: Optional[str]
+    start: int
+    stop: int
+
+
+# Design unit spans of the sources of recent edits, by digest of the source
+_spans: 'OrderedDict[bytes, List[_UnitSpan]]' = OrderedDict()
+_spans_lock = threading.Lock()
+
+
+def _digest(vhdl_code: str) -> bytes:
+    import hashlib
+    return hashlib.sha256(vhdl_code.encode('utf-8', 'surrogatepass')).digest()
+
+
+def _span(unit) -> _UnitSpan:
+    return _UnitSpan(unit.kind, unit.name, unit.tokens[0].start, unit.tokens[-1].stop + 1)
+
+
+def _remember(vhdl_code: str, spans: List[_UnitSpan]) -> None:
+    key = _digest(vhdl_code)
+    with _spans_lock:
+        _spans[key] = spans
+        _spans.move_to_end(key)
+        while len(_spans) > SPAN_CACHE_SIZE:
+            _spans.popitem(last=False)
+
+
+def remember(vhdl_code: str, units: Iterable) -> Iterator:
+    """
+    Pass design units through, remembering their spans for a later reparse.
+
+    Args:
+        vhdl_code: Source text the units were split from
+        units: Iterable of scanner.DesignUnitTokens covering the whole source
+
+    Returns:
+        Iterator over the same units
+    """
+    spans = []
+    for unit in units:
+        spans.append(_span(unit))
+        yield unit
+    _remember(vhdl_code, spans)
+
+
+def _lex_units(vhdl_code: str, start: int = 0):
+    """Split vhdl_code into design units, lexing from character index `start`."""
+    from .charstream import CompactInputStream
+    from .concurrency import thread_safe
+    from .grammar.VHDLLexer import VHDLLexer
+    from .scanner import lex_tokens, split_design_units
+
+    input_stream = CompactInputStream(vhdl_code)
+    lexer = thread_safe(VHDLLexer(input_stream))
+    if start:
+        input_stream.seek(start)
+        lexer.line = vhdl_code.count("\n", 0, start) + 1
+        lexer.column = start - (vhdl_code.rfind("\n", 0, start) + 1)
+    return split_design_units(lex_tokens(lexer))
+
+
+def _unit_spans(vhdl_code: str) -> List[_UnitSpan]:
+    key = _digest(vhdl_code)
+    with _spans_lock:
+        spans = _spans.get(key)
+    if spans is None:
+        spans = [_span(unit) for unit in _lex_units(vhdl_code)]
+    return spans
+
+
+def _common_prefix(a: str, b: str) -> int:
+    """Length of the common prefix of a and b."""
+    lo, hi = 0, min(len(a), len(b))
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if b.startswith(a[:mid]):
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def _common_suffix(a: str, b: str, limit: int) -> int:
+    """Length of the common suffix of a and b, at most `limit`."""
+    lo, hi = 0, limit
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if b.endswith(a[len(a) - mid:]):
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def reparse(previous: Any, old_code: str, new_code: str, filename: Optional[str] = None,
+            edit: Optional[Tuple[int, int]] = None, two_stage: bool = True) -> Any:
+    """
+    Reparse new_code, reusing the design units of previous that the edit did not touch.
+
+    Args:
+        previous: Document returned by an earlier parse of old_code
+        old_code: VHDL source code that previous was parsed from
+        new_code: New VHDL source code
+        filename: Filename for the new document (default: the path of previous)
+        edit: Optional (start, end) range of old_code that was replaced; if not
+            given, it is found by comparing old_code and new_code
+        two_stage: Try fast SLL prediction before full LL
+
+    Returns:
+        pyVHDLModel Document for new_code
+
+    Raises:
+        VHDLSyntaxError: If a changed design unit fails to parse
+    """
+    from .model import _error_listener, _parse_units
+    from .visitor import VHDLVisitor
+
+    # Character range [prefix, old_end) of old_code that was replaced
+    if edit is not None:
+        prefix, old_end = edit
+    else:
+        prefix = _common_prefix(old_code, new_code)
+        limit = min(len(old_code), len(new_code)) - prefix
+        old_end = len(old_code) - _common_suffix(old_code, new_code, limit)
+    delta = len(new_code) - len(old_code)
+
+    # Model objects of the previous parse, by unit kind and name
+    built = {
+        "entity": {entity.Identifier.lower(): entity for entity in previous.Entities.values()},
+        "package": {package.Identifier.lower(): package for package in previous.Packages.values()},
+    }
+
+    def reusable(kind: Optional[str], name: Optional[str]) -> Tuple[bool, Any]:
+        if kind is None:
+            return False, None
+        if kind not in built:
+            return True, None
+        obj = built[kind].get((name or "").lower())
+        return obj is not None, obj
+
+    old_spans = _unit_spans(old_code)
+
+    # Units that end before the edit are unchanged
+    head = 0
+    while head < len(old_spans) and old_spans[head].stop <= prefix and old_spans[head].kind is not None:
+        head += 1
+    # Units that start after the edit are unchanged, and are where relexing can stop
+    resync: Dict[int, int] = {
+        span.start + delta: index
+        for index, span in enumerate(old_spans[head:], head) if span.start > old_end
+    }
+
+    # Relex from the first affected unit until a unit boundary lines up again
+    relexed = []
+    tail = len(old_spans)
+    for unit in _lex_units(new_code, old_spans[head - 1].stop if head else 0):
+        relexed.append(unit)
+        stop = unit.tokens[-1].stop + 1
+        if unit.kind is not None and stop in resync:
+            tail = resync[stop]
+            break
+
+    kept = [(span, reusable(span.kind, span.name)) for span in old_spans[:head] + old_spans[tail:]]
+    if not all(ok for _, (ok, _) in kept):
+        # The previous document is missing units: parse everything
+        units = remember(new_code, _lex_units(new_code))
+        visitor = VHDLVisitor(filename=filename or str(previous.Path))
+        return _parse_units(units, visitor, _error_listener(), two_stage)
+
+    # Relexed units whose text is unchanged can still be reused
+    reuse = {}
+    for span in old_spans[head:tail]:
+        ok, obj = reusable(span.kind, span.name)
+        if ok:
+            reuse[old_code[span.start:span.stop]] = obj
+
+    _remember(new_code, old_spans[:head] + [_span(unit) for unit in relexed] + [
+        span._replace(start=span.start + delta, stop=span.stop + delta) for span in old_spans[tail:]
+    ])
+
+    visitor = VHDLVisitor(filename=filename or str(previous.Path))
+    for _, (_, obj) in kept[:head]:
+        visitor.addUnit(obj)
+    try:
+        _parse_units(relexed, visitor, _error_listener(), two_stage, reuse)
+    finally:
+        # Keep the units after the edit in the (partial) document even if parsing failed
+        for _, (_, obj) in kept[head:]:
+            visitor.addUnit(obj)
+    return visitor.document
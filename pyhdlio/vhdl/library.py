@@ -0,0 +1,388 @@
+"""
+Library Index
+
+This module keeps an index of the design units of a set of VHDL files in a
+SQLite database, so that questions such as "which file declares entity
+fifo_async" or "which package declares component memory" are answered
+without parsing any file. Library.scan() reads the files, splits them into
+design units at token level (see scanner.split_design_units) and stores the
+kind, name, file and line span of every unit, the component declarations of
+packages and the content hash of every file. Lookups use the indexes of the
+database (B-trees, so O(log n)).
+
+A rescan only reads files whose size or modification time changed, and only
+splits those whose content hash changed; files that no longer exist are
+dropped from the index. The references of every unit to other units are
+stored too (see dependencies.py), so that dependency_graph() gives the
+compile order of the indexed files without reading them again.
+
+Names are matched case-insensitively, as VHDL basic identifiers are; extended
+identifiers (\\like this\\) are matched exactly.
+
+Examples:
+    from pyhdlio.vhdl import Library
+    with Library("build/library.sqlite") as library:
+        library.scan(Path("src").rglob("*.vhd"))
+        for unit in library.find("fifo_async", kind="entity"):
+            print(unit.path, unit.start_line)
+        for package in library.find_component("memory"):
+            print(package.name, package.path)
+        compile_order = library.dependency_graph().compile_order()
+"""
+
+__all__ = [
+    "Library",
+    "LibraryUnit",
+    "ScanResult"
+]
+
+import hashlib
+import os
+import re
+import sqlite3
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple, Union
+
+if TYPE_CHECKING:
+    from .dependencies import DependencyGraph
+
+# Version of the database layout below (stored as PRAGMA user_version)
+SCHEMA_VERSION = 2
+
+_SCHEMA = """
+CREATE TABLE files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    library TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE TABLE units (
+    id INTEGER PRIMARY KEY,
+    file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    key TEXT NOT NULL,
+    primary_unit TEXT,
+    start_line INTEGER NOT NULL,
+    end_line INTEGER NOT NULL
+);
+CREATE INDEX units_by_key ON units(key, kind);
+CREATE INDEX units_by_file ON units(file_id);
+CREATE TABLE components (
+    unit_id INTEGER NOT NULL REFERENCES units(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    key TEXT NOT NULL,
+    line INTEGER NOT NULL
+);
+CREATE INDEX components_by_key ON components(key);
+CREATE INDEX components_by_unit ON components(unit_id);
+CREATE TABLE refs (
+    unit_id INTEGER NOT NULL REFERENCES units(id) ON DELETE CASCADE,
+    kind TEXT NOT NULL,
+    library TEXT,
+    name TEXT NOT NULL,
+    secondary TEXT,
+    line INTEGER NOT NULL
+);
+CREATE INDEX refs_by_unit ON refs(unit_id);
+"""
+
+# Tables of the schema, in creation order (dropped in reverse when the schema version changes)
+_TABLES = tuple(re.findall(r"^CREATE TABLE (\w+)", _SCHEMA, re.MULTILINE))
+
+# Columns of a LibraryUnit, selected from units joined with files
+_UNIT_COLUMNS = "units.kind, units.name, files.path, units.start_line, units.end_line, files.hash, files.library"
+
+
+class LibraryUnit(NamedTuple):
+    """A design unit in the index."""
+    kind: str        # "entity", "architecture", "package", "package body", "package instance",
+                     # "configuration" or "context"
+    name: str        # as written in the declaration
+    path: Path
+    start_line: int  # line of the library unit keyword (after the context clause)
+    end_line: int    # line of the closing semicolon
+    hash: str        # content hash of the file when it was scanned
+    library: str     # VHDL library of the file (case-folded)
+
+
+class ScanResult(NamedTuple):
+    """Outcome of Library.scan()."""
+    scanned: List[Path]               # new or changed files, split into design units
+    unchanged: int                    # files whose content was already indexed
+    removed: List[Path]               # files dropped from the index
+    errors: List[Tuple[Path, str]]    # files that could not be read, and incomplete design units
+
+
+def _key(name: str) -> str:
+    """Return the lookup key of a VHDL identifier (basic identifiers are case-insensitive)."""
+    return name if name.startswith("\\") else name.lower()
+
+
+def _split(vhdl_code: str) -> Tuple[List[Tuple[Any, ...]], List[str]]:
+    """
+    Split a source into design units at token level.
+
+    Returns:
+        (units, problems): (kind, name, primary unit, start line, end line,
+        [(component, line), ...], [Reference, ...]) for each complete design
+        unit, and a description of each incomplete one
+    """
+    from antlr4 import Token
+    from .charstream import CompactInputStream
+    from .concurrency import thread_safe
+    from .dependencies import unit_references
+    from .grammar.VHDLLexer import VHDLLexer
+    from .scanner import _UNIT_KEYWORDS, lex_tokens, split_design_units, without_whitespace
+
+    units = []
+    problems = []
+    lexer = thread_safe(VHDLLexer(CompactInputStream(vhdl_code)))
+    for unit in split_design_units(without_whitespace(lex_tokens(lexer))):
+        if unit.kind is None or unit.name is None:
+            problems.append(f"incomplete design unit at lines {unit.start_line}-{unit.end_line}")
+            continue
+        tokens = [token for token in unit.tokens if token.channel == Token.DEFAULT_CHANNEL]
+        # The library unit keyword is the last unit keyword before the first `is`
+        # (earlier ones are context references)
+        start_line = unit.start_line
+        for token in tokens:
+            if token.type == VHDLLexer.KW_IS:
+                break
+            if token.type in _UNIT_KEYWORDS:
+                start_line = token.line
+        components = []
+        if unit.kind == "package":
+            for previous, token, following in zip(tokens, tokens[1:], tokens[2:]):
+                if (token.type == VHDLLexer.KW_COMPONENT and previous.type != VHDLLexer.KW_END
+                        and following.type == VHDLLexer.LIT_IDENTIFIER):
+                    components.append((following.text, following.line))
+        primary, references = unit_references(unit.kind, unit.name, tokens)
+        units.append((unit.kind, unit.name, primary, start_line, unit.end_line, components, references))
+    return units, problems
+
+
+def _split_all(changed: List[Tuple[Any, ...]],
+               jobs: Optional[int]) -> Iterable[Tuple[List[Tuple[Any, ...]], List[str]]]:
+    """Split the sources (last item of each entry) of changed files, in parallel when `jobs` allows."""
+    texts = [entry[-1] for entry in changed]
+    if jobs == 1 or len(texts) <= 1:
+        return map(_split, texts)
+
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+    from .concurrency import enable_locking, gil_enabled, process_context
+    if not gil_enabled():
+        enable_locking()
+        with ThreadPoolExecutor(max_workers=jobs or os.cpu_count()) as pool:
+            return list(pool.map(_split, texts))
+    # Never forked: scans also run on the threads of the parse server
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=process_context()) as pool:
+        return list(pool.map(_split, texts, chunksize=max(1, len(texts) // (4 * (jobs or os.cpu_count() or 1)))))
+
+
+class Library:
+    """
+    Index of the design units of a set of VHDL files, kept in a SQLite database.
+
+    The database is created on first use; a database written with another
+    layout version is rebuilt. A Library object may be used from any
+    thread, but not by two threads at the same time.
+    """
+
+    def __init__(self, database: Union[str, Path] = ":memory:") -> None:
+        """
+        Args:
+            database: SQLite database file, or ":memory:" for an index that is
+                not kept (the default)
+        """
+        if database != ":memory:":
+            database = Path(database).expanduser()
+            database.parent.mkdir(parents=True, exist_ok=True)
+        self.database = database
+        self._db = sqlite3.connect(str(database), check_same_thread=False)
+        self._db.execute("PRAGMA foreign_keys = ON")
+        if self._db.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            with self._db:
+                for table in reversed(_TABLES):
+                    self._db.execute(f"DROP TABLE IF EXISTS {table}")
+                self._db.executescript(_SCHEMA)
+                self._db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def close(self) -> None:
+        """Close the database."""
+        self._db.close()
+
+    def __enter__(self) -> 'Library':
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def scan(self, paths: Iterable[Union[str, Path]], library: str = "work", prune: bool = False,
+             jobs: Optional[int] = 1) -> ScanResult:
+        """
+        Bring the index up to date with a set of files.
+
+        A file whose size and modification time are those recorded is taken
+        as unchanged without reading it; otherwise it is read, and split into
+        design units again only if its content hash changed. Files that no
+        longer exist are dropped from the index.
+
+        Args:
+            paths: VHDL files to index
+            library: VHDL library the files are analyzed into
+            prune: Also drop indexed files that are not in `paths`
+            jobs: Number of workers splitting changed files (None: number of
+                CPUs; 1 splits them in this process). Workers are processes,
+                or threads when Python runs without the GIL.
+
+        Returns:
+            ScanResult with the files scanned, unchanged and removed, and the
+            problems found
+        """
+        library = _key(library)
+        changed: List[Tuple[Path, Optional[int], str, os.stat_result, str]] = []
+        unchanged = 0
+        errors: List[Tuple[Path, str]] = []
+        seen: Set[str] = set()
+        with self._db:
+            for path in paths:
+                path = Path(path).resolve()
+                seen.add(str(path))
+                row = self._db.execute("SELECT id, hash, size, mtime_ns FROM files WHERE path = ?",
+                                       (str(path),)).fetchone()
+                try:
+                    st = path.stat()
+                    if row is None or (row[2], row[3]) != (st.st_size, st.st_mtime_ns):
+                        data = path.read_bytes()
+                        digest = hashlib.sha256(data).hexdigest()
+                        if row is None or row[1] != digest:
+                            changed.append((path, row[0] if row else None, digest, st, data.decode('utf-8')))
+                            continue
+                except (OSError, UnicodeDecodeError) as e:
+                    errors.append((path, str(e)))
+                    continue
+                self._db.execute("UPDATE files SET library = ?, size = ?, mtime_ns = ? WHERE id = ?",
+                                 (library, st.st_size, st.st_mtime_ns, row[0]))
+                unchanged += 1
+
+            for (path, file_id, digest, st, _), (units, problems) in zip(changed, _split_all(changed, jobs)):
+                errors.extend((path, problem) for problem in problems)
+                if file_id is not None:
+                    self._db.execute("DELETE FROM files WHERE id = ?", (file_id,))
+                file_id = self._db.execute(
+                    "INSERT INTO files (path, library, hash, size, mtime_ns) VALUES (?, ?, ?, ?, ?)",
+                    (str(path), library, digest, st.st_size, st.st_mtime_ns)).lastrowid
+                for kind, name, primary, start_line, end_line, components, references in units:
+                    unit_id = self._db.execute(
+                        "INSERT INTO units (file_id, kind, name, key, primary_unit, start_line, end_line) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (file_id, kind, name, _key(name), primary, start_line, end_line)).lastrowid
+                    self._db.executemany("INSERT INTO components (unit_id, name, key, line) VALUES (?, ?, ?, ?)",
+                                         [(unit_id, component, _key(component), line)
+                                          for component, line in components])
+                    self._db.executemany(
+                        "INSERT INTO refs (unit_id, kind, library, name, secondary, line) VALUES (?, ?, ?, ?, ?, ?)",
+                        [(unit_id, *reference) for reference in references])
+
+            removed = []
+            for file_id, name in self._db.execute("SELECT id, path FROM files").fetchall():
+                if (prune and name not in seen) or not Path(name).exists():
+                    self._db.execute("DELETE FROM files WHERE id = ?", (file_id,))
+                    removed.append(Path(name))
+        return ScanResult([path for path, *_ in changed], unchanged, removed, errors)
+
+    def dependency_graph(self, components: bool = True,
+                         paths: Optional[Iterable[Union[str, Path]]] = None) -> 'DependencyGraph':
+        """
+        Return the dependency graph of the indexed files, from the stored references.
+
+        Args:
+            components: See DependencyGraph
+            paths: Optional subset of the indexed files to include
+
+        Returns:
+            DependencyGraph with the files in path order
+        """
+        from .dependencies import DependencyGraph, Reference, UnitDependencies
+
+        references: Dict[int, List[Reference]] = {}
+        for unit_id, *reference in self._db.execute(
+                "SELECT unit_id, kind, library, name, secondary, line FROM refs ORDER BY rowid"):
+            references.setdefault(unit_id, []).append(Reference(*reference))
+        files: Dict[str, Tuple[str, List[UnitDependencies]]] = {}
+        for path, library, unit_id, kind, name, primary, start_line, end_line in self._db.execute(
+                "SELECT files.path, files.library, units.id, units.kind, units.name, units.primary_unit, "
+                "units.start_line, units.end_line FROM files LEFT JOIN units ON units.file_id = files.id "
+                "ORDER BY files.path, units.start_line"):
+            units = files.setdefault(path, (library, []))[1]
+            if unit_id is not None:
+                units.append(UnitDependencies(kind, name, primary, start_line, end_line,
+                                              references.get(unit_id, [])))
+        if paths is not None:
+            selected = {str(Path(path).resolve()) for path in paths}
+            files = {path: entry for path, entry in files.items() if path in selected}
+        graph = DependencyGraph(components)
+        for path, (library, units) in files.items():
+            graph.add_units(path, units, library)
+        return graph
+
+    def find(self, name: str, kind: Optional[str] = None) -> List[LibraryUnit]:
+        """
+        Return the design units with a given name.
+
+        Args:
+            name: Unit name (case-insensitive, unless an extended identifier)
+            kind: Optional unit kind to restrict the search to, e.g. "entity"
+
+        Returns:
+            Matching units, ordered by file and line
+        """
+        query = f"SELECT {_UNIT_COLUMNS} FROM units JOIN files ON files.id = units.file_id WHERE units.key = ?"
+        args: Tuple[str, ...] = (_key(name),)
+        if kind is not None:
+            query += " AND units.kind = ?"
+            args += (kind,)
+        return self._units(query + " ORDER BY files.path, units.start_line", args)
+
+    def find_component(self, name: str) -> List[LibraryUnit]:
+        """
+        Return the packages that declare a component.
+
+        Args:
+            name: Component name (case-insensitive, unless an extended identifier)
+
+        Returns:
+            Package declarations, ordered by file and line
+        """
+        return self._units(
+            f"SELECT {_UNIT_COLUMNS} FROM components JOIN units ON units.id = components.unit_id "
+            "JOIN files ON files.id = units.file_id WHERE components.key = ? "
+            "ORDER BY files.path, units.start_line", (_key(name),))
+
+    def units(self, path: Union[str, Path, None] = None) -> List[LibraryUnit]:
+        """Return all indexed design units, or those of one file, ordered by file and line."""
+        query = f"SELECT {_UNIT_COLUMNS} FROM units JOIN files ON files.id = units.file_id"
+        args: Tuple[str, ...] = ()
+        if path is not None:
+            query += " WHERE files.path = ?"
+            args = (str(Path(path).resolve()),)
+        return self._units(query + " ORDER BY files.path, units.start_line", args)
+
+    def components(self, package: str) -> List[str]:
+        """Return the names of the components declared by the packages with a given name, in source order."""
+        rows = self._db.execute(
+            "SELECT components.name FROM components JOIN units ON units.id = components.unit_id "
+            "WHERE units.key = ? AND units.kind = 'package' ORDER BY units.id, components.line",
+            (_key(package),)).fetchall()
+        return [row[0] for row in rows]
+
+    def files(self) -> List[Path]:
+        """Return the indexed files."""
+        return [Path(row[0]) for row in self._db.execute("SELECT path FROM files ORDER BY path")]
+
+    def _units(self, query: str, args: Tuple[str, ...]) -> List[LibraryUnit]:
+        return [LibraryUnit(kind, name, Path(path), start, end, digest, library)
+                for kind, name, path, start, end, digest, library in self._db.execute(query, args)]
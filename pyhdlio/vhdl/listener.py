@@ -0,0 +1,196 @@
+"""
+Model Listener
+
+This module builds the pyVHDLModel objects while the parser runs, instead of
+visiting a parse tree afterwards. ModelListener is attached to a VHDLParser
+whose tree building is switched off (buildParseTrees = False); entities,
+generics, ports, port groups, components and packages are created as their
+rules exit, from the rule contexts the parser keeps until then. No parse
+tree is retained, which removes the largest memory consumer for big files.
+
+The objects built are the same as those built by VHDLVisitor, whose create*
+methods are used for them.
+
+Examples:
+    parser = VHDLParser(CommonTokenStream(WhitespaceFilter(lexer)))
+    listener = ModelListener(VHDLVisitor(filename="counter.vhd"))
+    parser.buildParseTrees = False
+    parser.addParseListener(listener)
+    parser.rule_DesignFile()
+    for unit in listener.units:
+        listener.visitor.addUnit(unit)
+"""
+
+__all__ = [
+    "ModelListener"
+]
+
+from typing import Any, Dict, List, Optional
+
+from antlr4.tree.Tree import ParseTreeListener
+from pyVHDLModel import Mode
+
+from .grammar.VHDLParser import VHDLParser
+from .visitor import _MODES, VHDLVisitor, _source_text
+
+# Rules whose generic and port clauses are read
+_CLAUSE_OWNERS = (VHDLParser.Rule_EntityDeclarationContext, VHDLParser.Rule_ComponentDeclarationContext)
+
+
+def _parents(ctx: Any, *types: type) -> Optional[Any]:
+    """Return the ancestor reached by walking up through parents of the given types, or None."""
+    for node_type in types:
+        ctx = ctx.parentCtx
+        if type(ctx) is not node_type:
+            return None
+    return ctx
+
+
+class ModelListener(ParseTreeListener):
+    """
+    Parse listener that builds pyVHDLModel objects as rules exit.
+
+    Information is only taken from the rules VHDLVisitor reads, reached
+    through the same parents (e.g. the components of a package declaration
+    that is a library unit). Values found by a rule are kept for its parent
+    rule until the parent exits. The model object of each design unit (or
+    None for units that produce no object, such as architectures) is
+    appended to `units`; parsing a design file records all of them, which
+    are added to a document with VHDLVisitor.addUnit.
+
+    Each parse of a start rule starts over with an empty `units` list. The
+    parser also exits the rules it is in when a parse fails, so after a
+    failed parse discard() must be called to drop the partial results.
+    """
+
+    # Exit handler for each rule context type the listener builds from.
+    # Subclasses can extend the table, e.g.
+    # HANDLERS = {**ModelListener.HANDLERS, VHDLParser.Rule_XContext: "exitX"}
+    HANDLERS: Dict[type, str] = {
+        VHDLParser.Rule_DesignUnitContext: "exitDesignUnit",
+        VHDLParser.Rule_EntityDeclarationContext: "exitEntityDeclaration",
+        VHDLParser.Rule_GenericClauseContext: "exitGenericClause",
+        VHDLParser.Rule_InterfaceConstantDeclarationContext: "exitInterfaceConstantDeclaration",
+        VHDLParser.Rule_PortClauseContext: "exitPortClause",
+        VHDLParser.Rule_InterfaceSignalDeclarationContext: "exitInterfaceSignalDeclaration",
+        VHDLParser.Rule_IdentifierListContext: "exitIdentifierList",
+        VHDLParser.Rule_ModeContext: "exitMode",
+        VHDLParser.Rule_SubtypeIndicationContext: "exitSubtypeIndication",
+        VHDLParser.Rule_PackageDeclarationContext: "exitPackageDeclaration",
+        VHDLParser.Rule_ComponentDeclarationContext: "exitComponentDeclaration",
+        VHDLParser.Rule_PackageBodyContext: "exitPackageBody",
+    }
+
+    def __init__(self, visitor: VHDLVisitor) -> None:
+        self.visitor = visitor
+        self.units: List[Any] = []
+        self._handlers = {node_type: getattr(self, name) for node_type, name in self.HANDLERS.items()}
+        self._pending: Dict[Any, Any] = {}   # rule context -> values collected for it
+        self._unit = None                    # model object of the current design unit
+        self._reported = len(visitor.diagnostics)  # diagnostics reported before the current parse
+
+    def discard(self) -> None:
+        """Drop the units built and the diagnostics reported by the current parse, after it failed."""
+        self.units = []
+        self._pending.clear()
+        self._unit = None
+        self.visitor.diagnostics.truncate(self._reported)
+
+    def enterEveryRule(self, ctx: Any) -> None:
+        if ctx.parentCtx is None:
+            # The start rule: a new parse
+            self.units = []
+            self._pending.clear()
+            self._unit = None
+            self._reported = len(self.visitor.diagnostics)
+
+    def visitTerminal(self, node: Any) -> None:
+        # The parser attaches matched tokens to their rule context whenever a
+        # listener is registered, even without tree building; drop them again
+        node.parentCtx.children = None
+
+    def exitEveryRule(self, ctx: Any) -> None:
+        handler = self._handlers.get(type(ctx))
+        if handler is None:
+            return
+        try:
+            handler(ctx)
+        except Exception as e:
+            self.visitor.diagnostics.error(f"Failed to convert {type(ctx).__name__}: {e}", ctx, e)
+
+    def exitDesignUnit(self, ctx: VHDLParser.Rule_DesignUnitContext) -> None:
+        self.units.append(self._unit)
+        self._unit = None
+        # Release the rule contexts of the unit, which the design file context would keep
+        ctx.libraryUnit = None
+
+    def exitEntityDeclaration(self, ctx: VHDLParser.Rule_EntityDeclarationContext) -> None:
+        clauses = self._pending.pop(ctx, {})
+        if type(ctx.parentCtx) is VHDLParser.Rule_LibraryUnitContext:
+            name = ctx.name.text if ctx.name and ctx.name.text else "unknown"
+            ports, port_groups = clauses.get("ports", ([], []))
+            self._unit = self.visitor.createEntity(name, clauses.get("generics", []), ports, port_groups)
+
+    def exitGenericClause(self, ctx: VHDLParser.Rule_GenericClauseContext) -> None:
+        generics = self._pending.pop(ctx, [])
+        if type(ctx.parentCtx) in _CLAUSE_OWNERS:
+            self._pending.setdefault(ctx.parentCtx, {})["generics"] = generics
+
+    def exitInterfaceConstantDeclaration(self, ctx: VHDLParser.Rule_InterfaceConstantDeclarationContext) -> None:
+        clause = _parents(ctx, VHDLParser.Rule_InterfaceDeclarationContext, VHDLParser.Rule_InterfaceElementContext,
+                          VHDLParser.Rule_GenericClauseContext)
+        if clause is None:
+            return
+        names = [token.text for token in ctx.constantNames.identifiers] if ctx.constantNames else []
+        type_str = _source_text(ctx.subtypeIndication) if ctx.subtypeIndication else "unknown"
+        default_value = _source_text(ctx.defaultValue) if ctx.defaultValue else None
+        self._pending.setdefault(clause, []).extend(self.visitor.createGenericItems(names, type_str, default_value))
+
+    def exitPortClause(self, ctx: VHDLParser.Rule_PortClauseContext) -> None:
+        declarations = self._pending.pop(ctx, [])
+        if type(ctx.parentCtx) in _CLAUSE_OWNERS:
+            self._pending.setdefault(ctx.parentCtx, {})["ports"] = self.visitor.groupPorts(declarations)
+
+    def exitInterfaceSignalDeclaration(self, ctx: VHDLParser.Rule_InterfaceSignalDeclarationContext) -> None:
+        values = self._pending.pop(ctx, {})
+        if type(ctx.parentCtx) is not VHDLParser.Rule_PortClauseContext:
+            return
+        mode = _MODES.get(values["mode"].lower(), Mode.In) if "mode" in values else Mode.In
+        ports = self.visitor.createPortItems(values.get("names", []), mode, values.get("type", "unknown"))
+        self._pending.setdefault(ctx.parentCtx, []).append((ports, ctx.start.line, ctx.stop.line))
+
+    def exitIdentifierList(self, ctx: VHDLParser.Rule_IdentifierListContext) -> None:
+        if type(ctx.parentCtx) is VHDLParser.Rule_InterfaceSignalDeclarationContext:
+            self._pending.setdefault(ctx.parentCtx, {})["names"] = [token.text for token in ctx.identifiers]
+
+    def exitMode(self, ctx: VHDLParser.Rule_ModeContext) -> None:
+        declaration = _parents(ctx, VHDLParser.Rule_SimpleModeIndicationContext, VHDLParser.Rule_ModeIndicationContext,
+                               VHDLParser.Rule_InterfaceSignalDeclarationContext)
+        if declaration is not None and ctx.name:
+            self._pending.setdefault(declaration, {})["mode"] = ctx.name.text
+
+    def exitSubtypeIndication(self, ctx: VHDLParser.Rule_SubtypeIndicationContext) -> None:
+        declaration = _parents(ctx, VHDLParser.Rule_InterfaceTypeIndicationContext,
+                               VHDLParser.Rule_SimpleModeIndicationContext, VHDLParser.Rule_ModeIndicationContext,
+                               VHDLParser.Rule_InterfaceSignalDeclarationContext)
+        if declaration is not None:
+            self._pending.setdefault(declaration, {})["type"] = _source_text(ctx)
+
+    def exitComponentDeclaration(self, ctx: VHDLParser.Rule_ComponentDeclarationContext) -> None:
+        clauses = self._pending.pop(ctx, {})
+        package = _parents(ctx, VHDLParser.Rule_PackageDeclarativeItemContext,
+                           VHDLParser.Rule_PackageDeclarationContext)
+        if package is None or type(package.parentCtx) is not VHDLParser.Rule_LibraryUnitContext or not ctx.name:
+            return
+        ports, port_groups = clauses.get("ports", ([], []))
+        component = self.visitor.createComponent(ctx.name.text, clauses.get("generics", []), ports, port_groups)
+        self._pending.setdefault(package, []).append(component)
+
+    def exitPackageDeclaration(self, ctx: VHDLParser.Rule_PackageDeclarationContext) -> None:
+        items = self._pending.pop(ctx, [])
+        if type(ctx.parentCtx) is VHDLParser.Rule_LibraryUnitContext and ctx.name:
+            self._unit = self.visitor.createPackage(ctx.name.text, items)
+
+    def exitPackageBody(self, ctx: VHDLParser.Rule_PackageBodyContext) -> None:
+        if type(ctx.parentCtx) is VHDLParser.Rule_LibraryUnitContext and ctx.name:
+            self._unit = self.visitor.createPackageBody(ctx.name.text)
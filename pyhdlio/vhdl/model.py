@@ -23,7 +23,8 @@ __all__ = [
     "GenericConstantInterfaceItem"
 ]
 
-from typing import Union, Optional
+import sys
+from typing import TYPE_CHECKING, Any, AsyncIterable, AsyncIterator, Dict, Iterable, List, Tuple, Union, Optional
 from pathlib import Path
 
 # Import pyVHDLModel Document as the base
@@ -40,10 +41,315 @@ from pyVHDLModel import (
     GenericConstantInterfaceItem
 )
 
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
+    from .batch import FileResult
+    from .cache import ParseCache
+    from .diagnostics import Diagnostics
+    from .session import Session
+    from .stats import ParseStats
+
 
 class VHDLSyntaxError(Exception):
-    """Exception raised for VHDL syntax errors."""
-    pass
+    """
+    Exception raised for VHDL syntax errors.
+
+    When design units are parsed separately (split_units=True), the error is
+    raised once all units have been tried: `document` then holds the design
+    units that parsed successfully and `errors` the error of each failed unit.
+    """
+
+    def __init__(self, message: str, document=None, errors=()):
+        super().__init__(message)
+        self.document = document
+        self.errors = list(errors)
+
+    def __reduce__(self):
+        return self.__class__, (str(self), self.document, self.errors)
+
+
+# Error listener shared by all parsers (it has no state), see _error_listener
+_ERROR_LISTENER = None
+
+# ParseStats counters describing the source rather than the work done; a retried parse counts them again
+_DOCUMENT_COUNTERS = ("tokens", "hidden_tokens", "nodes")
+
+
+def _error_listener():
+    """Return the ANTLR error listener that raises VHDLSyntaxError, creating it on first use."""
+    global _ERROR_LISTENER
+    if _ERROR_LISTENER is not None:
+        return _ERROR_LISTENER
+
+    from antlr4 import Token
+    from antlr4.error.ErrorListener import ErrorListener
+    from antlr4.error.Errors import NoViableAltException
+
+    # Custom error listener for VHDL parsing
+    class VHDLErrorListener(ErrorListener):
+        def syntaxError(self, recognizer, offendingSymbol, line, column, msg, e):
+            if isinstance(e, NoViableAltException) and Token.EOF not in (e.startToken.type, e.offendingToken.type):
+                # Whitespace tokens are not buffered (see scanner.WhitespaceFilter),
+                # so quote the input from the source text rather than from the tokens
+                try:
+                    text = offendingSymbol.getInputStream().getText(e.startToken.start, e.offendingToken.stop)
+                except ValueError:  # characters discarded by a FileWindowStream
+                    pass
+                else:
+                    msg = f"no viable alternative at input {recognizer._errHandler.escapeWSAndQuote(text)}"
+            raise VHDLSyntaxError(f"Syntax error at line {line}, column {column}: {msg}")
+
+    _ERROR_LISTENER = VHDLErrorListener()
+    return _ERROR_LISTENER
+
+
+def _measure(stats, phase: str):
+    """Return stats.measure(phase), or a no-op context without stats."""
+    if stats is None:
+        from contextlib import nullcontext
+        return nullcontext()
+    return stats.measure(phase)
+
+
+def _checkpoint(diagnostics: Optional['Diagnostics'], stats: Optional['ParseStats']) -> Tuple[int, Tuple[int, ...]]:
+    """Record how many diagnostics and document counters there are, for _rollback()."""
+    diagnostic_count = len(diagnostics) if diagnostics is not None else 0
+    counters = tuple(getattr(stats, counter) for counter in _DOCUMENT_COUNTERS) if stats is not None else ()
+    return diagnostic_count, counters
+
+
+def _rollback(checkpoint: Tuple[int, Tuple[int, ...]], diagnostics: Optional['Diagnostics'],
+              stats: Optional['ParseStats']) -> None:
+    """Drop the diagnostics and document counts added since `checkpoint`, before parsing the source again."""
+    diagnostic_count, counters = checkpoint
+    if diagnostics is not None:
+        diagnostics.truncate(diagnostic_count)
+    if stats is not None:
+        for counter, value in zip(_DOCUMENT_COUNTERS, counters):
+            setattr(stats, counter, value)
+
+
+def _document_parsed() -> None:
+    """Count a parsed document for the DFA cache policy installed with dfa.set_dfa_policy, if any."""
+    # No policy can be installed before the dfa module is loaded, so it is not imported here
+    dfa = sys.modules.get(__package__ + ".dfa")
+    policy = dfa._policy if dfa is not None else None
+    if policy is not None:
+        policy.document_parsed()
+
+
+def _reset_parser(parser, stream=None):
+    """
+    Reset a parser, optionally attaching a new token stream, keeping its parse listeners.
+
+    Parser.reset() (also called by setTokenStream) fails while any parse
+    listener is registered, because it removes its trace listener even if
+    there is none; the listeners are set aside while it runs.
+    """
+    listeners, parser._parseListeners = parser._parseListeners, None
+    try:
+        if stream is None:
+            parser.reset()
+        else:
+            parser.setTokenStream(stream)
+    finally:
+        parser._parseListeners = listeners
+
+
+def _parse_design_file(parser, error_listener, two_stage: bool = True, start_rule: str = "rule_DesignFile",
+                       stats: Optional['ParseStats'] = None):
+    """
+    Run a start rule (by default rule_DesignFile), optionally using two-stage prediction.
+
+    In the first stage the parser uses SLL prediction with a bail-out error
+    strategy and no error listeners. SLL is much faster than full LL and, for
+    almost all real sources, reaches the same decisions. If SLL fails (either a
+    genuine syntax error or an SLL conflict), the token stream is rewound and
+    the input is reparsed with full LL prediction and normal error reporting,
+    so the resulting tree and any reported errors are identical to a plain LL
+    parse.
+
+    Args:
+        parser: VHDLParser instance attached to a buffered token stream
+        error_listener: Error listener to use for the (final) LL parse
+        two_stage: If False, parse with full LL prediction only
+        start_rule: Name of the parser rule method to run
+        stats: Optional ParseStats counting fallbacks to full LL
+
+    Returns:
+        The parse tree of the start rule
+    """
+    from antlr4.atn.PredictionMode import PredictionMode
+    from antlr4.error.ErrorStrategy import BailErrorStrategy, DefaultErrorStrategy
+    from antlr4.error.Errors import ParseCancellationException
+
+    if two_stage:
+        parser.removeErrorListeners()
+        parser._errHandler = BailErrorStrategy()
+        parser._interp.predictionMode = PredictionMode.SLL
+        try:
+            return getattr(parser, start_rule)()
+        except ParseCancellationException:
+            # Rewind the (already buffered) token stream for the LL pass
+            _reset_parser(parser)
+            for listener in parser.getParseListeners():
+                # Drop what a model listener built during the failed pass
+                discard = getattr(listener, "discard", None)
+                if discard is not None:
+                    discard()
+            if stats is not None:
+                stats.ll_fallbacks += 1
+
+    parser.removeErrorListeners()
+    parser.addErrorListener(error_listener)
+    parser._errHandler = DefaultErrorStrategy()
+    parser._interp.predictionMode = PredictionMode.LL
+    return getattr(parser, start_rule)()
+
+
+def _model_listener(parser, visitor):
+    """Switch off tree building and attach a listener.ModelListener building the model for `visitor`."""
+    from .listener import ModelListener
+
+    listener = ModelListener(visitor)
+    parser.buildParseTrees = False
+    parser.addParseListener(listener)
+    return listener
+
+
+# Design unit kinds the visitor builds model objects from (None: incomplete unit)
+_INTERFACE_UNITS = {"entity", "package", None}
+
+
+def _interface_tokens(lexer, stats: Optional['ParseStats'] = None):
+    """
+    Return a token source holding only the entity and package declarations.
+
+    The lexer output is split into design units at token level (see
+    scanner.split_design_units) and all other units are dropped, so the parser
+    never sees architecture or package bodies.
+
+    Args:
+        lexer: VHDLLexer positioned at the start of the input
+        stats: Optional ParseStats counting all lexed tokens
+
+    Returns:
+        ListTokenSource with the tokens of the kept units, or None if there are none
+    """
+    from antlr4.ListTokenSource import ListTokenSource
+    from .scanner import lex_tokens, split_design_units, without_whitespace
+
+    units = split_design_units(lex_tokens(lexer))
+    if stats is not None:
+        units = list(units)
+        stats.count_tokens(token for unit in units for token in unit.tokens)
+    tokens = [token for unit in units if unit.kind in _INTERFACE_UNITS for token in without_whitespace(unit.tokens)]
+    return ListTokenSource(tokens) if tokens else None
+
+
+def _parse_unit(parser, unit, error_listener, two_stage: bool = True, stats: Optional['ParseStats'] = None):
+    """
+    Parse one design unit from the parser's token stream, which holds the unit's tokens only.
+
+    Args:
+        parser: VHDLParser reading the tokens of `unit`
+        unit: scanner.DesignUnitTokens, naming the unit in error messages
+        error_listener: Error listener to use for LL parsing
+        two_stage: Try fast SLL prediction before full LL
+        stats: Optional ParseStats receiving the parse time and counters
+
+    Returns:
+        The parse tree of the unit
+
+    Raises:
+        VHDLSyntaxError: If the unit fails to parse or is followed by more
+            tokens; the message names the unit and its lines
+    """
+    from antlr4 import Token
+
+    try:
+        with _measure(stats, "parse"):
+            tree = _parse_design_file(parser, error_listener, two_stage, "rule_DesignUnit", stats)
+        token = parser.getCurrentToken()
+        if token.type != Token.EOF:
+            raise VHDLSyntaxError(
+                f"Syntax error at line {token.line}, column {token.column}: "
+                f"extraneous input '{token.text}' after design unit")
+    except Exception as e:
+        label = " ".join(part for part in (unit.kind, unit.name) if part) or "design unit"
+        raise VHDLSyntaxError(f"Failed to parse {label} (lines {unit.start_line}-{unit.end_line}): {str(e)}") from e
+    return tree
+
+
+def _parse_units(units, visitor, error_listener, two_stage: bool = True, reuse: Optional[Dict[str, Any]] = None,
+                 stats: Optional['ParseStats'] = None, build_tree: bool = True, session: Optional['Session'] = None):
+    """
+    Parse design units one at a time and merge them into the visitor's document.
+
+    Each unit is parsed with its own rule_DesignUnit invocation over the unit's
+    tokens only, so an expensive or broken unit does not affect the others.
+
+    Args:
+        units: Iterable of scanner.DesignUnitTokens
+        visitor: VHDLVisitor whose document receives the design units
+        error_listener: Error listener to use for LL parsing
+        two_stage: Try fast SLL prediction before full LL
+        reuse: Optional map from unit source text to an already built model
+            object (or None for units that produce no object); units found in
+            it are not parsed again
+        stats: Optional ParseStats receiving parse and visit times and counters
+        build_tree: If False, build the model while parsing (see listener.ModelListener)
+        session: Optional Session whose parser is used
+
+    Returns:
+        The visitor's document
+
+    Raises:
+        VHDLSyntaxError: If any unit fails to parse, after all units have been tried
+    """
+    from antlr4 import CommonTokenStream
+    from antlr4.ListTokenSource import ListTokenSource
+    from .concurrency import thread_safe
+    from .grammar.VHDLParser import VHDLParser
+    from .scanner import without_whitespace
+
+    parser = None
+    errors = []
+    for unit in units:
+        if reuse is not None and unit.text in reuse:
+            visitor.addUnit(reuse[unit.text])
+            continue
+        # The unit keeps its whitespace (its text is the reuse key); the parser does not need it
+        source = ListTokenSource(list(without_whitespace(unit.tokens)))
+        if parser is None:
+            if session is None:
+                parser = thread_safe(VHDLParser(CommonTokenStream(source)))
+            else:
+                parser = session.parser(source)
+            listener = None if build_tree else _model_listener(parser, visitor)
+            if stats is not None:
+                stats.watch_predictions(parser)
+        else:
+            _reset_parser(parser, CommonTokenStream(source))
+        try:
+            tree = _parse_unit(parser, unit, error_listener, two_stage, stats)
+        except VHDLSyntaxError as e:
+            if listener is not None:
+                listener.discard()
+            errors.append(e)
+            continue
+        if listener is not None:
+            for result in listener.units:
+                visitor.addUnit(result)
+            continue
+        if stats is not None:
+            stats.count_nodes(tree)
+        with _measure(stats, "visit"):
+            visitor.addUnit(visitor.visit(tree))
+
+    if errors:
+        raise VHDLSyntaxError("\n".join(str(e) for e in errors), visitor.document, errors)
+    return visitor.document
 
 
 class Document(BaseDocument):
@@ -55,13 +361,38 @@ class Document(BaseDocument):
     """
 
     @classmethod
-    def FromStr(cls, vhdl_code: str, filename: Optional[str] = None) -> 'Document':
+    def FromStr(cls, vhdl_code: str, filename: Optional[str] = None, two_stage: bool = True,
+                interface_only: bool = False, split_units: bool = False,
+                diagnostics: Optional['Diagnostics'] = None, stats: Optional['ParseStats'] = None,
+                build_tree: bool = True, session: Optional['Session'] = None) -> 'Document':
         """
         Parse VHDL code from a string and return a pyVHDLModel Document instance.
 
+        Several threads can call this at the same time (see concurrency.py),
+        as long as they do not share a session or a stats object.
+
         Args:
             vhdl_code: VHDL source code as a string
             filename: Optional filename to associate with the document
+            two_stage: Try fast SLL prediction first and fall back to full LL
+                prediction only if that fails (the result is the same either way)
+            interface_only: Only parse entity and package declarations; other
+                design units (architectures, package bodies, ...) are skipped
+                at token level and are not checked for syntax errors
+            split_units: Split the source into design units at token level and
+                parse each unit separately; a syntax error in one unit does not
+                stop the others from being parsed (see VHDLSyntaxError)
+            diagnostics: Optional Diagnostics collector that receives the
+                problems found while building the model from the parse tree
+            stats: Optional ParseStats that receives the time spent in each
+                phase and counters such as tokens, parse tree nodes, DFA
+                states added (by any thread) and fallbacks to full LL prediction
+            build_tree: If False, no parse tree is built; the model is built
+                while parsing, as the rules exit (see listener.ModelListener).
+                The document is the same and far less memory is used, but
+                the parse time then includes building the model
+            session: Optional Session whose lexer and parser are reused
+                instead of creating new ones (see session.Session)
 
         Returns:
             Document instance containing the parsed design units
@@ -69,47 +400,179 @@ class Document(BaseDocument):
         Raises:
             VHDLSyntaxError: If parsing fails
         """
+        try:
+            if stats is None:
+                return cls._FromStr(vhdl_code, filename, two_stage, interface_only, split_units, build_tree,
+                                    diagnostics, session=session)
+
+            from .dfa import dfa_states
+            states = dfa_states()
+            try:
+                return cls._FromStr(vhdl_code, filename, two_stage, interface_only, split_units, build_tree,
+                                    diagnostics, stats, session)
+            finally:
+                stats.documents += 1
+                stats.dfa_states_added += dfa_states() - states
+        finally:
+            _document_parsed()
+
+    @classmethod
+    def _FromStr(cls, vhdl_code: str, filename: Optional[str], two_stage: bool, interface_only: bool,
+                 split_units: bool, build_tree: bool, diagnostics: Optional['Diagnostics'],
+                 stats: Optional['ParseStats'] = None, session: Optional['Session'] = None) -> 'Document':
+        """FromStr without the DFA and document counters of `stats`."""
+        # An interface_only parse that fails is retried as a full parse, which must not repeat its diagnostics
+        # and counts (the caller's collectors may already hold others)
+        checkpoint = _checkpoint(diagnostics, stats) if interface_only else None
         # Import ANTLR classes
-        from antlr4 import InputStream, CommonTokenStream
-        from antlr4.error.ErrorListener import ErrorListener
+        from antlr4 import CommonTokenStream
+        from .charstream import CompactInputStream
+        from .concurrency import thread_safe
         from .grammar.VHDLLexer import VHDLLexer
         from .grammar.VHDLParser import VHDLParser
         from .visitor import VHDLVisitor
 
-        # Custom error listener for VHDL parsing
-        class VHDLErrorListener(ErrorListener):
-            def syntaxError(self, recognizer, offendingSymbol, line, column, msg, e):
-                raise VHDLSyntaxError(f"Syntax error at line {line}, column {column}: {msg}")
+        # Set up the lexer, reading the string without copying it into a list of code points
+        if session is not None:
+            lexer = session.lexer(vhdl_code)
+        else:
+            lexer = thread_safe(VHDLLexer(CompactInputStream(vhdl_code)))
+        if split_units:
+            from .scanner import lex_tokens, split_design_units
+            units = split_design_units(lex_tokens(lexer))
+            if stats is not None:
+                # Lex up front, so that lexing is timed on its own
+                with stats.measure("lex"):
+                    units = list(units)
+                stats.count_tokens(token for unit in units for token in unit.tokens)
+            if interface_only:
+                units = (unit for unit in units if unit.kind in _INTERFACE_UNITS)
+            visitor = VHDLVisitor(filename=filename or "parsed.vhd", diagnostics=diagnostics)
+            try:
+                return _parse_units(units, visitor, _error_listener(), two_stage, stats=stats, build_tree=build_tree,
+                                    session=session)
+            except VHDLSyntaxError:
+                if not interface_only:
+                    raise
+                _rollback(checkpoint, diagnostics, stats)
+                return cls._FromStr(vhdl_code, filename, two_stage, False, True, build_tree, diagnostics, stats,
+                                    session)
 
-        # Create input stream from string
-        input_stream = InputStream(vhdl_code)
-
-        # Set up lexer and parser
-        lexer = VHDLLexer(input_stream)
-        stream = CommonTokenStream(lexer)
-        parser = VHDLParser(stream)
-
-        # Add custom error handling
-        parser.removeErrorListeners()
-        parser.addErrorListener(VHDLErrorListener())
+        if interface_only:
+            with _measure(stats, "lex"):
+                token_source = _interface_tokens(lexer, stats)
+            if token_source is None:
+                return VHDLVisitor(filename=filename or "parsed.vhd", diagnostics=diagnostics).document
+        else:
+            # The parser never reads whitespace tokens, so they are not buffered
+            from .scanner import WhitespaceFilter
+            token_source = WhitespaceFilter(lexer)
+        if session is not None:
+            parser = session.parser(token_source)
+            stream = parser.getTokenStream()
+        else:
+            stream = CommonTokenStream(token_source)
+            parser = thread_safe(VHDLParser(stream))
+        if stats is not None:
+            # Lex up front, so that lexing is timed on its own
+            with stats.measure("lex"):
+                stream.fill()
+            if not interface_only:
+                stats.count_tokens(stream.tokens, token_source.dropped)
+            stats.watch_predictions(parser)
+        visitor = VHDLVisitor(filename=filename or "parsed.vhd", diagnostics=diagnostics)
+        listener = None if build_tree else _model_listener(parser, visitor)
 
         try:
             # Parse the VHDL code using the grammar
-            tree = parser.rule_DesignFile()
+            with _measure(stats, "parse"):
+                tree = _parse_design_file(parser, _error_listener(), two_stage, stats=stats)
         except Exception as e:
+            if listener is not None:
+                listener.discard()
+            if interface_only:
+                # Report errors (or recover from a wrong split) with a full parse
+                _rollback(checkpoint, diagnostics, stats)
+                return cls._FromStr(vhdl_code, filename, two_stage, False, False, build_tree, diagnostics, stats,
+                                    session)
             raise VHDLSyntaxError(f"Failed to parse VHDL code: {str(e)}")
 
+        if listener is not None:
+            for result in listener.units:
+                visitor.addUnit(result)
+            return visitor.document
+
         # Convert parse tree to pyVHDLModel Document using visitor
-        visitor = VHDLVisitor(filename=filename or "parsed.vhd")
-        return visitor.visit(tree)
+        if stats is not None:
+            stats.count_nodes(tree)
+        with _measure(stats, "visit"):
+            return visitor.visit(tree)
 
     @classmethod
-    def FromFile(cls, file_path: Union[str, Path]) -> 'Document':
+    def FromEdit(cls, previous: 'Document', old_code: str, new_code: Optional[str] = None,
+                 filename: Optional[str] = None, edit: Optional[Tuple[int, int, str]] = None,
+                 two_stage: bool = True) -> 'Document':
+        """
+        Reparse VHDL code after an edit, reusing the unchanged design units of a previous parse.
+
+        Only the design units touched by the edit are relexed, and only those
+        whose text changed are parsed; the Entity and Package objects of
+        unchanged units are taken from the previous document. The design
+        unit spans of new_code are remembered, so that the next edit of it
+        does not relex it to find them, as the first edit of a source does
+        (see incremental.reparse).
+
+        Args:
+            previous: Document returned by an earlier parse of old_code
+            old_code: VHDL source code that previous was parsed from
+            new_code: New VHDL source code (may be omitted if edit is given)
+            filename: Optional filename (default: the path of the previous document)
+            edit: Optional (start, end, text) edit replacing old_code[start:end] with text
+            two_stage: Try fast SLL prediction before full LL (see FromStr)
+
+        Returns:
+            Document instance containing the design units of new_code
+
+        Raises:
+            ValueError: If neither new_code nor edit is given
+            VHDLSyntaxError: If a changed design unit fails to parse
+        """
+        from .incremental import reparse
+
+        if new_code is None:
+            if edit is None:
+                raise ValueError("Either new_code or edit must be given")
+            start, end, text = edit
+            new_code = old_code[:start] + text + old_code[end:]
+            changed = (start, end)
+        else:
+            changed = None
+        try:
+            return reparse(previous, old_code, new_code, filename, changed, two_stage)
+        finally:
+            _document_parsed()
+
+    @classmethod
+    def FromFile(cls, file_path: Union[str, Path], two_stage: bool = True,
+                 cache: Optional['ParseCache'] = None, interface_only: bool = False,
+                 split_units: bool = False, diagnostics: Optional['Diagnostics'] = None,
+                 stats: Optional['ParseStats'] = None, build_tree: bool = True,
+                 session: Optional['Session'] = None) -> 'Document':
         """
         Parse a VHDL file and return a pyVHDLModel Document instance.
 
         Args:
             file_path: Path to the VHDL file to parse
+            two_stage: Try fast SLL prediction before full LL (see FromStr)
+            cache: Optional ParseCache; on a hit the file is not parsed at all
+            interface_only: Only parse entity and package declarations (see FromStr)
+            split_units: Parse each design unit separately (see FromStr)
+            diagnostics: Optional Diagnostics collector (see FromStr); documents
+                with diagnostics are not cached, so they are reported every time
+            stats: Optional ParseStats (see FromStr); also receives the time
+                spent reading the file and counts cache hits
+            build_tree: If False, build the model while parsing (see FromStr)
+            session: Optional Session whose lexer and parser are reused (see FromStr)
 
         Returns:
             Document instance containing the parsed design units
@@ -123,5 +586,126 @@ class Document(BaseDocument):
         if not file_path.exists():
             raise FileNotFoundError(f"VHDL file not found: {file_path}")
 
-        vhdl_code = file_path.read_text(encoding='utf-8')
-        return cls.FromStr(vhdl_code, str(file_path))
\ No newline at end of file
+        with _measure(stats, "read"):
+            vhdl_code = file_path.read_text(encoding='utf-8')
+        options = dict(two_stage=two_stage, interface_only=interface_only, split_units=split_units,
+                       build_tree=build_tree, stats=stats, session=session)
+        if cache is None:
+            return cls.FromStr(vhdl_code, str(file_path), diagnostics=diagnostics, **options)
+
+        from .diagnostics import Diagnostics
+
+        key = cache.key(vhdl_code, str(file_path), interface_only=interface_only)
+        document = cache.get(key)
+        if document is None:
+            collected = diagnostics if diagnostics is not None else Diagnostics()
+            reported = len(collected)
+            document = cls.FromStr(vhdl_code, str(file_path), diagnostics=collected, **options)
+            if len(collected) == reported:
+                cache.put(key, document)
+        elif stats is not None:
+            stats.cache_hits += 1
+        return document
+
+    @classmethod
+    def FromFiles(cls, file_paths: Iterable[Union[str, Path]], jobs: Optional[int] = None,
+                  two_stage: bool = True, cache: Optional['ParseCache'] = None,
+                  interface_only: bool = False, split_units: bool = False,
+                  dfa_cache: Union[str, Path, None] = None, build_tree: bool = True,
+                  threads: Optional[bool] = None) -> List['FileResult']:
+        """
+        Parse several VHDL files using a pool of worker processes or threads.
+
+        Args:
+            file_paths: Paths to the VHDL files to parse
+            jobs: Number of workers (default: number of CPUs; 1 parses serially)
+            two_stage: Try fast SLL prediction before full LL (see FromStr)
+            cache: Optional ParseCache shared by all workers
+            interface_only: Only parse entity and package declarations (see FromStr)
+            split_units: Parse each design unit separately (see FromStr)
+            dfa_cache: Optional DFA cache file (see dfa.save_dfa) preloaded by each worker
+            build_tree: If False, build the models while parsing (see FromStr)
+            threads: If True, parse with threads instead of worker processes (default:
+                only if the interpreter runs without the GIL, see batch.parse_files)
+
+        Returns:
+            List of FileResult (path, document, error) in the same order as file_paths;
+            a file that fails to parse has document None and its exception in error
+        """
+        from .batch import parse_files
+        return parse_files(file_paths, jobs=jobs, two_stage=two_stage, cache=cache,
+                           interface_only=interface_only, split_units=split_units,
+                           dfa_cache=dfa_cache, build_tree=build_tree, threads=threads)
+
+    @classmethod
+    async def FromFileAsync(cls, file_path: Union[str, Path], timeout: Optional[float] = None,
+                            executor: Optional['Executor'] = None, two_stage: bool = True,
+                            cache: Optional['ParseCache'] = None, interface_only: bool = False,
+                            split_units: bool = False, build_tree: bool = True) -> 'Document':
+        """
+        Parse a VHDL file in a worker process or thread without blocking the event loop.
+
+        Args:
+            file_path: Path to the VHDL file to parse
+            timeout: Optional maximum parse time in seconds, counted from when a
+                worker starts the file (see async_batch)
+            executor: Workers to parse in, e.g. from async_batch.create_executor()
+                (default: a pool with one worker per CPU, shared by all calls)
+            two_stage: Try fast SLL prediction before full LL (see FromStr)
+            cache: Optional ParseCache
+            interface_only: Only parse entity and package declarations (see FromStr)
+            split_units: Parse each design unit separately (see FromStr)
+            build_tree: If False, build the model while parsing (see FromStr)
+
+        Returns:
+            Document instance containing the parsed design units
+
+        Raises:
+            FileNotFoundError: If the file doesn't exist
+            VHDLSyntaxError: If parsing fails
+            TimeoutError: If parsing takes more than `timeout` seconds
+        """
+        from .async_batch import parse_file_async
+        return await parse_file_async(file_path, executor=executor, timeout=timeout, cache=cache,
+                                      two_stage=two_stage, interface_only=interface_only,
+                                      split_units=split_units, build_tree=build_tree)
+
+    @classmethod
+    def FromFilesAsync(cls, file_paths: Union[Iterable[Union[str, Path]], AsyncIterable[Union[str, Path]]],
+                       jobs: Optional[int] = None, timeout: Optional[float] = None,
+                       max_pending: Optional[int] = None, ordered: bool = False,
+                       executor: Optional['Executor'] = None, two_stage: bool = True,
+                       cache: Optional['ParseCache'] = None, interface_only: bool = False,
+                       split_units: bool = False, dfa_cache: Union[str, Path, None] = None,
+                       build_tree: bool = True, threads: Optional[bool] = None) -> AsyncIterator['FileResult']:
+        """
+        Parse several VHDL files in workers, for use with `async for`.
+
+        At most `max_pending` files are submitted and not yet consumed at a
+        time; closing the iterator withdraws the files not started yet (see
+        async_batch.iter_files_async).
+
+        Args:
+            file_paths: Paths to the VHDL files to parse (an iterable or an asynchronous iterable)
+            jobs: Number of workers (default: number of CPUs)
+            timeout: Optional maximum parse time per file in seconds
+            max_pending: Maximum number of files submitted and not yet consumed (default: twice the workers)
+            ordered: Yield the results in the order of `file_paths` rather than as they complete
+            executor: Workers to parse in instead of a pool created for the batch
+            two_stage: Try fast SLL prediction before full LL (see FromStr)
+            cache: Optional ParseCache shared by all workers
+            interface_only: Only parse entity and package declarations (see FromStr)
+            split_units: Parse each design unit separately (see FromStr)
+            dfa_cache: Optional DFA cache file (see dfa.save_dfa) preloaded by each worker
+            build_tree: If False, build the models while parsing (see FromStr)
+            threads: If True, parse with threads instead of worker processes (see FromFiles)
+
+        Returns:
+            Asynchronous iterator over FileResult (path, document, error); a file
+            that fails to parse or times out has document None and its exception in error
+        """
+        from .async_batch import iter_files_async
+        return iter_files_async(file_paths, jobs=jobs, executor=executor, timeout=timeout,
+                                max_pending=max_pending, ordered=ordered, cache=cache, dfa_cache=dfa_cache,
+                                threads=threads, two_stage=two_stage, interface_only=interface_only,
+                                split_units=split_units, build_tree=build_tree)
@@ -0,0 +1,398 @@
+"""
+Grammar Decision Profiling
+
+This module finds the grammar decisions that make parsing slow. It runs
+VHDLParser with ProfilingATNSimulator, a ParserATNSimulator that records per
+decision (as ANTLR's Java ProfilingATNSimulator does, which the Python
+runtime does not provide):
+
+- invocations and time spent in adaptive prediction
+- lookahead depth (tokens examined) of SLL and full LL prediction
+- DFA hits and misses (ATN transitions, i.e. prediction work not yet cached)
+- SLL conflicts, fallbacks to full LL, ambiguities and context sensitivities
+- semantic predicate evaluations and prediction errors
+
+Decisions are mapped back to the parser rule they belong to (for example
+rule_Expression or rule_Name) and the report ranks them by the chosen
+metric, with the source location of the deepest lookahead of each decision.
+
+Examples:
+    from pyhdlio.vhdl.profiling import GrammarProfile
+    profile = GrammarProfile()
+    profile.profile_file("counter.vhd")
+    print(profile.report(key="time", top=10))
+
+    # or from the command line
+    #   pyhdlio profile --sort lookahead src/*.vhd
+"""
+
+__all__ = [
+    "DecisionInfo",
+    "ProfilingATNSimulator",
+    "GrammarProfile"
+]
+
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from antlr4.atn.ParserATNSimulator import ParserATNSimulator
+
+# Decision state class -> kind shown in the report
+_DECISION_KINDS = {
+    "BasicBlockStartState": "block",
+    "StarBlockStartState": "(...)* block",
+    "PlusBlockStartState": "(...)+ block",
+    "StarLoopEntryState": "(...)* loop",
+    "PlusLoopbackState": "(...)+ loop",
+    "TokensStartState": "tokens",
+}
+
+# Ranking keys: name -> (DecisionInfo attribute, column title)
+SORT_KEYS = {
+    "time": ("time", "time [ms]"),
+    "invocations": ("invocations", "calls"),
+    "lookahead": ("max_look", "max k"),
+    "sll-lookahead": ("sll_total_look", "SLL k"),
+    "ll-lookahead": ("ll_total_look", "LL k"),
+    "fallbacks": ("ll_fallbacks", "LL fallbacks"),
+    "ambiguities": ("ambiguities", "ambiguities"),
+    "conflicts": ("sll_conflicts", "SLL conflicts"),
+    "atn": ("atn_transitions", "ATN transitions"),
+}
+
+
+class DecisionInfo:
+    """Profiling counters of one grammar decision."""
+
+    def __init__(self, decision: int, rule: str, kind: str, alternatives: int) -> None:
+        self.decision = decision
+        self.rule = rule                      # parser rule the decision belongs to
+        self.kind = kind                      # block, (...)* loop, ...
+        self.alternatives = alternatives
+        self.invocations = 0
+        self.time = 0                         # ns in adaptive prediction
+        self.sll_total_look = 0               # tokens examined by SLL prediction, summed
+        self.sll_max_look = 0
+        self.ll_total_look = 0                # tokens examined by full LL prediction, summed
+        self.ll_max_look = 0
+        self.sll_dfa_transitions = 0          # DFA hits
+        self.sll_atn_transitions = 0          # DFA misses: SLL ATN simulation steps
+        self.ll_atn_transitions = 0           # full LL ATN simulation steps (never cached)
+        self.sll_conflicts = 0                # predictions that ended in an SLL conflict
+        self.ll_fallbacks = 0                 # predictions retried with full LL
+        self.ambiguities = 0
+        self.context_sensitivities = 0
+        self.predicate_evals = 0
+        self.errors = 0
+        self.max_look_at: Optional[str] = None  # "file:line:column" of the deepest lookahead
+        self.max_look_text = ""
+
+    @property
+    def max_look(self) -> int:
+        """Deepest lookahead of any prediction, SLL or LL."""
+        return max(self.sll_max_look, self.ll_max_look)
+
+    @property
+    def atn_transitions(self) -> int:
+        """ATN simulation steps, SLL and LL."""
+        return self.sll_atn_transitions + self.ll_atn_transitions
+
+    def merge(self, other: 'DecisionInfo') -> None:
+        """Add the counters of `other` (the same decision) to this one."""
+        deepest = self.max_look
+        for name, value in vars(other).items():
+            if name in ("decision", "rule", "kind", "alternatives", "max_look_at", "max_look_text"):
+                continue
+            if name.endswith("_max_look"):
+                setattr(self, name, max(getattr(self, name), value))
+            else:
+                setattr(self, name, getattr(self, name) + value)
+        if other.max_look > deepest or self.max_look_at is None:
+            self.max_look_at, self.max_look_text = other.max_look_at, other.max_look_text
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the counters as a dict, e.g. for JSON."""
+        result = dict(vars(self))
+        result["max_look"] = self.max_look
+        result["atn_transitions"] = self.atn_transitions
+        return result
+
+    def __repr__(self) -> str:
+        return f"DecisionInfo({self.decision}, {self.rule!r}, invocations={self.invocations}, time={self.time})"
+
+
+class ProfilingATNSimulator(ParserATNSimulator):
+    """
+    ParserATNSimulator that records a DecisionInfo per grammar decision.
+
+    Install it on a parser with `parser._interp = ProfilingATNSimulator(parser, decisions)`.
+    It shares the parser's DFA and prediction context caches, so predictions
+    are exactly those of the normal simulator.
+    """
+
+    def __init__(self, parser: Any, decisions: Optional[Dict[int, DecisionInfo]] = None,
+                 source: str = "") -> None:
+        super().__init__(parser, parser.atn, parser.decisionsToDFA, parser.sharedContextCache)
+        self.decisions = decisions if decisions is not None else {}
+        self.source = source
+        self._current: Optional[DecisionInfo] = None
+        self._sll_stop = -1
+        self._ll_stop = -1
+
+    def _info(self, decision: int) -> DecisionInfo:
+        info = self.decisions.get(decision)
+        if info is None:
+            state = self.atn.decisionToState[decision]
+            info = DecisionInfo(decision, self.parser.ruleNames[state.ruleIndex],
+                                _DECISION_KINDS.get(type(state).__name__, type(state).__name__),
+                                len(state.transitions))
+            self.decisions[decision] = info
+        return info
+
+    @staticmethod
+    def _look(input: Any, start: int, stop: int) -> int:
+        """Number of tokens the parser sees (default channel) from index start to stop."""
+        channel = input.channel
+        return sum(1 for token in input.tokens[start:stop + 1] if token.channel == channel)
+
+    def _location(self, input: Any, start: int, stop: int) -> Tuple[str, str]:
+        token = input.get(start)
+        text = input.getText(start, stop).replace("\n", " ")
+        text = " ".join(text.split())
+        return f"{self.source}:{token.line}:{token.column + 1}", text[:60]
+
+    def adaptivePredict(self, input: Any, decision: int, outerContext: Any) -> int:
+        info = self._info(decision)
+        self._current = info
+        self._sll_stop = self._ll_stop = -1
+        start_index = input.index
+        start = time.perf_counter_ns()
+        try:
+            return super().adaptivePredict(input, decision, outerContext)
+        finally:
+            info.time += time.perf_counter_ns() - start
+            info.invocations += 1
+            deepest = -1
+            if self._sll_stop >= 0:
+                look = self._look(input, start_index, self._sll_stop)
+                info.sll_total_look += look
+                if look > info.sll_max_look:
+                    info.sll_max_look = look
+                    deepest = self._sll_stop
+            if self._ll_stop >= 0:
+                look = self._look(input, start_index, self._ll_stop)
+                info.ll_total_look += look
+                if look > info.ll_max_look:
+                    info.ll_max_look = look
+                    deepest = max(deepest, self._ll_stop)
+            if deepest >= 0 and self._look(input, start_index, deepest) >= info.max_look:
+                info.max_look_at, info.max_look_text = self._location(input, start_index, deepest)
+            self._current = None
+
+    def getExistingTargetState(self, previousD: Any, t: int) -> Any:
+        self._sll_stop = self._input.index
+        existing = super().getExistingTargetState(previousD, t)
+        if existing is not None and self._current is not None:
+            self._current.sll_dfa_transitions += 1
+            if existing is self.ERROR:
+                self._current.errors += 1
+            elif existing.requiresFullContext:
+                self._current.sll_conflicts += 1
+        return existing
+
+    def computeTargetState(self, dfa: Any, previousD: Any, t: int) -> Any:
+        state = super().computeTargetState(dfa, previousD, t)
+        if self._current is not None and state is not self.ERROR and state.requiresFullContext:
+            self._current.sll_conflicts += 1
+        return state
+
+    def computeReachSet(self, closure: Any, t: int, fullCtx: bool) -> Any:
+        if fullCtx:
+            self._ll_stop = self._input.index
+        reach = super().computeReachSet(closure, t, fullCtx)
+        info = self._current
+        if info is not None:
+            if fullCtx:
+                info.ll_atn_transitions += 1
+            else:
+                info.sll_atn_transitions += 1
+            if reach is None:
+                info.errors += 1
+        return reach
+
+    def evalSemanticContext(self, predPredictions: Any, outerContext: Any, complete: bool) -> Any:
+        if self._current is not None:
+            self._current.predicate_evals += 1
+        return super().evalSemanticContext(predPredictions, outerContext, complete)
+
+    def reportAttemptingFullContext(self, dfa: Any, conflictingAlts: Any, configs: Any,
+                                    startIndex: int, stopIndex: int) -> None:
+        self._info(dfa.decision).ll_fallbacks += 1
+        super().reportAttemptingFullContext(dfa, conflictingAlts, configs, startIndex, stopIndex)
+
+    def reportContextSensitivity(self, dfa: Any, prediction: int, configs: Any,
+                                 startIndex: int, stopIndex: int) -> None:
+        self._info(dfa.decision).context_sensitivities += 1
+        super().reportContextSensitivity(dfa, prediction, configs, startIndex, stopIndex)
+
+    def reportAmbiguity(self, dfa: Any, D: Any, startIndex: int, stopIndex: int,
+                        exact: bool, ambigAlts: Any, configs: Any) -> None:
+        self._info(dfa.decision).ambiguities += 1
+        super().reportAmbiguity(dfa, D, startIndex, stopIndex, exact, ambigAlts, configs)
+
+
+class GrammarProfile:
+    """
+    Decision profile accumulated over one or more VHDL sources.
+
+    Attributes:
+        decisions: DecisionInfo per decision number, for decisions that were predicted
+        sources: Number of sources profiled
+        tokens: Tokens parsed (default channel, EOF excluded)
+        parse_time: Seconds spent parsing, prediction included
+    """
+
+    def __init__(self) -> None:
+        self.decisions: Dict[int, DecisionInfo] = {}
+        self.sources = 0
+        self.tokens = 0
+        self.parse_time = 0.0
+
+    def profile_str(self, vhdl_code: str, filename: Optional[str] = None, two_stage: bool = True) -> Any:
+        """
+        Parse VHDL code with the profiling simulator and add its decisions to this profile.
+
+        Args:
+            vhdl_code: VHDL source code as a string
+            filename: Optional filename shown in source locations
+            two_stage: Try SLL prediction first, as Document.FromStr does; if
+                False, parse in LL prediction mode only, which still predicts
+                with SLL but retries a decision with full context after an SLL
+                conflict, reporting ambiguities and context sensitivities
+
+        Returns:
+            The parse tree
+
+        Raises:
+            VHDLSyntaxError: If parsing fails (the decisions predicted up to
+                the error are kept in the profile)
+        """
+        from antlr4 import CommonTokenStream, Token
+        from .charstream import CompactInputStream
+        from .grammar.VHDLLexer import VHDLLexer
+        from .grammar.VHDLParser import VHDLParser
+        from .model import VHDLSyntaxError, _error_listener, _parse_design_file
+
+        stream = CommonTokenStream(VHDLLexer(CompactInputStream(vhdl_code)))
+        stream.fill()
+        parser = VHDLParser(stream)
+        parser._interp = ProfilingATNSimulator(parser, self.decisions, filename or "<string>")
+        self.sources += 1
+        self.tokens += sum(1 for token in stream.tokens
+                           if token.channel == Token.DEFAULT_CHANNEL and token.type != Token.EOF)
+        start = time.perf_counter()
+        try:
+            return _parse_design_file(parser, _error_listener(), two_stage)
+        except VHDLSyntaxError:
+            raise
+        except Exception as e:
+            raise VHDLSyntaxError(f"Failed to parse VHDL code: {str(e)}")
+        finally:
+            self.parse_time += time.perf_counter() - start
+
+    def profile_file(self, file_path: Union[str, Path], two_stage: bool = True) -> Any:
+        """Profile a VHDL file (see profile_str) and return its parse tree."""
+        file_path = Path(file_path)
+        if not file_path.exists():
+            raise FileNotFoundError(f"VHDL file not found: {file_path}")
+        return self.profile_str(file_path.read_text(encoding='utf-8'), str(file_path), two_stage)
+
+    def merge(self, other: 'GrammarProfile') -> 'GrammarProfile':
+        """Add the decisions and totals of `other` to this profile and return it."""
+        for decision, info in other.decisions.items():
+            if decision in self.decisions:
+                self.decisions[decision].merge(info)
+            else:
+                merged = DecisionInfo(info.decision, info.rule, info.kind, info.alternatives)
+                merged.merge(info)
+                self.decisions[decision] = merged
+        self.sources += other.sources
+        self.tokens += other.tokens
+        self.parse_time += other.parse_time
+        return self
+
+    @property
+    def prediction_time(self) -> float:
+        """Seconds spent in adaptive prediction."""
+        return sum(info.time for info in self.decisions.values()) / 1e9
+
+    def ranked(self, key: str = "time", top: Optional[int] = None) -> List[DecisionInfo]:
+        """
+        Return the decisions in decreasing order of a metric.
+
+        Args:
+            key: One of SORT_KEYS
+            top: Optional maximum number of decisions to return
+
+        Returns:
+            List of DecisionInfo
+        """
+        attribute = SORT_KEYS[key][0]
+        ranked = sorted(self.decisions.values(), key=lambda info: (getattr(info, attribute), info.time),
+                        reverse=True)
+        return ranked[:top] if top is not None else ranked
+
+    def rules(self, key: str = "time") -> List[Tuple[str, float]]:
+        """Return the sum of a metric per rule, in decreasing order."""
+        attribute = SORT_KEYS[key][0]
+        totals: Dict[str, float] = {}
+        for info in self.decisions.values():
+            totals[info.rule] = totals.get(info.rule, 0) + getattr(info, attribute)
+        return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+    def report(self, key: str = "time", top: Optional[int] = 20) -> str:
+        """
+        Format a ranked report of the decisions and of the rules they belong to.
+
+        Args:
+            key: Metric to rank by, one of SORT_KEYS
+            top: Maximum number of decisions and rules to list (None: all)
+
+        Returns:
+            Report text
+        """
+        prediction = self.prediction_time
+        lines = [
+            f"{self.sources} source(s), {self.tokens} tokens, parse {self.parse_time * 1000:.1f} ms, "
+            f"prediction {prediction * 1000:.1f} ms in {len(self.decisions)} decisions",
+            "",
+            f"{'decision':>8} {'rule':<40} {'kind':<13} {'calls':>7} {'time [ms]':>10} {'%':>5} "
+            f"{'avg k':>6} {'max k':>6} {'ATN':>7} {'conf':>5} {'LL':>5} {'ambig':>5}  deepest lookahead",
+        ]
+        for info in self.ranked(key, top):
+            look = info.sll_total_look + info.ll_total_look
+            share = info.time / 1e9 / prediction * 100 if prediction else 0.0
+            where = f"{info.max_look_at}  {info.max_look_text}" if info.max_look_at else ""
+            lines.append(
+                f"{info.decision:>8} {info.rule:<40} {info.kind:<13} {info.invocations:>7} "
+                f"{info.time / 1e6:>10.2f} {share:>5.1f} {look / max(info.invocations, 1):>6.1f} "
+                f"{info.max_look:>6} {info.atn_transitions:>7} {info.sll_conflicts:>5} "
+                f"{info.ll_fallbacks:>5} {info.ambiguities:>5}  {where}")
+
+        title = SORT_KEYS[key][1]
+        lines += ["", f"{'rule':<40} {title:>15}"]
+        for rule, total in self.rules(key)[:top]:
+            value = f"{total / 1e6:.2f}" if key == "time" else f"{total:g}"
+            lines.append(f"{rule:<40} {value:>15}")
+        return "\n".join(lines)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the profile as a dict, e.g. for JSON."""
+        return {
+            "sources": self.sources,
+            "tokens": self.tokens,
+            "parse_time": self.parse_time,
+            "prediction_time": self.prediction_time,
+            "decisions": [info.as_dict() for info in self.ranked()],
+        }
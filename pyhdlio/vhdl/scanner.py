@@ -0,0 +1,241 @@
+"""
+Design Unit Scanner
+
+This module splits a VHDL token stream into design units without running the
+parser. It works on the raw VHDLLexer output and only tracks parenthesis depth
+and the nesting of constructs that can be closed by a bare `end` (design
+units, subprogram bodies and nested packages); constructs whose `end` must be
+followed by their own keyword (`end process`, `end if`, `end record`, ...) do
+not need to be tracked.
+
+Each design unit includes its context clause and any comments or whitespace
+since the end of the previous unit, so concatenating the token text of all
+units reproduces the source.
+
+WhitespaceFilter wraps a token source (usually the lexer) and drops the
+tokens on the whitespace channel before they reach a token stream. Every
+token keeps its line and column, so line information is not lost with them.
+
+Limitations:
+    A generate statement body closed with a bare `end;` (VHDL-2008 alternative
+    label syntax) is not recognised. Callers that only use the scanner to skip
+    work should fall back to a full parse if the split turns out to be wrong.
+"""
+
+__all__ = [
+    "DesignUnitTokens",
+    "WhitespaceFilter",
+    "lex_tokens",
+    "split_design_units",
+    "without_whitespace"
+]
+
+from typing import Any, Iterable, Iterator, List, NamedTuple, Optional
+
+from antlr4 import Token
+from antlr4.Lexer import TokenSource
+from .grammar.VHDLLexer import VHDLLexer
+
+# Keywords that start a library unit (at the top level)
+_UNIT_KEYWORDS = {
+    VHDLLexer.KW_ENTITY: "entity",
+    VHDLLexer.KW_ARCHITECTURE: "architecture",
+    VHDLLexer.KW_PACKAGE: "package",
+    VHDLLexer.KW_CONFIGURATION: "configuration",
+    VHDLLexer.KW_CONTEXT: "context",
+}
+
+# Keywords that must follow `end` when closing constructs which are not tracked
+_KEYWORD_CLOSERS = {
+    VHDLLexer.KW_IF, VHDLLexer.KW_LOOP, VHDLLexer.KW_PROCESS, VHDLLexer.KW_POSTPONED,
+    VHDLLexer.KW_CASE, VHDLLexer.KW_GENERATE, VHDLLexer.KW_BLOCK, VHDLLexer.KW_RECORD,
+    VHDLLexer.KW_UNITS, VHDLLexer.KW_PROTECTED, VHDLLexer.KW_COMPONENT, VHDLLexer.KW_FOR,
+    VHDLLexer.KW_VIEW,
+}
+
+# Keywords that start a subprogram or nested package specification inside a unit
+_SPEC_KEYWORDS = {VHDLLexer.KW_FUNCTION, VHDLLexer.KW_PROCEDURE, VHDLLexer.KW_PACKAGE}
+
+# Tokens that can follow one of _SPEC_KEYWORDS in a specification
+_DESIGNATORS = {VHDLLexer.LIT_IDENTIFIER, VHDLLexer.LIT_STRING, VHDLLexer.KW_BODY}
+
+
+class DesignUnitTokens(NamedTuple):
+    """Tokens of one design unit (context clause and library unit)."""
+    kind: Optional[str]  # "entity", "architecture", "package", "package body", "package instance",
+                         # "configuration", "context", or None for an incomplete trailing unit
+    name: Optional[str]
+    tokens: List[Token]  # all tokens, including those on hidden channels
+
+    @property
+    def start_line(self) -> int:
+        """Line of the first token on the default channel."""
+        for token in self.tokens:
+            if token.channel == Token.DEFAULT_CHANNEL:
+                return token.line
+        return self.tokens[0].line
+
+    @property
+    def end_line(self) -> int:
+        """Line of the last token on the default channel."""
+        for token in reversed(self.tokens):
+            if token.channel == Token.DEFAULT_CHANNEL:
+                return token.line
+        return self.tokens[-1].line
+
+    @property
+    def text(self) -> str:
+        """Source text of the unit."""
+        return "".join(token.text for token in self.tokens)
+
+
+def lex_tokens(lexer: VHDLLexer) -> Iterator[Token]:
+    """Yield all tokens (on every channel) from a lexer, excluding EOF."""
+    while True:
+        token = lexer.nextToken()
+        if token.type == Token.EOF:
+            return
+        yield token
+
+
+def without_whitespace(tokens: Iterable[Token]) -> Iterator[Token]:
+    """Yield the tokens that are not on the whitespace channel (line breaks and blanks)."""
+    channel = VHDLLexer.WHITESPACE_CHANNEL
+    return (token for token in tokens if token.channel != channel)
+
+
+class WhitespaceFilter(TokenSource):
+    """
+    Token source that drops the whitespace tokens of another token source.
+
+    Line breaks and blanks are lexed onto the whitespace channel, which the
+    parser never reads; they are often more than half of all tokens. Dropping
+    them before a CommonTokenStream buffers them saves their memory and the
+    time the stream spends skipping them. Comments and tool directives are
+    kept. Parse trees and the model built from them are unchanged, but the
+    text of a parse tree node or token range no longer contains whitespace.
+
+    Examples:
+        stream = CommonTokenStream(WhitespaceFilter(VHDLLexer(CompactInputStream(vhdl_code))))
+    """
+
+    __slots__ = ('source', 'dropped', '_factory')
+
+    def __init__(self, source: Any) -> None:
+        self.source = source
+        self.dropped = 0  # number of tokens dropped so far
+        self._factory = source._factory
+
+    def nextToken(self) -> Token:
+        channel = VHDLLexer.WHITESPACE_CHANNEL
+        token = self.source.nextToken()
+        while token.channel == channel:
+            self.dropped += 1
+            token = self.source.nextToken()
+        return token
+
+    @property
+    def line(self) -> int:
+        return self.source.line
+
+    @property
+    def column(self) -> int:
+        return self.source.column
+
+    def getInputStream(self) -> Any:
+        return self.source.getInputStream()
+
+    def getSourceName(self) -> str:
+        return self.source.getSourceName()
+
+
+def split_design_units(tokens: Iterable[Token]) -> Iterator[DesignUnitTokens]:
+    """
+    Split a token sequence into design units.
+
+    Tokens are consumed lazily, so a unit is yielded as soon as its closing
+    semicolon has been seen.
+
+    Args:
+        tokens: Tokens in source order, on all channels, without EOF
+
+    Returns:
+        Iterator over the design units, in source order
+    """
+    unit: List[Token] = []
+    kind: Optional[str] = None
+    name: Optional[str] = None
+    depth = 0             # open scopes that are closed by `end`
+    paren = 0             # parenthesis depth
+    awaiting_is = False   # library unit keyword seen, but not its `is` yet
+    after_is = False      # previous token was an `is` that opened a scope
+    after_end = False     # previous token was `end`
+    pending_spec = False  # inside a subprogram or nested package header
+    prev_type = None
+
+    for token in tokens:
+        unit.append(token)
+        if token.channel != Token.DEFAULT_CHANNEL:
+            continue
+        ttype = token.type
+
+        # Resolve decisions that depend on the token after `is`, `end` or a subprogram keyword
+        if after_is:
+            after_is = False
+            if ttype == VHDLLexer.KW_NEW:
+                # Instantiation: there is no body, so close the scope again
+                depth -= 1
+                if kind == "package" and depth == 0:
+                    kind = "package instance"
+        if after_end:
+            after_end = False
+            if ttype not in _KEYWORD_CLOSERS:
+                depth -= 1
+        if pending_spec and prev_type in _SPEC_KEYWORDS and ttype not in _DESIGNATORS:
+            # Not a specification, e.g. the entity class in an attribute specification
+            pending_spec = False
+
+        if ttype == VHDLLexer.TOK_LP:
+            paren += 1
+        elif ttype == VHDLLexer.TOK_RP:
+            paren -= 1
+        elif paren > 0:
+            pass
+        elif kind is None:
+            # Between library units: context items until a library unit keyword
+            if ttype in _UNIT_KEYWORDS:
+                kind = _UNIT_KEYWORDS[ttype]
+                awaiting_is = True
+        elif awaiting_is:
+            if ttype == VHDLLexer.KW_BODY and kind == "package" and name is None:
+                kind = "package body"
+            elif ttype == VHDLLexer.LIT_IDENTIFIER and name is None:
+                name = token.text
+            elif ttype == VHDLLexer.KW_IS:
+                awaiting_is = False
+                depth += 1
+                after_is = True
+            elif ttype == VHDLLexer.TOK_SEMICOL and kind == "context":
+                # A context reference is a context item, not a library unit
+                kind = name = None
+                awaiting_is = False
+        elif pending_spec:
+            if ttype == VHDLLexer.KW_IS:
+                pending_spec = False
+                depth += 1
+                after_is = True
+            elif ttype == VHDLLexer.TOK_SEMICOL:
+                pending_spec = False
+        elif ttype == VHDLLexer.KW_END:
+            after_end = True
+        elif ttype in _SPEC_KEYWORDS:
+            # A subprogram or nested package only opens a scope if it has a body
+            pending_spec = prev_type != VHDLLexer.KW_END
+        elif ttype == VHDLLexer.TOK_SEMICOL and depth == 0:
+            yield DesignUnitTokens(kind, name, unit)
+            unit = []
+            kind = name = None
+        prev_type = ttype
+
+    if any(token.channel == Token.DEFAULT_CHANNEL for token in unit):
+        yield DesignUnitTokens(None, name, unit)
@@ -0,0 +1,505 @@
+"""
+Parse Server
+
+A script that parses VHDL pays for interpreter start-up, loading the grammar
+and warming the prediction DFAs before it parses anything. ParseServer keeps
+all of these, and the parsed documents, in a long-running process (started
+with `pyhdlio serve`) that clients query over a Unix socket.
+
+The protocol is JSON-RPC 2.0 with one JSON message per line. Paths are
+resolved by the server, so clients should send absolute paths. Methods:
+
+    entities(path)              entities of a file with their generics and ports
+    ports(path, entity)         ports of one entity
+    components(path)            component declarations of the packages of a file
+    dependencies(paths, library="work", components=True)
+                                compile order: {"levels": [[path, ...], ...], "unresolved": [...]}
+    find(name, kind=None)       design units of the files seen by dependencies() or scan()
+    scan(paths, library="work") index files for find() and dependencies()
+    invalidate(path=None)       drop one or all cached documents
+    stats()                     cache and DFA statistics
+    shutdown()                  stop the server
+
+Documents are parsed with interface_only=True (the queries only need
+entities and packages) and kept in an LRU cache with a cap on their number
+and on their estimated memory. A cached document is checked against the
+file's size and modification time on every query, and its content hash when
+those changed, so edits are picked up without restarting the server.
+Dependencies come from a Library index (see library.py and dependencies.py),
+which only scans changed files again.
+
+Examples:
+    pyhdlio serve --socket /tmp/pyhdlio.sock --dfa-cache build/vhdl.dfa &
+
+    from pyhdlio.vhdl.server import ParseClient
+    with ParseClient("/tmp/pyhdlio.sock") as client:
+        for entity in client.call("entities", path="/work/src/fifo.vhd"):
+            print(entity["name"], [port["names"] for port in entity["ports"]])
+"""
+
+__all__ = [
+    "DEFAULT_SOCKET",
+    "DocumentCache",
+    "ParseClient",
+    "ParseServer"
+]
+
+import gc
+import hashlib
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from .cache import DEFAULT_CACHE_DIR
+
+# Socket used when none is given
+DEFAULT_SOCKET = DEFAULT_CACHE_DIR / "server.sock"
+
+# JSON-RPC error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+SERVER_ERROR = -32000
+DEPENDENCY_CYCLE = -32001
+
+
+def _footprint(root: Any) -> int:
+    """Estimate the memory held by an object graph, in bytes (types and modules are not counted)."""
+    seen = set()
+    pending = [root]
+    size = 0
+    while pending:
+        obj = pending.pop()
+        if id(obj) in seen or isinstance(obj, (type, type(sys))):
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        pending.extend(gc.get_referents(obj))
+    return size
+
+
+class _Entry:
+    __slots__ = ("size", "mtime_ns", "digest", "footprint", "document")
+
+    def __init__(self, size: int, mtime_ns: int, digest: str, footprint: int, document: Any) -> None:
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.digest = digest
+        self.footprint = footprint
+        self.document = document
+
+
+class DocumentCache:
+    """
+    LRU cache of parsed documents, revalidated against their files.
+
+    Thread-safe; a file missing from the cache may be parsed by two threads
+    at the same time, in which case the last document parsed is kept.
+    """
+
+    def __init__(self, max_documents: int = 1024, max_memory: int = 512 * 1024 * 1024,
+                 **options: Any) -> None:
+        """
+        Args:
+            max_documents: Maximum number of cached documents
+            max_memory: Maximum estimated memory of the cached documents, in bytes
+            options: Options of Document.FromStr (e.g. interface_only=True)
+        """
+        self.max_documents = max_documents
+        self.max_memory = max_memory
+        self.options = options
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.memory = 0
+        self._entries: 'OrderedDict[Path, _Entry]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, path: Union[str, Path]) -> Any:
+        """
+        Return the document of a file, parsing it if it is not cached or changed.
+
+        Raises:
+            FileNotFoundError: If the file doesn't exist
+            VHDLSyntaxError: If parsing fails
+        """
+        from .model import Document
+        from .session import Session
+
+        path = Path(path).resolve()
+        st = path.stat()
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and (entry.size, entry.mtime_ns) == (st.st_size, st.st_mtime_ns):
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry.document
+
+        data = path.read_bytes()
+        digest = hashlib.sha256(data).hexdigest()
+        if entry is not None and entry.digest == digest:
+            with self._lock:
+                entry.size, entry.mtime_ns = st.st_size, st.st_mtime_ns
+                if path in self._entries:
+                    self._entries.move_to_end(path)
+                self.hits += 1
+            return entry.document
+
+        document = Document.FromStr(data.decode('utf-8'), str(path), session=Session.current(), **self.options)
+        footprint = _footprint(document)
+        with self._lock:
+            self.misses += 1
+            self._drop(path)
+            self._entries[path] = _Entry(st.st_size, st.st_mtime_ns, digest, footprint, document)
+            self.memory += footprint
+            while len(self._entries) > 1 and (len(self._entries) > self.max_documents
+                                              or self.memory > self.max_memory):
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+        return document
+
+    def invalidate(self, path: Union[str, Path, None] = None) -> int:
+        """Drop the document of a file, or all documents; return the number dropped."""
+        with self._lock:
+            if path is None:
+                count = len(self._entries)
+                self._entries.clear()
+                self.memory = 0
+                return count
+            return self._drop(Path(path).resolve())
+
+    def _drop(self, path: Path) -> int:
+        entry = self._entries.pop(path, None)
+        if entry is None:
+            return 0
+        self.memory -= entry.footprint
+        return 1
+
+
+def _literal(expression: Any) -> Optional[str]:
+    """Return the source text of a default value created by the visitor."""
+    if expression is None:
+        return None
+    from pyVHDLModel import StringLiteral
+    if isinstance(expression, StringLiteral):
+        return f'"{expression.Value}"'
+    return str(expression.Value)
+
+
+def _items(items: Optional[Iterable[Any]]) -> List[Dict[str, Any]]:
+    """Describe generic or port interface items."""
+    return [{"names": list(item.Identifiers), "mode": item.Mode.value, "subtype": item.Subtype.Name.Identifier,
+             "default": _literal(item.DefaultExpression)} for item in items or ()]
+
+
+def _interface(unit: Any) -> Dict[str, Any]:
+    """Describe the generics and ports of an entity or component."""
+    return {"name": unit.Identifier, "generics": _items(unit.GenericItems), "ports": _items(unit.PortItems)}
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """Serve the JSON-RPC messages of one connection, one per line."""
+
+    server: 'ParseServer'
+
+    def handle(self) -> None:
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                message = json.loads(line)
+            except ValueError as e:
+                response: Any = _error(None, PARSE_ERROR, f"Parse error: {e}")
+            else:
+                if isinstance(message, list):
+                    response = [r for r in map(self.server.dispatch, message) if r is not None] or None
+                else:
+                    response = self.server.dispatch(message)
+            if response is not None:
+                self.wfile.write(json.dumps(response).encode('utf-8') + b"\n")
+                self.wfile.flush()
+            if self.server.stopping:
+                self.server.shutdown()
+                return
+
+
+def _error(request_id: Any, code: int, message: str, data: Any = None) -> Dict[str, Any]:
+    error: Dict[str, Any] = {"code": code, "message": message}
+    if data is not None:
+        error["data"] = data
+    return {"jsonrpc": "2.0", "id": request_id, "error": error}
+
+
+class ParseServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    JSON-RPC server keeping the parser warm and parsed documents in memory.
+
+    Each connection is served by its own thread, with its own lexer and
+    parser (see Session.current()).
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: Union[str, Path] = DEFAULT_SOCKET, max_documents: int = 1024,
+                 max_memory: int = 512 * 1024 * 1024) -> None:
+        """
+        Args:
+            socket_path: Path of the Unix socket; a stale socket file left by a
+                server that is no longer running is replaced
+            max_documents: Maximum number of cached documents
+            max_memory: Maximum estimated memory of the cached documents, in bytes
+
+        Raises:
+            OSError: If another server is listening on the socket
+        """
+        from .concurrency import enable_locking
+        from .library import Library
+
+        # Connections are served by concurrent threads
+        enable_locking()
+        socket_path = Path(socket_path).expanduser()
+        socket_path.parent.mkdir(parents=True, exist_ok=True)
+        if socket_path.exists():
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(str(socket_path))
+            except OSError:
+                socket_path.unlink()
+            else:
+                raise OSError(f"a server is already listening on {socket_path}")
+            finally:
+                probe.close()
+        self.socket_path = socket_path
+        self.documents = DocumentCache(max_documents, max_memory, interface_only=True, build_tree=False)
+        self.library = Library()
+        self.requests = 0
+        self.stopping = False
+        self._library_lock = threading.Lock()
+        self._requests_lock = threading.Lock()
+        self._methods: Dict[str, Callable[..., Any]] = {
+            "entities": self.entities,
+            "ports": self.ports,
+            "components": self.components,
+            "dependencies": self.dependencies,
+            "find": self.find,
+            "scan": self.scan,
+            "invalidate": self.invalidate,
+            "stats": self.stats,
+            "shutdown": self.stop,
+        }
+        # Only the user running the server may connect
+        old_umask = os.umask(0o177)
+        try:
+            super().__init__(str(socket_path), _Handler)
+        finally:
+            os.umask(old_umask)
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.library.close()
+        try:
+            self.socket_path.unlink()
+        except FileNotFoundError:
+            pass
+
+    def dispatch(self, message: Any) -> Optional[Dict[str, Any]]:
+        """Handle one JSON-RPC request; return the response, or None for a notification."""
+        if not isinstance(message, dict):
+            return _error(None, INVALID_REQUEST, "Invalid request")
+        if message.get("jsonrpc") != "2.0" or not isinstance(message.get("method"), str):
+            return _error(message.get("id"), INVALID_REQUEST, "Invalid request")
+        request_id = message.get("id")
+        method = self._methods.get(message["method"])
+        params = message.get("params", {})
+        with self._requests_lock:
+            self.requests += 1
+        if method is None:
+            response = _error(request_id, METHOD_NOT_FOUND, f"Method not found: {message['method']}")
+        else:
+            response = self._call(request_id, method, params)
+        return None if "id" not in message else response
+
+    def _call(self, request_id: Any, method: Callable[..., Any], params: Any) -> Dict[str, Any]:
+        """Call a method with JSON-RPC params (an array or an object) and return the response."""
+        import inspect
+        from .dependencies import DependencyCycleError
+
+        # Only params that do not fit the signature are invalid; a TypeError raised by the method is a server error
+        try:
+            if isinstance(params, list):
+                arguments = inspect.signature(method).bind(*params)
+            elif isinstance(params, dict):
+                arguments = inspect.signature(method).bind(**params)
+            else:
+                raise TypeError("params must be an array or an object")
+        except TypeError as e:
+            return _error(request_id, INVALID_PARAMS, f"Invalid params: {e}")
+        try:
+            return {"jsonrpc": "2.0", "id": request_id, "result": method(*arguments.args, **arguments.kwargs)}
+        except DependencyCycleError as e:
+            return _error(request_id, DEPENDENCY_CYCLE, str(e), [[str(path) for path in cycle] for cycle in e.cycles])
+        except Exception as e:
+            return _error(request_id, SERVER_ERROR, f"{type(e).__name__}: {e}")
+
+    def entities(self, path: str) -> List[Dict[str, Any]]:
+        """Return the entities of a file with their generics and ports."""
+        return [_interface(entity) for entity in self.documents.get(path).Entities.values()]
+
+    def ports(self, path: str, entity: str) -> List[Dict[str, Any]]:
+        """Return the ports of an entity of a file."""
+        for unit in self.documents.get(path).Entities.values():
+            if unit.Identifier.lower() == entity.lower():
+                return _items(unit.PortItems)
+        raise KeyError(f"no entity {entity} in {path}")
+
+    def components(self, path: str) -> List[Dict[str, Any]]:
+        """Return the component declarations of the packages of a file."""
+        return [dict(_interface(component), package=package.Identifier)
+                for package in self.documents.get(path).Packages.values()
+                for component in package.Components.values()]
+
+    def scan(self, paths: List[str], library: str = "work") -> Dict[str, Any]:
+        """Bring the library index up to date with a set of files."""
+        with self._library_lock:
+            result = self.library.scan(paths, library=library)
+        return {"scanned": len(result.scanned), "unchanged": result.unchanged,
+                "errors": [[str(path), error] for path, error in result.errors]}
+
+    def dependencies(self, paths: List[str], library: str = "work", components: bool = True) -> Dict[str, Any]:
+        """Return the compile order of a set of files, as levels of files that can be analyzed in parallel."""
+        with self._library_lock:
+            self.library.scan(paths, library=library)
+            graph = self.library.dependency_graph(components, paths=paths)
+        return {"levels": [[str(path) for path in level] for level in graph.levels()],
+                "unresolved": [{"path": str(path), "kind": reference.kind, "library": reference.library,
+                                "name": reference.name, "line": reference.line}
+                               for path, reference in graph.unresolved()]}
+
+    def find(self, name: str, kind: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Return the indexed design units with a given name."""
+        with self._library_lock:
+            units = self.library.find(name, kind)
+        return [{"kind": unit.kind, "name": unit.name, "path": str(unit.path), "library": unit.library,
+                 "start_line": unit.start_line, "end_line": unit.end_line} for unit in units]
+
+    def invalidate(self, path: Optional[str] = None) -> int:
+        """Drop the cached document of a file, or all cached documents; return the number dropped."""
+        return self.documents.invalidate(path)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache and DFA statistics."""
+        from .dfa import dfa_metrics
+
+        documents = self.documents
+        return {"requests": self.requests, "documents": len(documents), "memory": documents.memory,
+                "hits": documents.hits, "misses": documents.misses, "evictions": documents.evictions,
+                "dfa": dfa_metrics()}
+
+    def stop(self) -> bool:
+        """Stop serving once this request is answered."""
+        self.stopping = True
+        return True
+
+
+class ParseClient:
+    """Client of a ParseServer."""
+
+    def __init__(self, socket_path: Union[str, Path] = DEFAULT_SOCKET, timeout: Optional[float] = None) -> None:
+        """
+        Args:
+            socket_path: Path of the server's Unix socket
+            timeout: Optional timeout of each call, in seconds
+        """
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.settimeout(timeout)
+        self._socket.connect(str(Path(socket_path).expanduser()))
+        self._file = self._socket.makefile("rwb")
+        self._id = 0
+
+    def close(self) -> None:
+        """Close the connection."""
+        self._file.close()
+        self._socket.close()
+
+    def __enter__(self) -> 'ParseClient':
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def call(self, method: str, **params: Any) -> Any:
+        """
+        Call a method of the server and return its result.
+
+        Raises:
+            RuntimeError: If the server reports an error
+        """
+        self._id += 1
+        request = {"jsonrpc": "2.0", "id": self._id, "method": method, "params": params}
+        self._file.write(json.dumps(request).encode('utf-8') + b"\n")
+        self._file.flush()
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("the server closed the connection")
+        response = json.loads(line)
+        if "error" in response:
+            raise RuntimeError(response["error"]["message"])
+        return response["result"]
+
+
+def serve(socket_path: Union[str, Path] = DEFAULT_SOCKET, max_documents: int = 1024,
+          max_memory: int = 512 * 1024 * 1024, dfa_cache: Union[str, Path, None] = None,
+          max_dfa_states: Optional[int] = None, warm: Iterable[Union[str, Path]] = (),
+          ready: Optional[Callable[[ParseServer], None]] = None) -> Tuple[int, int]:
+    """
+    Run a ParseServer until it is shut down (by the shutdown method or Ctrl-C).
+
+    Args:
+        socket_path: Path of the Unix socket
+        max_documents: Maximum number of cached documents
+        max_memory: Maximum estimated memory of the cached documents, in bytes
+        dfa_cache: Optional file written by dfa.save_dfa() to preload, and to
+            save the DFAs back to on exit
+        max_dfa_states: Optional ceiling of a DFACachePolicy (see dfa.py),
+            with the preloaded DFAs as baseline
+        warm: Files to parse before serving
+        ready: Optional callback receiving the server once it listens
+
+    Returns:
+        (requests served, documents cached on exit)
+    """
+    from . import grammar  # noqa: F401
+    from .dfa import DFACachePolicy, dfa_states, load_dfa, save_dfa, set_dfa_policy
+
+    if dfa_cache is not None:
+        load_dfa(dfa_cache)
+    if max_dfa_states is not None:
+        set_dfa_policy(DFACachePolicy(max_dfa_states))
+    loaded = dfa_states()
+    with ParseServer(socket_path, max_documents, max_memory) as server:
+        for path in warm:
+            try:
+                server.documents.get(path)
+            except Exception as e:
+                print(f"{path}: {e}", file=sys.stderr)
+        if ready is not None:
+            ready(server)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            set_dfa_policy(None)
+        if dfa_cache is not None and dfa_states() > loaded:
+            save_dfa(dfa_cache)
+        return server.requests, len(server.documents)
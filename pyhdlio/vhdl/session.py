@@ -0,0 +1,86 @@
+"""
+Parser Sessions
+
+Parsing a source normally builds a new VHDLLexer, CommonTokenStream and
+VHDLParser (with its ParserATNSimulator). For batches of thousands of small
+files that set-up is a noticeable part of the total time. A Session keeps
+one of each and resets them for every source; Document.FromStr and
+Document.FromFile use it when one is passed as `session=`.
+
+The objects of a session can only run one parse at a time, so a session
+must not be shared between threads; Session.current() returns a session
+for the calling thread (and so one per worker process), created on first
+use.
+
+Examples:
+    from pyhdlio.vhdl import Document, Session
+    session = Session.current()
+    for path in paths:
+        doc = Document.FromFile(path, session=session)
+"""
+
+__all__ = [
+    "Session"
+]
+
+import threading
+from typing import Any
+
+# Session of each thread (see Session.current)
+_local = threading.local()
+
+
+class Session:
+    """
+    Lexer, token stream and parser reused for parsing one source after another.
+
+    The token stream keeps the tokens of the last source until the next one
+    is parsed.
+    """
+
+    def __init__(self) -> None:
+        from antlr4 import CommonTokenStream
+        from .grammar.VHDLLexer import VHDLLexer
+        from .grammar.VHDLParser import VHDLParser
+
+        self._lexer = VHDLLexer(None)
+        self._stream = CommonTokenStream(None)
+        self._parser = VHDLParser(None)
+
+    @classmethod
+    def current(cls) -> 'Session':
+        """Return the session of the calling thread, creating it on first use."""
+        session = getattr(_local, "session", None)
+        if session is None:
+            session = _local.session = cls()
+        return session
+
+    def lexer(self, vhdl_code: str) -> Any:
+        """Return the session's lexer, reset to the start of `vhdl_code`."""
+        from .charstream import CompactInputStream
+        from .concurrency import thread_safe
+
+        self._lexer.inputStream = CompactInputStream(vhdl_code)
+        return thread_safe(self._lexer)
+
+    def parser(self, token_source: Any) -> Any:
+        """
+        Return the session's parser, reset to read a new token stream over `token_source`.
+
+        Parse listeners, disabled tree building and prediction counters left
+        by the previous parse (see listener.ModelListener and
+        ParseStats.watch_predictions) are removed, and the simulator is
+        replaced by a locked one when needed (see concurrency.thread_safe).
+        """
+        from .concurrency import thread_safe
+
+        parser = thread_safe(self._parser)
+        parser.removeParseListeners()
+        parser.buildParseTrees = True
+        interp = parser._interp
+        if "adaptivePredict" in vars(interp):
+            del interp.adaptivePredict
+            interp._stats = None
+        self._stream.setTokenSource(token_source)
+        parser.setTokenStream(self._stream)
+        return parser
@@ -0,0 +1,272 @@
+"""
+ATN Snapshots
+
+The generated VHDLLexer and VHDLParser build their ATNs when they are
+imported, by deserializing the integer lists returned by `serializedATN()`.
+Short-lived processes can instead load a pickled snapshot of each
+deserialized ATN from the cache directory. The generated modules are left as
+ANTLR writes them: pyhdlio.vhdl.grammar executes them with the deserializer
+of snapshot_deserializer(), which asks load_grammar_atn() for the ATN. It
+only reads snapshots; they are written on request, with save_snapshots() or
+`pyhdlio snapshot`.
+
+A snapshot starts with a header line holding the SHA-256 digest of the
+serialized ATN it was built from and the ANTLR runtime version. It is only
+loaded if both match, if the file and its directory belong to the current
+user and cannot be written by anybody else, and only the ANTLR classes an
+ATN is made of are unpickled from it. Otherwise the ATN is deserialized as
+usual. Set the environment variable PYHDLIO_ATN_SNAPSHOT=0 to never load
+snapshots.
+
+Examples:
+    from pyhdlio.vhdl.snapshot import save_snapshots
+    for path in save_snapshots():
+        print(path)
+"""
+
+__all__ = [
+    "load_atn",
+    "load_grammar_atn",
+    "save_atn",
+    "save_snapshots",
+    "snapshot_deserializer",
+    "snapshot_path"
+]
+
+import gc
+import hashlib
+import io
+import os
+import pickle
+import sys
+import threading
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, List, Optional, Type, Union
+
+from antlr4.atn.ATN import ATN
+from antlr4.atn.ATNDeserializer import ATNDeserializer
+from antlr4.atn.LexerAction import LexerMoreAction, LexerPopModeAction, LexerSkipAction
+
+# Version of the snapshot layout below
+FORMAT_VERSION = 2
+
+# Generated recognizers whose ATNs are snapshotted
+GRAMMAR_MODULES = ("VHDLLexer", "VHDLParser")
+
+# Stack size of the thread that pickles an ATN
+_DUMP_STACK_SIZE = 256 * 1024 * 1024
+
+# Lexer actions that the runtime compares by identity
+_SINGLETONS: Dict[str, Any] = {
+    "more": LexerMoreAction.INSTANCE,
+    "popMode": LexerPopModeAction.INSTANCE,
+    "skip": LexerSkipAction.INSTANCE,
+}
+
+# The only classes a pickled ATN may refer to, by module
+_ATN_CLASSES: Dict[str, FrozenSet[str]] = {
+    "antlr4.IntervalSet": frozenset(("IntervalSet",)),
+    "antlr4.atn.ATN": frozenset(("ATN",)),
+    "antlr4.atn.ATNState": frozenset((
+        "BasicBlockStartState", "BasicState", "BlockEndState", "LoopEndState", "PlusBlockStartState",
+        "PlusLoopbackState", "RuleStartState", "RuleStopState", "StarBlockStartState", "StarLoopEntryState",
+        "StarLoopbackState", "TokensStartState")),
+    "antlr4.atn.ATNType": frozenset(("ATNType",)),
+    "antlr4.atn.LexerAction": frozenset((
+        "LexerActionType", "LexerChannelAction", "LexerCustomAction", "LexerModeAction", "LexerPushModeAction",
+        "LexerTypeAction")),
+    "antlr4.atn.Transition": frozenset((
+        "ActionTransition", "AtomTransition", "EpsilonTransition", "NotSetTransition",
+        "PrecedencePredicateTransition", "PredicateTransition", "RangeTransition", "RuleTransition",
+        "SetTransition", "WildcardTransition")),
+    "builtins": frozenset(("dict", "frozenset", "list", "range", "set", "tuple")),
+}
+
+
+def _digest(data: List[int]) -> str:
+    """Return the SHA-256 digest of a serialized ATN."""
+    from array import array
+    return hashlib.sha256(array("q", data).tobytes()).hexdigest()
+
+
+def _header(data: List[int]) -> bytes:
+    """Identify the serialized ATN and runtime a snapshot was built from."""
+    from .cache import runtime_version
+    return f"pyhdlio-atn {FORMAT_VERSION} {runtime_version()} {_digest(data)}\n".encode()
+
+
+def snapshot_path(name: str) -> Path:
+    """Return the snapshot file for the ATN of generated recognizer `name` (e.g. "VHDLParser")."""
+    from .. import __version__
+    from .cache import DEFAULT_CACHE_DIR
+    return DEFAULT_CACHE_DIR / "atn" / f"{name}-{__version__}.pickle"
+
+
+class _Pickler(pickle.Pickler):
+    """Keep the identity of lexer action singletons."""
+
+    def persistent_id(self, obj: Any) -> Any:
+        for key, singleton in _SINGLETONS.items():
+            if obj is singleton:
+                return key
+        return None
+
+
+class _Unpickler(pickle.Unpickler):
+    """Only rebuild ATN objects: refuse anything but the classes listed in _ATN_CLASSES."""
+
+    def persistent_load(self, pid: Any) -> Any:
+        return _SINGLETONS[pid]
+
+    def find_class(self, module: str, name: str) -> Any:
+        # Exact names only: a dotted name would reach any attribute of an allowed module
+        if name in _ATN_CLASSES.get(module, ()):
+            return super().find_class(module, name)
+        raise pickle.UnpicklingError(f"{module}.{name} is not part of an ATN")
+
+
+def _dumps(atn: ATN) -> bytes:
+    """
+    Pickle an ATN.
+
+    Pickling follows the state graph recursively, so this runs in a thread
+    with a large stack and a raised recursion limit.
+    """
+    result: List[Any] = []
+
+    def dump() -> None:
+        buffer = io.BytesIO()
+        try:
+            _Pickler(buffer, protocol=pickle.HIGHEST_PROTOCOL).dump(atn)
+        except Exception as e:
+            result.append(e)
+        else:
+            result.append(buffer.getvalue())
+
+    limit = sys.getrecursionlimit()
+    stack_size = threading.stack_size(_DUMP_STACK_SIZE)
+    try:
+        sys.setrecursionlimit(max(limit, 8 * len(atn.states) + 1000))
+        thread = threading.Thread(target=dump)
+        thread.start()
+        thread.join()
+    finally:
+        threading.stack_size(stack_size)
+        sys.setrecursionlimit(limit)
+    if not result or isinstance(result[0], Exception):
+        raise RuntimeError("could not pickle ATN") from (result[0] if result else None)
+    return result[0]
+
+
+def save_atn(atn: ATN, data: List[int], path: Union[str, Path]) -> None:
+    """
+    Write a snapshot of a deserialized ATN.
+
+    Args:
+        atn: ATN deserialized from `data`
+        data: Serialized ATN, as returned by the generated serializedATN()
+        path: Snapshot file to write (atomically, readable by the current user only)
+    """
+    import tempfile
+
+    body = _dumps(atn)
+    path = Path(path)
+    path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(_header(data))
+            f.write(body)
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+def load_atn(data: List[int], path: Union[str, Path]) -> Optional[ATN]:
+    """
+    Load the snapshot of the ATN serialized as `data`.
+
+    Args:
+        data: Serialized ATN, as returned by the generated serializedATN()
+        path: Snapshot file written by save_atn()
+
+    Returns:
+        The ATN, or None if the file is missing, unreadable, not trusted (see
+        the module documentation) or was built from another serialized ATN or
+        runtime version
+    """
+    from .cache import _trusted
+
+    path = Path(path)
+    enabled = gc.isenabled()
+    try:
+        if not _trusted(path):
+            return None
+        with open(path, 'rb') as f:
+            if f.readline() != _header(data):
+                return None
+            # Loading creates many objects that are all kept: skip the collections this would trigger
+            gc.disable()
+            atn = _Unpickler(f).load()
+    except Exception:
+        return None
+    finally:
+        if enabled:
+            gc.enable()
+    return atn if isinstance(atn, ATN) else None
+
+
+def load_grammar_atn(name: str, data: List[int]) -> ATN:
+    """
+    Return the ATN of a generated recognizer, from its snapshot if there is a valid one.
+
+    This never writes a snapshot.
+
+    Args:
+        name: Name of the generated recognizer, e.g. "VHDLParser"
+        data: Serialized ATN, as returned by the generated serializedATN()
+
+    Returns:
+        The ATN
+    """
+    if os.environ.get("PYHDLIO_ATN_SNAPSHOT", "1") != "0":
+        atn = load_atn(data, snapshot_path(name))
+        if atn is not None:
+            return atn
+    return ATNDeserializer().deserialize(data)
+
+
+def snapshot_deserializer(name: str) -> Type[ATNDeserializer]:
+    """
+    Return an ATNDeserializer class whose deserialize() calls load_grammar_atn() for recognizer `name`.
+
+    pyhdlio.vhdl.grammar binds it as antlr4.ATNDeserializer while the
+    generated module of `name` is executed.
+    """
+    class SnapshotDeserializer(ATNDeserializer):
+        def deserialize(self, data: List[int]) -> ATN:
+            return load_grammar_atn(name, data)
+
+    return SnapshotDeserializer
+
+
+def save_snapshots() -> List[Path]:
+    """
+    Write the snapshots of the lexer and parser ATNs, see snapshot_path().
+
+    The ATNs are deserialized again from the generated grammar, so that a
+    snapshot is never written from another snapshot.
+
+    Returns:
+        The snapshot files written
+    """
+    import importlib
+
+    paths = []
+    for name in GRAMMAR_MODULES:
+        data = importlib.import_module(f"{__package__}.grammar.{name}").serializedATN()
+        path = snapshot_path(name)
+        save_atn(ATNDeserializer().deserialize(data), data, path)
+        paths.append(path)
+    return paths
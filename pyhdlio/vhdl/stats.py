@@ -0,0 +1,152 @@
+"""
+Parse Statistics
+
+This module provides ParseStats, which Document.FromStr and Document.FromFile
+fill in when one is passed as `stats=`. It records the wall time of each
+phase (reading, lexing, parsing, visiting; the parse time is further split
+into prediction and tree building) and counters that help finding
+pathological sources: tokens, hidden-channel tokens, parse tree nodes, DFA
+states added and fallbacks from SLL to full LL prediction.
+
+The same object can be passed to several calls; times and counters add up,
+so one object can describe a whole build, or one per file can be collected
+and combined with merge().
+
+Examples:
+    from pyhdlio.vhdl import Document, ParseStats
+    stats = ParseStats()
+    doc = Document.FromFile("counter.vhd", stats=stats)
+    print(stats)
+    print(stats.as_dict())
+"""
+
+__all__ = [
+    "ParseStats"
+]
+
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator
+
+# Phases with a wall time, in the order they run
+PHASES = ("read", "lex", "parse", "visit")
+
+# Counters, in the order they are reported
+COUNTERS = ("documents", "cache_hits", "tokens", "hidden_tokens", "nodes", "predictions",
+            "ll_fallbacks", "dfa_states_added")
+
+
+class ParseStats:
+    """
+    Wall times per phase and counters of one or more parses.
+
+    Attributes:
+        read_time: Seconds spent reading files (FromFile)
+        lex_time: Seconds spent lexing (and splitting into design units)
+        parse_time: Seconds spent parsing, prediction included
+        prediction_time: Part of parse_time spent in adaptive prediction
+        visit_time: Seconds spent building the model from the parse trees
+        documents: Number of sources parsed
+        cache_hits: Number of files served from a ParseCache (not parsed)
+        tokens: Tokens lexed, on every channel (EOF excluded)
+        hidden_tokens: Part of tokens on other channels than the default one
+            (whitespace, comments, tool directives)
+        nodes: Parse tree nodes (rule contexts and terminals) built
+        predictions: Adaptive prediction calls made by the parser
+        ll_fallbacks: Parses for which SLL prediction failed and the input
+            was parsed again with full LL prediction
+        dfa_states_added: DFA states added to the shared lexer and parser
+            DFA caches, i.e. prediction work that later parses can skip
+    """
+
+    def __init__(self) -> None:
+        for phase in PHASES:
+            setattr(self, f"{phase}_time", 0.0)
+        self.prediction_time = 0.0
+        for counter in COUNTERS:
+            setattr(self, counter, 0)
+
+    @property
+    def tree_time(self) -> float:
+        """Part of parse_time not spent in prediction (tree building, error handling)."""
+        return self.parse_time - self.prediction_time
+
+    @property
+    def total_time(self) -> float:
+        """Sum of the phase times."""
+        return sum(getattr(self, f"{phase}_time") for phase in PHASES)
+
+    @contextmanager
+    def measure(self, phase: str) -> Iterator[None]:
+        """Add the wall time of the with-block to the time of `phase` (one of PHASES)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            name = f"{phase}_time"
+            setattr(self, name, getattr(self, name) + time.perf_counter() - start)
+
+    def count_tokens(self, tokens: Iterable[Any], dropped: int = 0) -> None:
+        """Count lexed tokens (EOF excluded), and `dropped` whitespace tokens that were never buffered."""
+        from antlr4 import Token
+
+        self.tokens += dropped
+        self.hidden_tokens += dropped
+        for token in tokens:
+            if token.type != Token.EOF:
+                self.tokens += 1
+                if token.channel != Token.DEFAULT_CHANNEL:
+                    self.hidden_tokens += 1
+
+    def count_nodes(self, tree: Any) -> None:
+        """Count the nodes of a parse tree."""
+        stack = [tree]
+        while stack:
+            node = stack.pop()
+            self.nodes += 1
+            children = getattr(node, "children", None)
+            if children:
+                stack.extend(children)
+
+    def watch_predictions(self, parser: Any) -> None:
+        """Count and time the adaptive predictions made by `parser`."""
+        interp = parser._interp
+        if getattr(interp, "_stats", None) is self:
+            return
+        predict = type(interp).adaptivePredict
+
+        def adaptivePredict(input, decision, outerContext):
+            start = time.perf_counter()
+            try:
+                return predict(interp, input, decision, outerContext)
+            finally:
+                self.prediction_time += time.perf_counter() - start
+                self.predictions += 1
+
+        interp.adaptivePredict = adaptivePredict
+        interp._stats = self
+
+    def merge(self, other: 'ParseStats') -> 'ParseStats':
+        """Add the times and counters of `other` to this object and return it."""
+        names = [f"{phase}_time" for phase in PHASES] + ["prediction_time", *COUNTERS]
+        for name in names:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        return self
+
+    def as_dict(self) -> Dict[str, float]:
+        """Return the times (in seconds) and counters as a flat dict, e.g. for JSON."""
+        result: Dict[str, float] = {f"{phase}_time": getattr(self, f"{phase}_time") for phase in PHASES}
+        result["prediction_time"] = self.prediction_time
+        result["tree_time"] = self.tree_time
+        result["total_time"] = self.total_time
+        result.update((counter, getattr(self, counter)) for counter in COUNTERS)
+        return result
+
+    def __str__(self) -> str:
+        times = ", ".join(f"{phase} {getattr(self, f'{phase}_time') * 1000:.1f} ms" for phase in PHASES)
+        counters = ", ".join(f"{counter.replace('_', ' ')} {getattr(self, counter)}" for counter in COUNTERS)
+        return (f"{times} (prediction {self.prediction_time * 1000:.1f} ms, "
+                f"tree {self.tree_time * 1000:.1f} ms); {counters}")
+
+    def __repr__(self) -> str:
+        return f"ParseStats({self.as_dict()!r})"
@@ -0,0 +1,220 @@
+"""
+Streaming Design Units
+
+This module parses large VHDL files one design unit at a time. iter_units()
+reads the file in chunks, splits the token stream into design units at token
+level (see scanner.split_design_units) and yields the model object of each
+unit (Entity, Package, PackageBody, ...) as soon as the unit has been parsed.
+Characters, tokens and parse tree nodes of finished units are released, so
+memory use is bounded by the largest design unit rather than by the file.
+
+Examples:
+    from pyhdlio.vhdl import iter_units
+    for unit in iter_units("netlist.vhd"):
+        print(type(unit).__name__, unit.Identifier)
+"""
+
+__all__ = [
+    "FileWindowStream",
+    "iter_units"
+]
+
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Iterator, Optional, Union
+
+from antlr4.InputStream import InputStream
+from antlr4.Token import Token
+
+if TYPE_CHECKING:
+    from .diagnostics import Diagnostics
+
+# Characters read from the file at a time
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+
+class FileWindowStream(InputStream):
+    """
+    ANTLR character stream over a text file that keeps only a window of it in memory.
+
+    The file is read in chunks as the lexer looks ahead; as with
+    CompactInputStream, code points are read straight from the text of the
+    window, which is not copied into a list. discard() drops the
+    characters before a given index, once no token can start or be extended
+    before it; getText() is not available for discarded characters, so
+    lexers reading this stream should copy the token text into the tokens
+    (CommonTokenFactory(copyText=True)).
+    """
+
+    def __init__(self, file_path: Union[str, Path], encoding: str = 'utf-8',
+                 chunk_size: int = DEFAULT_CHUNK_SIZE) -> None:
+        self.name = str(file_path)
+        self._file = open(file_path, encoding=encoding)
+        self._chunk_size = chunk_size
+        self._offset = 0          # index of the first character in the window
+        self._eof = False
+        self._index = 0
+        self.strdata = ""
+        self.data = None
+        self._size = 0            # index after the last character read so far
+
+    def _read(self) -> bool:
+        """Append the next chunk of the file to the window; return False at the end of the file."""
+        if self._eof:
+            return False
+        text = self._file.read(self._chunk_size)
+        if not text:
+            self._eof = True
+            self._file.close()
+            return False
+        self.strdata += text
+        self._size += len(text)
+        return True
+
+    def close(self) -> None:
+        """Close the file."""
+        self._eof = True
+        self._file.close()
+
+    def discard(self, index: int) -> None:
+        """Release the characters before `index`; they are dropped a chunk at a time."""
+        count = index - self._offset
+        if count >= self._chunk_size:
+            self.strdata = self.strdata[count:]
+            self._offset = index
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def reset(self) -> None:
+        if self._offset:
+            raise ValueError("cannot reset a stream whose start has been discarded")
+        self._index = 0
+
+    def consume(self) -> None:
+        if self.LA(1) == Token.EOF:
+            raise Exception("cannot consume EOF")
+        self._index += 1
+
+    def LA(self, offset: int) -> int:
+        if offset == 0:
+            return 0  # undefined
+        if offset < 0:
+            offset += 1  # e.g., translate LA(-1) to use offset=0
+        pos = self._index + offset - 1
+        while pos >= self._size:
+            if not self._read():
+                return Token.EOF
+        if pos < self._offset:
+            return Token.EOF
+        return ord(self.strdata[pos - self._offset])
+
+    def seek(self, _index: int) -> None:
+        if _index <= self._index:
+            self._index = _index
+            return
+        while _index > self._size and self._read():
+            pass
+        self._index = min(_index, self._size)
+
+    def getText(self, start: int, stop: int) -> str:
+        if start < self._offset:
+            raise ValueError(f"characters before index {self._offset} have been discarded")
+        stop = min(stop, self._size - 1)
+        if start >= self._size:
+            return ""
+        return self.strdata[start - self._offset:stop - self._offset + 1]
+
+    def __str__(self) -> str:
+        return self.strdata
+
+
+def _window_tokens(lexer: Any, stream: FileWindowStream) -> Iterator[Token]:
+    """Yield all tokens (on every channel) from a lexer, excluding EOF, discarding the characters lexed."""
+    while True:
+        token = lexer.nextToken()
+        if token.type == Token.EOF:
+            return
+        yield token
+        stream.discard(stream.index)
+
+
+def iter_units(file_path: Union[str, Path], two_stage: bool = True, interface_only: bool = False,
+               diagnostics: Optional['Diagnostics'] = None,
+               chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Any]:
+    """
+    Parse a VHDL file one design unit at a time and yield the model objects.
+
+    Each design unit is parsed on its own (as with Document.FromStr(...,
+    split_units=True)) and its model object is yielded as soon as the unit
+    has been parsed; units that produce no model object (e.g. architectures)
+    are skipped. The file is read in chunks of `chunk_size` characters and
+    the characters, tokens and parse tree of a unit are released once it has
+    been converted, so the whole file is never held in memory. Whitespace
+    tokens are dropped as soon as they are lexed.
+
+    Args:
+        file_path: Path to the VHDL file to parse
+        two_stage: Try fast SLL prediction before full LL (see Document.FromStr)
+        interface_only: Only parse entity and package declarations; other
+            design units are skipped at token level
+        diagnostics: Optional Diagnostics collector (see Document.FromStr)
+        chunk_size: Number of characters read from the file at a time
+
+    Returns:
+        Iterator over the model objects (Entity, Package, PackageBody, ...) in source order
+
+    Raises:
+        FileNotFoundError: If the file doesn't exist
+        VHDLSyntaxError: After the last unit, if any unit failed to parse; the
+            units that parsed have been yielded
+    """
+    from antlr4 import CommonTokenStream
+    from antlr4.CommonTokenFactory import CommonTokenFactory
+    from antlr4.ListTokenSource import ListTokenSource
+    from .concurrency import thread_safe
+    from .grammar.VHDLLexer import VHDLLexer
+    from .grammar.VHDLParser import VHDLParser
+    from .model import _INTERFACE_UNITS, VHDLSyntaxError, _document_parsed, _error_listener, _parse_unit
+    from .scanner import split_design_units, without_whitespace
+    from .visitor import VHDLVisitor
+
+    file_path = Path(file_path)
+    if not file_path.exists():
+        raise FileNotFoundError(f"VHDL file not found: {file_path}")
+
+    stream = FileWindowStream(file_path, chunk_size=chunk_size)
+    try:
+        lexer = thread_safe(VHDLLexer(stream))
+        # Tokens must not refer back to characters that get discarded
+        lexer._factory = CommonTokenFactory(copyText=True)
+        visitor = VHDLVisitor(filename=str(file_path), diagnostics=diagnostics)
+        error_listener = _error_listener()
+        parser = None
+        errors = []
+        for unit in split_design_units(without_whitespace(_window_tokens(lexer, stream))):
+            if interface_only and unit.kind not in _INTERFACE_UNITS:
+                continue
+            tokens = CommonTokenStream(ListTokenSource(unit.tokens))
+            if parser is None:
+                parser = thread_safe(VHDLParser(tokens))
+            else:
+                parser.setTokenStream(tokens)
+            try:
+                tree = _parse_unit(parser, unit, error_listener, two_stage)
+            except VHDLSyntaxError as e:
+                errors.append(e)
+                continue
+            result = visitor.visit(tree)
+            # Drop the tree and tokens of this unit before handing out its model object
+            del tree, tokens, unit
+            parser.setTokenStream(None)
+            if result is not None:
+                yield result
+    finally:
+        stream.close()
+
+    # Only a file read to its end counts, not a generator closed or abandoned early
+    _document_parsed()
+    if errors:
+        raise VHDLSyntaxError("\n".join(str(e) for e in errors), None, errors)
@@ -13,90 +13,141 @@ from pyVHDLModel import (
 )
 from pyVHDLModel.Symbol import PackageSymbol
 from pathlib import Path
-import re
+from typing import Any, Dict, Optional
+
+from .diagnostics import Diagnostics
+
+# Marks node types that have not been looked up in a dispatch table yet
+_UNRESOLVED = object()
+
+# Port mode for each mode keyword (lower case)
+_MODES = {
+    'in': Mode.In,
+    'out': Mode.Out,
+    'inout': Mode.InOut,
+    'buffer': Mode.Buffer,
+    'linkage': Mode.Linkage
+}
+
+# Marks of line breaks, tabs and comments, which are replaced in source text
+_LAYOUT = ("\n", "\r", "\t", "\f", "--", "/*")
+
+
+def _source_text(ctx) -> str:
+    """
+    Return the source text a rule context was parsed from.
+
+    The text is sliced from the character stream between the start and stop
+    tokens, so it keeps the spacing of the source. If the slice spans
+    several lines or contains tabs or comments, or its characters are no
+    longer available (see streaming.FileWindowStream), the text is joined
+    from the tokens instead, with a single space wherever the source has
+    whitespace or comments between them.
+    """
+    start, stop = ctx.start, ctx.stop
+    try:
+        text = start.getInputStream().getText(start.start, stop.stop)
+        if not any(mark in text for mark in _LAYOUT):
+            return text
+    except ValueError:
+        pass
+
+    parts = []
+    end = None
+    for token in ctx.parser.getTokenStream().tokens[start.tokenIndex:stop.tokenIndex + 1]:
+        if token.channel != Token.DEFAULT_CHANNEL:
+            continue
+        if end is not None and token.start > end + 1:
+            parts.append(" ")
+        parts.append(token.text)
+        end = token.stop
+    return "".join(parts)
+
 
 class VHDLVisitor(ParseTreeVisitor):
     """Visitor to convert ANTLR4 parse tree to pyVHDLModel objects."""
 
-    def __init__(self, filename: str = "parsed.vhd"):
+    # Visitor method for each parse tree node type the visitor handles; visiting
+    # any other node returns None. Subclasses can extend the table, e.g.
+    # HANDLERS = {**VHDLVisitor.HANDLERS, VHDLParser.Rule_XContext: "visitX"}
+    HANDLERS: Dict[type, str] = {
+        VHDLParser.Rule_DesignFileContext: "visitDesignFile",
+        VHDLParser.Rule_DesignUnitContext: "visitDesignUnit",
+        VHDLParser.Rule_LibraryUnitContext: "visitLibraryUnit",
+        VHDLParser.Rule_EntityDeclarationContext: "visitEntityDeclaration",
+        VHDLParser.Rule_GenericClauseContext: "visitGenericClause",
+        VHDLParser.Rule_PortClauseContext: "visitPortClause",
+        VHDLParser.Rule_PackageDeclarationContext: "visitRule_PackageDeclaration",
+        VHDLParser.Rule_PackageDeclarativeItemContext: "visitRule_PackageDeclarativeItem",
+        VHDLParser.Rule_ComponentDeclarationContext: "visitRule_ComponentDeclaration",
+        VHDLParser.Rule_PackageBodyContext: "visitRule_PackageBody",
+        VHDLParser.Rule_PackageBodyDeclarativeItemContext: "visitRule_PackageBodyDeclarativeItem",
+        VHDLParser.Rule_PackageInstantiationDeclarationContext: "visitRule_PackageInstantiationDeclaration",
+    }
+
+    def __init__(self, filename: str = "parsed.vhd", diagnostics: Optional[Diagnostics] = None):
         super().__init__()
         self.filename = filename
         self.document = PyVHDLDocument(Path(filename))
+        self.diagnostics = diagnostics if diagnostics is not None else Diagnostics()
         self.current_entity = None
         self.current_architecture = None
         self.current_process = None
+        self._handlers = self._dispatch_table()
+
+    @classmethod
+    def _dispatch_table(cls) -> Dict[type, Any]:
+        """Return the map from node type to handler function for this class, building it on first use."""
+        table = cls.__dict__.get("_handler_table")
+        if table is None:
+            table = {node_type: getattr(cls, name) for node_type, name in cls.HANDLERS.items()}
+            cls._handler_table = table
+        return table
+
+    def _resolve(self, node_type: type) -> Any:
+        """Find the handler of a node type not in the table yet (via its base classes) and remember it."""
+        handler = None
+        for base in node_type.__mro__[1:]:
+            if base in self.HANDLERS:
+                handler = self._handlers[base]
+                break
+        self._handlers[node_type] = handler
+        return handler
 
     def visit(self, tree):
-        """Override visit to handle missing methods gracefully."""
-        try:
-            if isinstance(tree, VHDLParser.Rule_DesignFileContext):
-                result = self.visitDesignFile(tree)
-            elif isinstance(tree, VHDLParser.Rule_DesignUnitContext):
-                result = self.visitDesignUnit(tree)
-            elif isinstance(tree, VHDLParser.Rule_LibraryUnitContext):
-                result = self.visitLibraryUnit(tree)
-            elif isinstance(tree, VHDLParser.Rule_EntityDeclarationContext):
-                result = self.visitEntityDeclaration(tree)
-            elif isinstance(tree, VHDLParser.Rule_GenericClauseContext):
-                result = self.visitGenericClause(tree)
-            elif isinstance(tree, VHDLParser.Rule_PortClauseContext):
-                result = self.visitPortClause(tree)
-            elif isinstance(tree, VHDLParser.Rule_PackageDeclarationContext):
-                result = self.visitRule_PackageDeclaration(tree)
-            elif isinstance(tree, VHDLParser.Rule_PackageDeclarativeItemContext):
-                result = self.visitRule_PackageDeclarativeItem(tree)
-            elif isinstance(tree, VHDLParser.Rule_ComponentDeclarationContext):
-                result = self.visitRule_ComponentDeclaration(tree)
-            elif isinstance(tree, VHDLParser.Rule_PackageBodyContext):
-                result = self.visitRule_PackageBody(tree)
-            elif isinstance(tree, VHDLParser.Rule_PackageBodyDeclarativeItemContext):
-                result = self.visitRule_PackageBodyDeclarativeItem(tree)
-            elif isinstance(tree, VHDLParser.Rule_PackageInstantiationDeclarationContext):
-                result = self.visitRule_PackageInstantiationDeclaration(tree)
-            else:
-                result = None
-
-            return result
-        except AttributeError as e:
-            # If a visitor method is missing, return None instead of crashing
-            print(f"Warning: Missing visitor method for {tree.__class__.__name__}: {e}")
+        """
+        Visit a parse tree node with the handler registered for its type in HANDLERS.
+
+        Returns None for node types without a handler. If a handler fails, the
+        error is recorded in self.diagnostics and None is returned.
+        """
+        handler = self._handlers.get(type(tree), _UNRESOLVED)
+        if handler is _UNRESOLVED:
+            handler = self._resolve(type(tree))
+        if handler is None:
             return None
+        try:
+            return handler(self, tree)
         except Exception as e:
-            print(f"Error visiting {tree.__class__.__name__}: {e}")
-            import traceback
-            traceback.print_exc()
+            self.diagnostics.error(f"Failed to convert {type(tree).__name__}: {e}", tree, e)
             return None
 
-    def format_type_string(self, type_text):
-        """Format type string to have proper spacing in constraints."""
-        if not type_text:
-            return type_text
-
-        # Add spaces around 'downto' keyword - handle cases where it's adjacent to numbers/identifiers
-        formatted = re.sub(r'(\w)downto(\w)', r'\1 downto \2', type_text)
-
-        # Add spaces around operators in constraints
-        formatted = re.sub(r'(\w)-(\w)', r'\1 - \2', formatted)
-        formatted = re.sub(r'(\w)\+(\w)', r'\1 + \2', formatted)
-
-        # Clean up multiple spaces
-        formatted = re.sub(r'\s+', ' ', formatted).strip()
-
-        return formatted
-
     def visitDesignFile(self, ctx):
         """Visit design file and populate the pyVHDLModel Document."""
         # Process each design unit in the file
         for design_unit_ctx in ctx.rule_DesignUnit():
-            result = self.visit(design_unit_ctx)
-            if result:
-                if isinstance(result, Entity):
-                    self.document._AddEntity(result)
-                elif isinstance(result, Package):
-                    self.document._AddPackage(result)
+            self.addUnit(self.visit(design_unit_ctx))
 
         return self.document
 
+    def addUnit(self, result):
+        """Add the result of visiting a design unit to the pyVHDLModel Document."""
+        if result:
+            if isinstance(result, Entity):
+                self.document._AddEntity(result)
+            elif isinstance(result, Package):
+                self.document._AddPackage(result)
+
     def visitDesignUnit(self, ctx: VHDLParser.Rule_DesignUnitContext):
         """Visit design unit and extract entity if present."""
         if ctx.rule_LibraryUnit():
@@ -122,21 +173,25 @@ class VHDLVisitor(ParseTreeVisitor):
         if ctx.name and ctx.name.text:
             name = ctx.name.text
 
-        # Create pyVHDLModel Entity
-        entity = Entity(identifier=name)
-
         # Extract generics from generic clause if present
+        generics = []
         if ctx.rule_GenericClause():
             generics = self.visitGenericClause(ctx.rule_GenericClause()) or []
-            entity._genericItems.extend(generics)
 
         # Extract ports and port groups from port clause if present
+        ports, port_groups = [], []
         if ctx.rule_PortClause():
             ports, port_groups = self.visitPortClause(ctx.rule_PortClause())
-            entity._portItems.extend(ports)
-            if port_groups:
-                entity._portGroups.extend(port_groups)
 
+        return self.createEntity(name, generics, ports, port_groups)
+
+    def createEntity(self, name, generics, ports, port_groups):
+        """Create a pyVHDLModel Entity with its generics, ports and port groups."""
+        entity = Entity(identifier=name)
+        entity._genericItems.extend(generics)
+        entity._portItems.extend(ports)
+        if port_groups:
+            entity._portGroups.extend(port_groups)
         return entity
 
     def visitGenericClause(self, ctx: VHDLParser.Rule_GenericClauseContext):
@@ -178,48 +233,62 @@ class VHDLVisitor(ParseTreeVisitor):
                 if const_ctx.defaultValue:
                     default_value = self.extractExpression(const_ctx.defaultValue)
 
-                # Create pyVHDLModel GenericConstantInterfaceItem objects for each name
-                for name in names:
-                    # Create a subtype symbol
-                    type_name = SimpleName(type_str)
-                    type_symbol = SimpleSubtypeSymbol(type_name)
-
-                    # Handle default value - convert to appropriate Expression
-                    default_expr = None
-                    if default_value:
-                        default_expr = self._convert_default_value(default_value)
-
-                    generic_item = GenericConstantInterfaceItem(
-                        identifiers=[name],
-                        mode=Mode.In,  # Generics are always input mode
-                        subtype=type_symbol,
-                        defaultExpression=default_expr
-                    )
-                    generics.append(generic_item)
+                generics = self.createGenericItems(names, type_str, default_value)
 
         return generics
 
+    def createGenericItems(self, names, type_str, default_value):
+        """Create a pyVHDLModel GenericConstantInterfaceItem for each name of a constant declaration."""
+        generics = []
+        for name in names:
+            # Create a subtype symbol
+            type_name = SimpleName(type_str)
+            type_symbol = SimpleSubtypeSymbol(type_name)
+
+            # Handle default value - convert to appropriate Expression
+            default_expr = None
+            if default_value:
+                default_expr = self._convert_default_value(default_value)
+
+            generic_item = GenericConstantInterfaceItem(
+                identifiers=[name],
+                mode=Mode.In,  # Generics are always input mode
+                subtype=type_symbol,
+                defaultExpression=default_expr
+            )
+            generics.append(generic_item)
+        return generics
+
     def visitPortClause(self, ctx: VHDLParser.Rule_PortClauseContext):
         """Extract ports from port clause and organize them into groups based on line gaps."""
+        declarations = []
+        for port_ctx in ctx.rule_InterfaceSignalDeclaration():
+            # Get line numbers for this declaration
+            start_line = port_ctx.start.line if port_ctx.start else None
+            end_line = port_ctx.stop.line if port_ctx.stop else None
+            declarations.append((self.visitInterfaceSignalDeclaration(port_ctx), start_line, end_line))
+        return self.groupPorts(declarations)
+
+    def groupPorts(self, declarations):
+        """
+        Organize the ports of a port clause into groups based on line gaps.
+
+        Args:
+            declarations: (ports, start line, end line) of each interface signal
+                declaration, in source order
+
+        Returns:
+            Tuple of the list of all ports and the list of PortGroup
+        """
         all_ports = []
         port_groups = []
         current_group_ports = []
 
-        # Process each interface signal declaration
-        signal_declarations = ctx.rule_InterfaceSignalDeclaration()
-
         prev_end_line = None
 
-        for i, port_ctx in enumerate(signal_declarations):
-            port_list = self.visitInterfaceSignalDeclaration(port_ctx)
+        for i, (port_list, current_start_line, current_end_line) in enumerate(declarations):
             all_ports.extend(port_list)
 
-            # Get line numbers for this declaration
-            start_token = port_ctx.start
-            end_token = port_ctx.stop
-            current_start_line = start_token.line if start_token else None
-            current_end_line = end_token.line if end_token else None
-
             # Check if there's a significant gap from the previous declaration
             should_start_new_group = False
             if prev_end_line is not None and current_start_line is not None:
@@ -240,7 +309,7 @@ class VHDLVisitor(ParseTreeVisitor):
             prev_end_line = current_end_line
 
             # Handle the last declaration
-            is_last = (i == len(signal_declarations) - 1)
+            is_last = (i == len(declarations) - 1)
             if is_last and current_group_ports:
                 group_name = f"Group{len(port_groups) + 1}"
                 port_group = PortGroup(portItems=current_group_ports, name=group_name)
@@ -250,8 +319,6 @@ class VHDLVisitor(ParseTreeVisitor):
 
     def visitInterfaceSignalDeclaration(self, ctx):
         """Extract signal ports from interface signal declaration."""
-        ports = []
-
         # Extract port names from identifier list
         names = []
         if ctx.rule_IdentifierList():
@@ -263,31 +330,25 @@ class VHDLVisitor(ParseTreeVisitor):
 
         if ctx.modeName:
             # The modeName contains the mode indication context
-            mode_indication_ctx = ctx.getChild(2)  # Based on grammar structure
-            if hasattr(mode_indication_ctx, 'rule_SimpleModeIndication'):
-                simple_mode = mode_indication_ctx.rule_SimpleModeIndication()
-                if simple_mode:
-                    # Extract mode
-                    if simple_mode.rule_Mode():
-                        mode_ctx = simple_mode.rule_Mode()
-                        if hasattr(mode_ctx, 'name') and mode_ctx.name:
-                            mode_text = mode_ctx.name.text.lower()
-                            mode_mapping = {
-                                'in': Mode.In,
-                                'out': Mode.Out,
-                                'inout': Mode.InOut,
-                                'buffer': Mode.Buffer,
-                                'linkage': Mode.Linkage
-                            }
-                            mode = mode_mapping.get(mode_text, Mode.In)
-
-                    # Extract type
-                    if simple_mode.rule_InterfaceTypeIndication():
-                        type_indication = simple_mode.rule_InterfaceTypeIndication()
-                        if type_indication.rule_SubtypeIndication():
-                            type_str = self.extractSubtypeIndication(type_indication.rule_SubtypeIndication())
-
-        # Create pyVHDLModel PortSignalInterfaceItem objects for each name
+            simple_mode = ctx.modeName.rule_SimpleModeIndication()
+            if simple_mode:
+                # Extract mode
+                if simple_mode.rule_Mode():
+                    mode_ctx = simple_mode.rule_Mode()
+                    if hasattr(mode_ctx, 'name') and mode_ctx.name:
+                        mode = _MODES.get(mode_ctx.name.text.lower(), Mode.In)
+
+                # Extract type
+                if simple_mode.rule_InterfaceTypeIndication():
+                    type_indication = simple_mode.rule_InterfaceTypeIndication()
+                    if type_indication.rule_SubtypeIndication():
+                        type_str = self.extractSubtypeIndication(type_indication.rule_SubtypeIndication())
+
+        return self.createPortItems(names, mode, type_str)
+
+    def createPortItems(self, names, mode, type_str):
+        """Create a pyVHDLModel PortSignalInterfaceItem for each name of a signal declaration."""
+        ports = []
         for name in names:
             # Create type symbol
             type_name = SimpleName(type_str)
@@ -317,17 +378,14 @@ class VHDLVisitor(ParseTreeVisitor):
         if not ctx:
             return "unknown"
 
-        # Get the full text of the subtype indication
-        type_text = ctx.getText()
-
-        # Format the type string for readability
-        return self.format_type_string(type_text)
+        # Take the text of the subtype indication from the source, with its spacing
+        return _source_text(ctx)
 
     def extractExpression(self, ctx):
         """Extract expression as string."""
         if not ctx:
             return None
-        return ctx.getText()
+        return _source_text(ctx)
 
     def _convert_default_value(self, value_str: str):
         """Convert a default value string to an appropriate pyVHDLModel Expression."""
@@ -355,21 +413,23 @@ class VHDLVisitor(ParseTreeVisitor):
         if ctx.name:
             package_name = ctx.name.text
 
-            # Create pyVHDLModel Package
-            package = Package(identifier=package_name)
+            # Visit declarative items to find components
+            items = [self.visit(item) for item in ctx.declarativeItems]
+            return self.createPackage(package_name, items)
+        return None
 
-            # Visit declarative items to find components and add them to the package
-            for item in ctx.declarativeItems:
-                item_node = self.visit(item)
-                if item_node:
-                    # Add declarative items to package using the correct attribute
-                    package.DeclaredItems.append(item_node)
+    def createPackage(self, name, items):
+        """Create a pyVHDLModel Package holding the declared items that are not None."""
+        package = Package(identifier=name)
+        for item_node in items:
+            if item_node:
+                # Add declarative items to package using the correct attribute
+                package.DeclaredItems.append(item_node)
 
-            # Manually trigger indexing to ensure components are properly indexed
-            package.IndexDeclaredItems()
+        # Manually trigger indexing to ensure components are properly indexed
+        package.IndexDeclaredItems()
 
-            return package
-        return None
+        return package
 
     def visitRule_PackageDeclarativeItem(self, ctx):
         """Visit items declared in a package, including component declarations."""
@@ -403,30 +463,31 @@ class VHDLVisitor(ParseTreeVisitor):
             if ctx.portClause:
                 ports, port_groups = self.visitPortClause(ctx.portClause)
 
-            # Create pyVHDLModel Component
-            component = Component(
-                identifier=component_name,
-                genericItems=generics,
-                portItems=ports,
-                portGroups=port_groups
-            )
-
-            return component
+            return self.createComponent(component_name, generics, ports, port_groups)
         return None
 
+    def createComponent(self, name, generics, ports, port_groups):
+        """Create a pyVHDLModel Component with its generics, ports and port groups."""
+        return Component(
+            identifier=name,
+            genericItems=generics,
+            portItems=ports,
+            portGroups=port_groups
+        )
+
     def visitRule_PackageBody(self, ctx):
         """Visit a package body declaration."""
         if ctx.name:
-            package_body_name = ctx.name.text
-
-            # Create a PackageSymbol for the corresponding package
-            package_symbol = PackageSymbol(SimpleName(package_body_name))
+            return self.createPackageBody(ctx.name.text)
+        return None
 
-            # Create pyVHDLModel PackageBody with the package symbol
-            package_body = PackageBody(packageSymbol=package_symbol)
+    def createPackageBody(self, name):
+        """Create a pyVHDLModel PackageBody referring to the package `name`."""
+        # Create a PackageSymbol for the corresponding package
+        package_symbol = PackageSymbol(SimpleName(name))
 
-            return package_body
-        return None
+        # Create pyVHDLModel PackageBody with the package symbol
+        return PackageBody(packageSymbol=package_symbol)
 
     def visitRule_PackageBodyDeclarativeItem(self, ctx):
         """Visit items declared in a package body."""
@@ -0,0 +1,96 @@
+"""Fixtures shared by the pyhdlio tests."""
+
+from pathlib import Path
+from typing import Any, Dict
+
+import pytest
+
+SAMPLE = Path(__file__).parent.parent / "examples" / "vhdl_in" / "sample.vhd"
+
+
+def generate(entities: int = 3, prefix: str = "unit") -> str:
+    """Return ordinary RTL: a package of components and `entities` entity/architecture pairs."""
+    components = "".join(
+        f"    component {prefix}_{i} is\n"
+        f"        port (clk : in std_logic; q : out std_logic_vector(7 downto 0));\n"
+        f"    end component;\n" for i in range(entities))
+    lines = [f"library ieee;\nuse ieee.std_logic_1164.all;\n\npackage {prefix}_pkg is\n{components}end package;\n"]
+    for i in range(entities):
+        lines.append(
+            f"library ieee;\nuse ieee.std_logic_1164.all;\n\n"
+            f"entity {prefix}_{i} is\n"
+            f"    generic (WIDTH : positive := {8 * (i + 1)}; NAME : string := \"u{i}\");\n"
+            f"    port (\n"
+            f"        clk, reset : in  std_logic;\n"
+            f"        d          : in  std_logic_vector(WIDTH-1 downto 0);\n\n"
+            f"        q          : out std_logic_vector(7 downto 0)\n"
+            f"    );\n"
+            f"end entity {prefix}_{i};\n\n"
+            f"architecture rtl of {prefix}_{i} is\n"
+            f"    signal r : std_logic_vector(7 downto 0);\n"
+            f"begin\n"
+            f"    process(clk, reset)\n"
+            f"    begin\n"
+            f"        if reset = '1' then\n"
+            f"            r <= (others => '0');\n"
+            f"        elsif rising_edge(clk) then\n"
+            f"            r <= d(7 downto 0) when WIDTH > 8 else r;\n"
+            f"        end if;\n"
+            f"    end process;\n"
+            f"    q <= r;\n"
+            f"end architecture rtl;\n")
+    return "\n".join(lines)
+
+
+def _items(items: Any) -> list:
+    return [(list(item.Identifiers), item.Mode.value, item.Subtype.Name.Identifier,
+             None if item.DefaultExpression is None else getattr(item.DefaultExpression, "Value", None))
+            for item in items or ()]
+
+
+def _describe(document: Any) -> Dict[str, Any]:
+    """Return the entities, port groups and package components of a document as plain data."""
+    return {
+        "entities": {name: (_items(entity.GenericItems), _items(entity.PortItems),
+                            [(group.Name, len(group.PortItems)) for group in entity.PortGroups])
+                     for name, entity in document.Entities.items()},
+        "packages": {name: {component_name: (_items(component.GenericItems), _items(component.PortItems))
+                            for component_name, component in package.Components.items()}
+                     for name, package in document.Packages.items()},
+    }
+
+
+@pytest.fixture
+def describe():
+    """Function turning a Document into plain data that two parses can be compared by."""
+    return _describe
+
+
+@pytest.fixture(scope="session")
+def sample_code() -> str:
+    return SAMPLE.read_text(encoding='utf-8')
+
+
+@pytest.fixture(scope="session")
+def generated_code() -> str:
+    return generate()
+
+
+@pytest.fixture
+def make_source():
+    """Function returning generated VHDL, see generate()."""
+    return generate
+
+
+@pytest.fixture
+def write_files(tmp_path):
+    """Function writing {name: text} into a temporary directory and returning the paths."""
+    def write(files: Dict[str, str]) -> Dict[str, Path]:
+        paths = {}
+        for name, text in files.items():
+            path = tmp_path / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(text, encoding='utf-8')
+            paths[name] = path
+        return paths
+    return write
@@ -0,0 +1,137 @@
+"""Document.FromFileAsync and FromFilesAsync: results, backpressure, timeouts and cancellation."""
+
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from pyhdlio.vhdl import Document, VHDLSyntaxError
+from pyhdlio.vhdl.async_batch import ProcessPool, create_executor
+
+
+@pytest.fixture
+def executor():
+    with ThreadPoolExecutor(2) as executor:
+        yield executor
+
+
+@pytest.fixture
+def paths(write_files, make_source):
+    files = {f"f{i}.vhd": make_source(1, prefix=f"u{i}") for i in range(6)}
+    return list(write_files(files).values())
+
+
+def test_parse_file(paths, executor, describe):
+    document = asyncio.run(Document.FromFileAsync(paths[0], executor=executor))
+    assert describe(document) == describe(Document.FromFile(paths[0]))
+
+
+def test_errors_are_raised(tmp_path, executor):
+    with pytest.raises(FileNotFoundError):
+        asyncio.run(Document.FromFileAsync(tmp_path / "missing.vhd", executor=executor))
+    broken = tmp_path / "broken.vhd"
+    broken.write_text("entity e is port (a : in bit b : out bit); end;", encoding='utf-8')
+    with pytest.raises(VHDLSyntaxError):
+        asyncio.run(Document.FromFileAsync(broken, executor=executor))
+
+
+@pytest.mark.parametrize("ordered", [False, True])
+def test_batch(paths, executor, ordered):
+    async def collect():
+        return [result async for result in Document.FromFilesAsync(paths, executor=executor, ordered=ordered)]
+
+    results = asyncio.run(collect())
+    assert all(result.error is None for result in results)
+    if ordered:
+        assert [result.path for result in results] == paths
+    else:
+        assert sorted(result.path for result in results) == sorted(paths)
+
+
+def test_backpressure(paths, executor):
+    fetched = []
+
+    async def source():
+        for path in paths:
+            fetched.append(path)
+            yield path
+
+    async def consume():
+        ahead = []
+        async for _ in Document.FromFilesAsync(source(), executor=executor, max_pending=2):
+            ahead.append(len(fetched))
+            await asyncio.sleep(0.01)
+        return ahead
+
+    ahead = asyncio.run(consume())
+    # Paths are only taken while fewer than max_pending results wait to be consumed
+    assert all(count <= consumed + 2 for consumed, count in enumerate(ahead, 1))
+    assert len(ahead) == len(paths)
+
+
+def test_thread_timeout(write_files, make_source, executor):
+    path = write_files({"large.vhd": make_source(40)})["large.vhd"]
+
+    async def collect():
+        return [result async for result in Document.FromFilesAsync([path], executor=executor, timeout=0.001)]
+
+    [result] = asyncio.run(collect())
+    assert isinstance(result.error, TimeoutError)
+    with pytest.raises(TimeoutError):
+        asyncio.run(Document.FromFileAsync(path, executor=executor, timeout=0.001))
+
+
+def test_cancellation_withdraws_waiting_files(paths):
+    started = []
+
+    async def main():
+        with ThreadPoolExecutor(1) as executor:
+            async def consume():
+                async for result in Document.FromFilesAsync(paths * 5, executor=executor, max_pending=4):
+                    started.append(result.path)
+            task = asyncio.ensure_future(consume())
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+    asyncio.run(main())
+    assert len(started) < len(paths) * 5
+
+
+def test_process_pool_kills_a_call_out_of_time():
+    pool = ProcessPool(1)
+    try:
+        pid = pool.submit(os.getpid).result()
+        start = time.perf_counter()
+        with pytest.raises(TimeoutError):
+            pool.submit_timed(0.1, time.sleep, 30).result()
+        assert time.perf_counter() - start < 10
+        with pytest.raises(ProcessLookupError):
+            os.kill(pid, 0)
+        # A new worker process takes the next call
+        assert pool.submit_timed(10, os.getpid).result() != pid
+        with pytest.raises(ValueError):
+            pool.submit(int, "x").result()
+    finally:
+        pool.shutdown()
+    with pytest.raises(RuntimeError):
+        pool.submit(os.getpid)
+
+
+def test_process_timeout(write_files, make_source, paths):
+    large = write_files({"large.vhd": make_source(40)})["large.vhd"]
+    executor = create_executor(1, threads=False)
+    try:
+        async def collect():
+            return [result async for result in Document.FromFilesAsync([large, paths[0]], executor=executor, jobs=1,
+                                                                        timeout=0.001, ordered=True)]
+
+        assert isinstance(executor, ProcessPool)
+        assert [type(result.error) for result in asyncio.run(collect())] == [TimeoutError, TimeoutError]
+        document = asyncio.run(Document.FromFileAsync(paths[0], executor=executor))
+        assert sorted(document.Entities) == ["u0_0"]
+    finally:
+        executor.shutdown()
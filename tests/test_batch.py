@@ -0,0 +1,55 @@
+"""Document.FromFiles: results in input order, with errors reported per file."""
+
+import threading
+
+import pytest
+
+from pyhdlio.vhdl import Document, VHDLSyntaxError
+from pyhdlio.vhdl.concurrency import DFA_LOCK, enable_locking
+from pyhdlio.vhdl.dfa import clear_dfa
+
+
+@pytest.mark.parametrize("options", [dict(jobs=1), dict(jobs=2), dict(jobs=2, threads=True)])
+def test_batch_matches_single_parses(write_files, make_source, describe, options):
+    files = {f"f{i}.vhd": make_source(2, prefix=f"u{i}") for i in range(4)}
+    files["broken.vhd"] = "entity broken is port (a : in bit b : out bit); end;"
+    paths = list(write_files(files).values())
+    results = Document.FromFiles(paths, **options)
+    assert [result.path for result in results] == paths
+    for result in results[:-1]:
+        assert result.error is None
+        assert describe(result.document) == describe(Document.FromFile(result.path))
+    assert results[-1].document is None
+    assert isinstance(results[-1].error, VHDLSyntaxError)
+
+
+def test_missing_file_is_reported(tmp_path):
+    [result] = Document.FromFiles([tmp_path / "missing.vhd"])
+    assert isinstance(result.error, FileNotFoundError)
+
+
+def test_worker_processes_are_not_forked_from_threads(write_files, make_source):
+    # A worker forked now would inherit DFA_LOCK held by another thread and block on it for ever
+    paths = list(write_files({f"f{i}.vhd": make_source(1, prefix=f"u{i}") for i in range(2)}).values())
+    enable_locking()
+    clear_dfa()
+    held, release = threading.Event(), threading.Event()
+
+    def hold():
+        with DFA_LOCK:
+            held.set()
+            release.wait()
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    held.wait()
+    results = []
+    try:
+        parser = threading.Thread(target=lambda: results.extend(Document.FromFiles(paths, jobs=2, threads=False)))
+        parser.start()
+        parser.join(timeout=60)
+        assert not parser.is_alive()
+    finally:
+        release.set()
+        holder.join()
+    assert [result.error for result in results] == [None, None]
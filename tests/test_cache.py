@@ -0,0 +1,109 @@
+"""ParseCache: hits skip parsing, and entries are invalidated by content and options."""
+
+import os
+
+import pytest
+
+from pyhdlio.vhdl import Document, ParseCache, ParseStats
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ParseCache(tmp_path / "cache")
+
+
+def test_hit_returns_the_same_document(cache, write_files, generated_code, describe):
+    path = write_files({"design.vhd": generated_code})["design.vhd"]
+    stats = ParseStats()
+    first = Document.FromFile(path, cache=cache, stats=stats)
+    second = Document.FromFile(path, cache=cache, stats=stats)
+    assert (stats.documents, stats.cache_hits) == (1, 1)
+    assert describe(second) == describe(first)
+
+
+def test_changed_content_is_parsed_again(cache, write_files, make_source):
+    path = write_files({"design.vhd": make_source(2)})["design.vhd"]
+    assert len(Document.FromFile(path, cache=cache).Entities) == 2
+    path.write_text(make_source(3), encoding='utf-8')
+    stats = ParseStats()
+    assert len(Document.FromFile(path, cache=cache, stats=stats).Entities) == 3
+    assert stats.cache_hits == 0
+
+
+def test_options_are_part_of_the_key(cache):
+    assert cache.key("entity e is end;", "a.vhd") != cache.key("entity e is end;", "b.vhd")
+    assert (cache.key("entity e is end;", "a.vhd", interface_only=True)
+            != cache.key("entity e is end;", "a.vhd", interface_only=False))
+
+
+def test_size_cap_evicts_least_recently_used(tmp_path):
+    cache = ParseCache(tmp_path / "cache", max_size=3500)
+    payload = "x" * 1000
+    for age, key in enumerate("abc"):
+        cache.put(key, payload)
+        os.utime(cache.directory / f"{key}.pickle", (1000 + age, 1000 + age))
+    assert cache.get("a") == payload     # now the most recently used
+    cache.put("d", payload)
+    assert cache.size <= 3500
+    assert [cache.get(key) is not None for key in "abcd"] == [True, False, True, True]
+
+
+def test_replaced_entries_are_counted_once(cache):
+    cache.put("a", "x")
+    for _ in range(3):
+        cache.put("b", "x" * 1000)
+    assert cache._size == cache.size
+
+
+def test_corrupt_entry_is_a_miss(cache):
+    cache.put("k", "document")
+    next(cache.directory.glob("*.pickle")).write_bytes(b"not a pickle")
+    assert cache.get("k") is None
+    assert cache.size == 0
+
+
+def test_entry_of_another_key_is_a_miss(cache):
+    cache.put("a", "document a")
+    cache.put("b", "document b")
+    os.replace(cache.directory / "a.pickle", cache.directory / "b.pickle")
+    assert cache.get("b") is None
+
+
+def test_tampered_entry_is_a_miss(cache):
+    cache.put("k", "document")
+    path = cache.directory / "k.pickle"
+    header, data = path.read_bytes().split(b"\n", 1)
+    path.write_bytes(header + b"\n" + data.replace(b"document", b"tampered"))
+    assert cache.get("k") is None
+
+
+@pytest.mark.skipif(not hasattr(os, "getuid"), reason="POSIX permissions")
+def test_entry_writable_by_others_is_a_miss(cache):
+    cache.put("k", "document")
+    path = cache.directory / "k.pickle"
+    path.chmod(0o666)
+    assert cache.get("k") is None
+    assert path.exists()
+    path.chmod(0o600)
+    cache.directory.chmod(0o777)
+    assert cache.get("k") is None
+    cache.directory.chmod(0o700)
+    assert cache.get("k") == "document"
+
+
+def test_clear(cache):
+    cache.put("k", "document")
+    cache.clear()
+    assert cache.get("k") is None and cache.size == 0
+
+
+def test_versions_keep_their_own_namespace(tmp_path):
+    other = tmp_path / "cache" / "documents-0.0.1-0000000000000000-unknown"
+    other.mkdir(parents=True)
+    (other / "k.pickle").write_bytes(b"entry of another installation")
+    cache = ParseCache(tmp_path / "cache")
+    assert other.exists() and cache.directory != other
+    assert cache.remove_stale() == []
+    os.utime(other, (1000, 1000))
+    assert cache.remove_stale() == [other]
+    assert not other.exists() and cache.directory.exists()
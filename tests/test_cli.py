@@ -0,0 +1,36 @@
+"""Command line: subcommands only load what they use."""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from pyhdlio.cli import main
+
+ROOT = Path(__file__).parent.parent
+
+
+def test_find_does_not_load_antlr(tmp_path):
+    check = ("import sys\n"
+             "from pyhdlio.cli import main\n"
+             f"main(['find', '--db', {str(tmp_path / 'library.sqlite')!r}, 'top'])\n"
+             "loaded = [m for m in sys.modules if m.startswith(('antlr4', 'pyhdlio.vhdl.grammar', "
+             "'pyhdlio.vhdl.profiling', 'pyhdlio.vhdl.server'))]\n"
+             "assert not loaded, loaded\n")
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    subprocess.run([sys.executable, "-c", check], check=True, env=env, cwd=ROOT)
+
+
+def test_profile_rejects_unknown_sort_key(write_files, capsys):
+    path = write_files({"e.vhd": "entity e is end;"})["e.vhd"]
+    assert main(["profile", "--sort", "bogus", str(path)]) == 2
+    assert "lookahead" in capsys.readouterr().err
+    assert main(["profile", "--sort", "lookahead", "--top", "1", str(path)]) == 0
+
+
+def test_call_rejects_params_that_are_not_an_object(tmp_path, capsys):
+    socket_path = str(tmp_path / "server.sock")
+    assert main(["call", "entities", "{bad", "--socket", socket_path]) == 2
+    assert "not valid JSON" in capsys.readouterr().err
+    assert main(["call", "entities", "[1]", "--socket", socket_path]) == 2
+    assert "JSON object" in capsys.readouterr().err
@@ -0,0 +1,80 @@
+"""Parsing from several threads: the shared DFAs are only changed under a lock, and results match a serial run."""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from pyhdlio.vhdl import Document, Session
+from pyhdlio.vhdl.concurrency import LockedLexerATNSimulator, LockedParserATNSimulator, thread_safe
+from pyhdlio.vhdl.dfa import _recognizers, clear_dfa
+
+ROOT = Path(__file__).parent.parent
+
+
+@pytest.fixture
+def files(write_files, make_source, sample_code):
+    sources = {f"design_{i}.vhd": make_source(1 + i % 4, prefix=f"design_{i}") for i in range(12)}
+    sources["sample.vhd"] = sample_code
+    return list(write_files(sources).values())
+
+
+@pytest.fixture
+def switch_often():
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+
+def _duplicate_states():
+    duplicates = 0
+    for cls in _recognizers().values():
+        for dfa in cls.decisionsToDFA:
+            numbers = [state.stateNumber for state in dfa._states]
+            duplicates += len(numbers) - len(set(numbers))
+    return duplicates
+
+
+@pytest.mark.parametrize("options", [{}, {"build_tree": False}, {"split_units": True}])
+def test_thread_pool_matches_serial_run(files, describe, switch_often, options):
+    expected = [describe(Document.FromFile(path, **options)) for path in files]
+    # All threads start with empty DFAs and extend them at the same time
+    clear_dfa()
+    results = Document.FromFiles(files, jobs=4, threads=True, **options)
+    assert [result.error for result in results] == [None] * len(files)
+    assert [describe(result.document) for result in results] == expected
+    assert _duplicate_states() == 0
+
+
+def test_thread_pool_uses_locked_simulators(files):
+    Document.FromFiles(files[:2], jobs=2, threads=True)
+    session = Session.current()
+    assert type(session.lexer("")._interp) is LockedLexerATNSimulator
+    assert type(session.parser(None)._interp) is LockedParserATNSimulator
+
+
+def test_profiling_simulator_is_kept():
+    from antlr4 import CommonTokenStream
+    from pyhdlio.vhdl.grammar.VHDLParser import VHDLParser
+    from pyhdlio.vhdl.profiling import ProfilingATNSimulator
+
+    parser = VHDLParser(CommonTokenStream(None))
+    parser._interp = ProfilingATNSimulator(parser)
+    assert type(thread_safe(parser)._interp) is ProfilingATNSimulator
+
+
+def test_runtime_is_not_patched():
+    check = ("from pyhdlio.vhdl import Document, Session\n"
+             "from pyhdlio.vhdl.concurrency import gil_enabled\n"
+             "from antlr4.atn.ParserATNSimulator import ParserATNSimulator\n"
+             "from antlr4.dfa.DFA import DFA\n"
+             "Document.FromStr('entity e is end;', session=Session.current())\n"
+             "assert not hasattr(ParserATNSimulator.addDFAState, '__wrapped__')\n"
+             "assert not hasattr(DFA.setPrecedenceStartState, '__wrapped__')\n"
+             "interp = Session.current().parser(None)._interp\n"
+             "assert (type(interp) is ParserATNSimulator) == gil_enabled()\n")
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    subprocess.run([sys.executable, "-c", check], check=True, env=env, cwd=ROOT)
@@ -0,0 +1,57 @@
+"""Dependency scanning and compile order."""
+
+import pytest
+
+from pyhdlio.vhdl import DependencyCycleError, DependencyGraph, scan_dependencies
+
+PKG = "package pkg is\n  constant C : integer := 1;\nend package;\n"
+LEAF = "use work.pkg.all;\nentity leaf is\n  port (a : in bit);\nend entity;\n"
+LEAF_RTL = "architecture rtl of leaf is\nbegin\nend architecture;\n"
+TOP = ("library ieee;\nuse ieee.std_logic_1164.all;\nentity top is\nend entity;\n"
+       "architecture rtl of top is\n  component leaf is port (a : in bit); end component;\n"
+       "begin\n  u0 : leaf port map (a => '0');\n  u1 : entity work.leaf port map (a => '1');\nend architecture;\n")
+
+
+def test_scan_finds_references():
+    units = scan_dependencies(TOP)
+    assert [(unit.kind, unit.name) for unit in units] == [("entity", "top"), ("architecture", "rtl")]
+    assert units[1].primary == "top"
+    references = {(reference.kind, reference.library, reference.name) for reference in units[1].references}
+    # work (the library of the unit itself) is left out
+    assert {("entity", None, "top"), ("entity", None, "leaf"), ("component", None, "leaf")} == references
+    assert any(reference.library == "ieee" for reference in units[0].references)
+
+
+def _graph(write_files, files, components=True):
+    paths = write_files(files)
+    graph = DependencyGraph(components)
+    for path in paths.values():
+        graph.add_file(path)
+    return graph, paths
+
+
+def test_compile_order(write_files):
+    graph, paths = _graph(write_files, {"top.vhd": TOP, "leaf_rtl.vhd": LEAF_RTL, "leaf.vhd": LEAF,
+                                        "pkg.vhd": PKG})
+    assert graph.levels() == [[paths["pkg.vhd"]], [paths["leaf.vhd"]], [paths["top.vhd"], paths["leaf_rtl.vhd"]]]
+    order = graph.compile_order()
+    assert order.index(paths["pkg.vhd"]) < order.index(paths["leaf.vhd"]) < order.index(paths["top.vhd"])
+    # ieee is not part of the graph
+    assert {reference.library for _, reference in graph.unresolved()} == {"ieee"}
+
+
+def test_components_can_be_left_unbound(write_files):
+    top = TOP.replace("  u1 : entity work.leaf port map (a => '1');\n", "")
+    graph, paths = _graph(write_files, {"top.vhd": top, "leaf.vhd": LEAF, "pkg.vhd": PKG}, components=False)
+    assert paths["leaf.vhd"] not in graph.dependencies()[paths["top.vhd"]]
+    graph, paths = _graph(write_files, {"top.vhd": top, "leaf.vhd": LEAF, "pkg.vhd": PKG})
+    assert paths["leaf.vhd"] in graph.dependencies()[paths["top.vhd"]]
+
+
+def test_cycle_is_reported(write_files):
+    a = "use work.b_pkg.all;\npackage a_pkg is\nend package;\n"
+    b = "use work.a_pkg.all;\npackage b_pkg is\nend package;\n"
+    graph, paths = _graph(write_files, {"a.vhd": a, "b.vhd": b, "pkg.vhd": PKG})
+    with pytest.raises(DependencyCycleError) as error:
+        graph.compile_order()
+    assert [sorted(cycle) for cycle in error.value.cycles] == [sorted([paths["a.vhd"], paths["b.vhd"]])]
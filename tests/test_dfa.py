@@ -0,0 +1,71 @@
+"""DFA cache persistence and the DFACachePolicy ceiling."""
+
+import pickle
+import threading
+
+from pyhdlio.vhdl import DFACachePolicy, Document, clear_dfa, load_dfa, save_dfa, set_dfa_policy
+from pyhdlio.vhdl.dfa import dfa_states
+
+
+def test_saved_dfas_are_loaded_into_an_empty_cache(tmp_path, generated_code, describe):
+    expected = describe(Document.FromStr(generated_code))
+    path = tmp_path / "vhdl.dfa"
+    saved = save_dfa(path)
+    assert saved == dfa_states() > 0
+    assert clear_dfa() == saved and dfa_states() == 0
+    assert load_dfa(path)
+    assert dfa_states() == saved
+    assert describe(Document.FromStr(generated_code)) == expected
+    # Warm DFAs cover the source: nothing new is learnt
+    assert dfa_states() == saved
+
+
+def test_loading_keeps_learnt_states(tmp_path, generated_code):
+    Document.FromStr(generated_code)
+    path = tmp_path / "vhdl.dfa"
+    save_dfa(path)
+    states = dfa_states()
+    assert load_dfa(path)
+    assert dfa_states() == states
+
+
+def test_unusable_files_are_ignored(tmp_path):
+    assert not load_dfa(tmp_path / "missing.dfa")
+    garbage = tmp_path / "garbage.dfa"
+    garbage.write_bytes(b"\x00garbage")
+    assert not load_dfa(garbage)
+    stale = tmp_path / "stale.dfa"
+    stale.write_bytes(pickle.dumps({"stamp": ("another grammar",)}))
+    assert not load_dfa(stale)
+
+
+def test_policy_clears_above_max_states(generated_code):
+    Document.FromStr(generated_code)
+    policy = DFACachePolicy(max_states=1, check_every=2)
+    set_dfa_policy(policy)
+    try:
+        baseline = dfa_states()
+        Document.FromStr(generated_code)
+        assert policy.checks == 0
+        Document.FromStr(generated_code + "\nentity extra is port (a : in bit); end;\n")
+        assert (policy.documents, policy.checks, policy.clears) == (2, 1, 1)
+        # The DFAs of the baseline (taken when the policy was installed) are loaded again
+        assert dfa_states() == baseline
+        assert policy.metrics()["clears"] == 1
+    finally:
+        set_dfa_policy(None)
+
+
+def test_policy_counts_documents_of_all_threads():
+    policy = DFACachePolicy(max_states=10 ** 9, check_every=7)
+
+    def parsed():
+        for _ in range(1000):
+            policy.document_parsed()
+
+    threads = [threading.Thread(target=parsed) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert (policy.documents, policy.checks, policy.clears) == (8000, 8000 // 7, 0)
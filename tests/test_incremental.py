@@ -0,0 +1,56 @@
+"""Document.FromEdit: the same document as a full parse, reusing the units the edit did not touch."""
+
+import pytest
+
+from pyhdlio.vhdl import Document, VHDLSyntaxError, incremental
+
+
+@pytest.mark.parametrize("split_units", [False, True])
+def test_edit_matches_a_full_parse(generated_code, describe, split_units):
+    previous = Document.FromStr(generated_code, split_units=split_units)
+    new_code = generated_code.replace("WIDTH : positive := 16", "WIDTH : natural := 12")
+    document = Document.FromEdit(previous, generated_code, new_code)
+    assert describe(document) == describe(Document.FromStr(new_code, two_stage=False))
+    # Units before and after the edit are taken over as they are
+    assert document.Entities["unit_0"] is previous.Entities["unit_0"]
+    assert document.Entities["unit_2"] is previous.Entities["unit_2"]
+    assert document.Entities["unit_1"] is not previous.Entities["unit_1"]
+
+
+def test_edit_given_as_a_range(generated_code, describe):
+    previous = Document.FromStr(generated_code)
+    start = generated_code.index("unit_2 is")
+    document = Document.FromEdit(previous, generated_code, edit=(start, start + len("unit_2"), "unit_9"))
+    new_code = generated_code[:start] + "unit_9" + generated_code[start + len("unit_2"):]
+    assert describe(document) == describe(Document.FromStr(new_code))
+
+
+def test_added_unit(generated_code, describe):
+    previous = Document.FromStr(generated_code)
+    new_code = generated_code + "\nentity extra is port (a : in bit); end entity;\n"
+    document = Document.FromEdit(previous, generated_code, new_code)
+    assert describe(document) == describe(Document.FromStr(new_code))
+
+
+def test_broken_edit_raises(generated_code):
+    previous = Document.FromStr(generated_code)
+    with pytest.raises(VHDLSyntaxError):
+        Document.FromEdit(previous, generated_code, generated_code.replace("port (\n", "port (\n;", 1))
+
+
+def test_edit_needs_new_code_or_range(generated_code):
+    with pytest.raises(ValueError):
+        Document.FromEdit(Document.FromStr(generated_code), generated_code)
+
+
+def test_only_edits_remember_spans(generated_code, describe):
+    incremental._spans.clear()
+    previous = Document.FromStr(generated_code, split_units=True)
+    assert not incremental._spans
+    new_code = generated_code.replace("unit_1 is", "unit_7 is")
+    document = Document.FromEdit(previous, generated_code, new_code)
+    # Remembered by digest, without keeping the source alive
+    assert list(incremental._spans) == [incremental._digest(new_code)]
+    newer_code = new_code.replace("unit_2 is", "unit_8 is")
+    document = Document.FromEdit(document, new_code, newer_code)
+    assert describe(document) == describe(Document.FromStr(newer_code))
@@ -0,0 +1,105 @@
+"""Library: the SQLite index of design units, and rescans."""
+
+import os
+import sqlite3
+import threading
+
+import pytest
+
+from pyhdlio.vhdl import Library
+from pyhdlio.vhdl.concurrency import DFA_LOCK, enable_locking
+from pyhdlio.vhdl.dfa import clear_dfa
+from pyhdlio.vhdl.library import SCHEMA_VERSION, _TABLES
+
+
+@pytest.fixture
+def library(tmp_path):
+    with Library(tmp_path / "library.sqlite") as library:
+        yield library
+
+
+def test_find_units_and_components(library, write_files, make_source):
+    paths = write_files({"a.vhd": make_source(2), "b.vhd": make_source(1, prefix="other")})
+    result = library.scan(paths.values())
+    assert sorted(result.scanned) == sorted(paths.values()) and not result.errors
+    [entity] = library.find("UNIT_1", kind="entity")
+    assert (entity.path, entity.name, entity.library) == (paths["a.vhd"], "unit_1", "work")
+    assert [unit.kind for unit in library.find("rtl")] == ["architecture"] * 3
+    assert [unit.name for unit in library.find_component("other_0")] == ["other_pkg"]
+    assert library.components("unit_pkg") == ["unit_0", "unit_1"]
+    assert len(library.units(paths["b.vhd"])) == 3
+
+
+def test_rescan_reads_only_changed_files(library, write_files, make_source):
+    paths = write_files({"a.vhd": make_source(2), "b.vhd": make_source(1, prefix="other")})
+    library.scan(paths.values())
+    result = library.scan(paths.values())
+    assert (result.scanned, result.unchanged) == ([], 2)
+
+    paths["a.vhd"].write_text(make_source(3), encoding='utf-8')
+    result = library.scan(paths.values())
+    assert (result.scanned, result.unchanged) == ([paths["a.vhd"]], 1)
+    assert library.find("unit_2")
+
+    os.remove(paths["b.vhd"])
+    result = library.scan(paths.values())
+    assert result.removed == [paths["b.vhd"]]
+    assert library.files() == [paths["a.vhd"]]
+
+
+def test_prune_drops_unlisted_files(library, write_files, make_source):
+    paths = write_files({"a.vhd": make_source(1), "b.vhd": make_source(1, prefix="other")})
+    library.scan(paths.values())
+    assert library.scan([paths["a.vhd"]], prune=True).removed == [paths["b.vhd"]]
+
+
+def test_index_is_kept(tmp_path, write_files, make_source):
+    paths = write_files({"a.vhd": make_source(1)})
+    with Library(tmp_path / "library.sqlite") as library:
+        library.scan(paths.values())
+    with Library(tmp_path / "library.sqlite") as library:
+        assert library.scan(paths.values()).unchanged == 1
+        assert library.find("unit_0")
+
+
+def test_worker_processes_are_not_forked_from_threads(library, write_files, make_source):
+    # A worker forked now would inherit DFA_LOCK held by another thread and block on it for ever
+    paths = write_files({"a.vhd": make_source(1), "b.vhd": make_source(1, prefix="other")})
+    enable_locking()
+    clear_dfa()
+    with DFA_LOCK:
+        results = []
+        scanner = threading.Thread(target=lambda: results.append(library.scan(paths.values(), jobs=2)))
+        scanner.start()
+        scanner.join(timeout=60)
+        assert not scanner.is_alive()
+    assert len(results[0].scanned) == 2 and not results[0].errors
+
+
+def test_dependency_graph_from_the_index(library, write_files):
+    paths = write_files({
+        "top.vhd": "use work.pkg.all;\nentity top is\nend entity;\n",
+        "pkg.vhd": "package pkg is\nend package;\n",
+    })
+    library.scan(paths.values())
+    assert library.dependency_graph().compile_order() == [paths["pkg.vhd"], paths["top.vhd"]]
+
+
+@pytest.mark.parametrize("version", [SCHEMA_VERSION - 1, SCHEMA_VERSION + 1])
+def test_other_schema_version_is_rebuilt(tmp_path, write_files, make_source, version):
+    database = tmp_path / "library.sqlite"
+    paths = write_files({"a.vhd": make_source(1)})
+    with Library(database) as library:
+        library.scan(paths.values())
+    db = sqlite3.connect(str(database))
+    db.execute(f"PRAGMA user_version = {version}")
+    db.commit()
+    db.close()
+    with Library(database) as library:
+        assert library.files() == []
+        library.scan(paths.values())
+        assert library.find("unit_0")
+
+
+def test_schema_tables_are_all_dropped():
+    assert _TABLES == ("files", "units", "components", "refs")
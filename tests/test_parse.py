@@ -0,0 +1,117 @@
+"""Document.FromStr parse modes: each must give the same document as the plain full-LL parse."""
+
+import pytest
+
+from pyhdlio.vhdl import Diagnostics, Document, ParseStats, Session, VHDLSyntaxError
+
+BROKEN = [
+    "entity e is port (a : in std_logic b : out bit); end;",
+    "entity e is end entity; architecture a of e is begin x <= ; end;",
+    "entity e is\n  generic ( N : natural := 3 )\n port(a: in bit);\nend;",
+]
+
+
+def _tree(vhdl_code, two_stage):
+    from antlr4 import CommonTokenStream
+    from pyhdlio.vhdl.charstream import CompactInputStream
+    from pyhdlio.vhdl.grammar.VHDLLexer import VHDLLexer
+    from pyhdlio.vhdl.grammar.VHDLParser import VHDLParser
+    from pyhdlio.vhdl.model import _error_listener, _parse_design_file
+
+    parser = VHDLParser(CommonTokenStream(VHDLLexer(CompactInputStream(vhdl_code))))
+    return _parse_design_file(parser, _error_listener(), two_stage).toStringTree(recog=parser)
+
+
+@pytest.mark.parametrize("source", ["sample_code", "generated_code"])
+def test_two_stage_builds_the_same_tree(source, request):
+    vhdl_code = request.getfixturevalue(source)
+    assert _tree(vhdl_code, two_stage=True) == _tree(vhdl_code, two_stage=False)
+
+
+@pytest.mark.parametrize("options", [
+    dict(two_stage=True),
+    dict(split_units=True),
+    dict(build_tree=False),
+    dict(split_units=True, build_tree=False),
+])
+@pytest.mark.parametrize("source", ["sample_code", "generated_code"])
+def test_parse_modes_match_baseline(source, options, request, describe):
+    vhdl_code = request.getfixturevalue(source)
+    baseline = describe(Document.FromStr(vhdl_code, two_stage=False))
+    assert describe(Document.FromStr(vhdl_code, **options)) == baseline
+
+
+@pytest.mark.parametrize("split_units", [False, True])
+def test_interface_only_keeps_entities_and_packages(sample_code, describe, split_units):
+    baseline = describe(Document.FromStr(sample_code, two_stage=False))
+    document = Document.FromStr(sample_code, interface_only=True, split_units=split_units)
+    assert describe(document) == baseline
+
+
+@pytest.mark.parametrize("vhdl_code", BROKEN)
+def test_two_stage_reports_the_same_syntax_error(vhdl_code):
+    messages = []
+    for two_stage in (False, True):
+        with pytest.raises(VHDLSyntaxError) as error:
+            Document.FromStr(vhdl_code, two_stage=two_stage)
+        messages.append(str(error.value))
+    assert messages[0] == messages[1]
+    assert messages[0].startswith("Failed to parse VHDL code: Syntax error at line")
+
+
+def test_split_units_keeps_the_units_that_parse(generated_code):
+    broken = generated_code + "\nentity broken is port (a : in bit b : out bit); end;\n"
+    with pytest.raises(VHDLSyntaxError) as error:
+        Document.FromStr(broken, split_units=True)
+    assert len(error.value.errors) == 1
+    assert "entity broken" in str(error.value.errors[0])
+    assert sorted(error.value.document.Entities) == ["unit_0", "unit_1", "unit_2"]
+
+
+def test_session_is_reused(sample_code, generated_code, describe):
+    session = Session()
+    for vhdl_code in (sample_code, generated_code, sample_code):
+        expected = describe(Document.FromStr(vhdl_code))
+        assert describe(Document.FromStr(vhdl_code, session=session)) == expected
+        assert describe(Document.FromStr(vhdl_code, session=session, build_tree=False)) == expected
+    assert Session.current() is Session.current()
+
+
+def test_stats_count_phases(generated_code):
+    stats = ParseStats()
+    Document.FromStr(generated_code, stats=stats)
+    assert stats.documents == 1
+    assert stats.tokens > stats.hidden_tokens > 0
+    assert stats.nodes > 0 and stats.predictions > 0
+    assert stats.parse_time >= stats.prediction_time > 0
+    again = ParseStats()
+    Document.FromStr(generated_code, stats=again)
+    assert again.tokens == stats.tokens and again.nodes == stats.nodes
+    assert stats.merge(again).documents == 2
+
+
+def test_file_not_found(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        Document.FromFile(tmp_path / "missing.vhd")
+
+
+def test_diagnostics_are_collected(sample_code):
+    diagnostics = Diagnostics()
+    Document.FromStr(sample_code, diagnostics=diagnostics)
+    assert all(diagnostic.severity in ("error", "warning") for diagnostic in diagnostics)
+
+
+@pytest.mark.parametrize("split_units", [False, True])
+def test_interface_only_retry_keeps_earlier_diagnostics_and_counts(generated_code, split_units):
+    broken = generated_code + "\nentity broken is port (a : in bit b : out bit); end;\n"
+    full = ParseStats()
+    with pytest.raises(VHDLSyntaxError):
+        Document.FromStr(broken, split_units=split_units, stats=full)
+
+    diagnostics = Diagnostics()
+    earlier = diagnostics.warning("from an earlier document")
+    stats = ParseStats()
+    with pytest.raises(VHDLSyntaxError):
+        Document.FromStr(broken, interface_only=True, split_units=split_units, diagnostics=diagnostics, stats=stats)
+    assert list(diagnostics) == [earlier]
+    assert (stats.tokens, stats.hidden_tokens, stats.nodes) == (full.tokens, full.hidden_tokens, full.nodes)
@@ -0,0 +1,117 @@
+"""ParseServer: JSON-RPC 2.0 over a Unix socket, and its document cache."""
+
+import json
+import os
+import socket
+import threading
+
+import pytest
+
+from pyhdlio.vhdl.server import (INVALID_PARAMS, METHOD_NOT_FOUND, PARSE_ERROR, SERVER_ERROR, ParseClient,
+                                 ParseServer)
+
+
+@pytest.fixture
+def server(tmp_path):
+    server = ParseServer(tmp_path / "server.sock", max_documents=2)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    yield server
+    server.shutdown()
+    thread.join()
+    server.server_close()
+
+
+def _exchange(server, *lines):
+    """Send raw lines on one connection and return the decoded response lines."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(str(server.socket_path))
+        connection.sendall(b"".join(line + b"\n" for line in lines))
+        connection.shutdown(socket.SHUT_WR)
+        data = b""
+        while True:
+            chunk = connection.recv(65536)
+            if not chunk:
+                break
+            data += chunk
+    return [json.loads(line) for line in data.splitlines()]
+
+
+def test_queries(server, write_files, generated_code):
+    path = str(write_files({"design.vhd": generated_code})["design.vhd"])
+    with ParseClient(server.socket_path) as client:
+        entities = client.call("entities", path=path)
+        assert [entity["name"] for entity in entities] == ["unit_0", "unit_1", "unit_2"]
+        assert entities[0]["generics"][0] == {"names": ["WIDTH"], "mode": "in", "subtype": "positive",
+                                              "default": "8"}
+        ports = client.call("ports", path=path, entity="UNIT_1")
+        assert [port["names"] for port in ports] == [["clk"], ["reset"], ["d"], ["q"]]
+        components = client.call("components", path=path)
+        assert {component["package"] for component in components} == {"unit_pkg"}
+        assert client.call("stats")["misses"] == 1
+
+
+def test_documents_are_revalidated(server, write_files, make_source):
+    path = write_files({"design.vhd": make_source(1)})["design.vhd"]
+    with ParseClient(server.socket_path) as client:
+        assert len(client.call("entities", path=str(path))) == 1
+        os.utime(path)
+        assert len(client.call("entities", path=str(path))) == 1
+        path.write_text(make_source(2), encoding='utf-8')
+        assert len(client.call("entities", path=str(path))) == 2
+        stats = client.call("stats")
+        assert (stats["hits"], stats["misses"]) == (1, 2)
+        assert client.call("invalidate") == 1
+
+
+def test_library_methods(server, write_files):
+    paths = write_files({
+        "top.vhd": "use work.pkg.all;\nentity top is\nend entity;\n",
+        "pkg.vhd": "package pkg is\nend package;\n",
+    })
+    with ParseClient(server.socket_path) as client:
+        levels = client.call("dependencies", paths=[str(path) for path in paths.values()])["levels"]
+        assert levels == [[str(paths["pkg.vhd"])], [str(paths["top.vhd"])]]
+        [unit] = client.call("find", name="top")
+        assert (unit["kind"], unit["path"]) == ("entity", str(paths["top.vhd"]))
+
+
+def test_protocol_errors(server):
+    parse_error, unknown, invalid = _exchange(
+        server,
+        b"{not json",
+        b'{"jsonrpc": "2.0", "id": 1, "method": "nope"}',
+        b'{"jsonrpc": "2.0", "id": 2, "method": "ports", "params": {"path": "x.vhd"}}',
+        b'{"jsonrpc": "2.0", "method": "stats"}',
+    )
+    assert parse_error["error"]["code"] == PARSE_ERROR
+    assert (unknown["id"], unknown["error"]["code"]) == (1, METHOD_NOT_FOUND)
+    assert (invalid["id"], invalid["error"]["code"]) == (2, INVALID_PARAMS)
+
+
+def test_type_errors_of_methods_are_server_errors(server):
+    missing, failed = _exchange(
+        server,
+        b'{"jsonrpc": "2.0", "id": 1, "method": "scan", "params": {}}',
+        b'{"jsonrpc": "2.0", "id": 2, "method": "scan", "params": {"paths": 5}}',
+    )
+    assert missing["error"]["code"] == INVALID_PARAMS
+    assert failed["error"]["code"] == SERVER_ERROR
+    assert server.requests == 2
+
+
+def test_batch(server):
+    [response] = _exchange(server, b'[{"jsonrpc": "2.0", "id": 1, "method": "stats"}, '
+                                   b'{"jsonrpc": "2.0", "method": "stats"}]')
+    assert [item["id"] for item in response] == [1]
+
+
+def test_errors_raise_in_the_client(server, tmp_path):
+    with ParseClient(server.socket_path) as client:
+        with pytest.raises(RuntimeError, match="FileNotFoundError"):
+            client.call("entities", path=str(tmp_path / "missing.vhd"))
+
+
+def test_second_server_is_refused(server):
+    with pytest.raises(OSError, match="already listening"):
+        ParseServer(server.socket_path)
@@ -0,0 +1,100 @@
+"""ATN snapshots: written on request only, and only loaded when they match and can be trusted."""
+
+import io
+import os
+import pickle
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from pyhdlio.vhdl import snapshot
+from pyhdlio.vhdl.grammar import VHDLParser
+
+ROOT = Path(__file__).parent.parent
+
+
+@pytest.fixture
+def data():
+    return VHDLParser.serializedATN()
+
+
+@pytest.fixture
+def saved(tmp_path, data):
+    path = tmp_path / "atn" / "VHDLParser.pickle"
+    snapshot.save_atn(VHDLParser.VHDLParser.atn, data, path)
+    return path
+
+
+def test_round_trip(saved, data):
+    atn = snapshot.load_atn(data, saved)
+    assert len(atn.states) == len(VHDLParser.VHDLParser.atn.states)
+    assert len(atn.decisionToState) == len(VHDLParser.VHDLParser.atn.decisionToState)
+
+
+def test_other_grammar_is_ignored(saved, data):
+    assert snapshot.load_atn(data[:-1] + [data[-1] + 1], saved) is None
+
+
+def test_truncated_file_is_ignored(saved, data):
+    saved.write_bytes(saved.read_bytes()[:-10])
+    assert snapshot.load_atn(data, saved) is None
+
+
+@pytest.mark.skipif(not hasattr(os, "getuid"), reason="POSIX permissions")
+def test_writable_by_others_is_ignored(saved, data):
+    saved.chmod(0o666)
+    assert snapshot.load_atn(data, saved) is None
+    saved.chmod(0o600)
+    saved.parent.chmod(0o777)
+    assert snapshot.load_atn(data, saved) is None
+
+
+def test_only_atn_classes_are_unpickled(tmp_path, data):
+    marker = tmp_path / "executed"
+    body = pickle.dumps(_Payload(str(marker)))
+    path = tmp_path / "evil.pickle"
+    path.write_bytes(snapshot._header(data) + body)
+    path.chmod(0o600)
+    assert snapshot.load_atn(data, path) is None
+    assert not marker.exists()
+
+
+def test_attributes_of_antlr_modules_are_refused():
+    # STACK_GLOBAL with a dotted name: antlr4.Lexer.sys.modules
+    payload = (pickle.PROTO + bytes([4]) + pickle.SHORT_BINUNICODE + bytes([12]) + b"antlr4.Lexer"
+               + pickle.SHORT_BINUNICODE + bytes([11]) + b"sys.modules" + pickle.STACK_GLOBAL + pickle.STOP)
+    assert pickle.loads(payload) is sys.modules
+    with pytest.raises(pickle.UnpicklingError):
+        snapshot._Unpickler(io.BytesIO(payload)).load()
+
+
+class _Payload:
+    def __init__(self, path):
+        self.path = path
+
+    def __reduce__(self):
+        return Path.touch, (Path(self.path),)
+
+
+def test_snapshots_are_only_written_on_request(tmp_path):
+    env = dict(os.environ, PYHDLIO_CACHE_DIR=str(tmp_path), PYTHONPATH=os.pathsep.join(sys.path))
+    parse = "from pyhdlio.vhdl import Document; Document.FromStr('entity e is end;')"
+    subprocess.run([sys.executable, "-c", parse], check=True, env=env, cwd=ROOT)
+    assert not (tmp_path / "atn").exists()
+
+    subprocess.run([sys.executable, "-m", "pyhdlio", "snapshot"], check=True, env=env, cwd=ROOT,
+                   capture_output=True)
+    assert sorted(path.name.split("-")[0] for path in (tmp_path / "atn").iterdir()) == ["VHDLLexer", "VHDLParser"]
+    # The unmodified generated modules get their ATNs from the snapshots, and antlr4 is left as it was
+    check = ("import antlr4\n"
+             "from antlr4.atn.ATNDeserializer import ATNDeserializer\n"
+             "from pyhdlio.vhdl import snapshot\n"
+             "loaded = []\n"
+             "load_atn = snapshot.load_atn\n"
+             "snapshot.load_atn = lambda data, path: loaded.append(load_atn(data, path)) or loaded[-1]\n"
+             "from pyhdlio.vhdl.grammar import VHDLLexer, VHDLParser\n"
+             "print(len(loaded), None not in loaded, antlr4.ATNDeserializer is ATNDeserializer)\n")
+    out = subprocess.run([sys.executable, "-c", check], check=True, env=env, cwd=ROOT, capture_output=True, text=True)
+    assert out.stdout.split() == ["2", "True", "True"]
@@ -0,0 +1,47 @@
+"""iter_units: the units of a split parse, read through a small window of the file."""
+
+import pytest
+
+from pyhdlio.vhdl import DFACachePolicy, Document, VHDLSyntaxError, iter_units, set_dfa_policy
+
+
+def test_units_match_a_split_parse(write_files, generated_code):
+    path = write_files({"design.vhd": generated_code})["design.vhd"]
+    document = Document.FromStr(generated_code, split_units=True)
+    units = list(iter_units(path, chunk_size=256))
+    assert [unit.Identifier for unit in units] == ["unit_pkg", "unit_0", "unit_1", "unit_2"]
+    assert [len(unit.PortItems) for unit in units[1:]] == [
+        len(entity.PortItems) for entity in document.Entities.values()]
+
+
+def test_interface_only(write_files, sample_code):
+    path = write_files({"sample.vhd": sample_code})["sample.vhd"]
+    names = [unit.Identifier for unit in iter_units(path, interface_only=True)]
+    assert names == ["utilities_pkg", "simple_gate", "processor"]
+
+
+def test_broken_unit_is_reported_after_the_others(write_files, generated_code):
+    broken = "entity broken is port (a : in bit b : out bit); end;\n" + generated_code
+    path = write_files({"design.vhd": broken})["design.vhd"]
+    units = []
+    with pytest.raises(VHDLSyntaxError) as error:
+        for unit in iter_units(path, chunk_size=128):
+            units.append(unit.Identifier)
+    assert units == ["unit_pkg", "unit_0", "unit_1", "unit_2"]
+    assert "entity broken (lines 1-1)" in str(error.value)
+
+
+def test_only_files_read_to_the_end_are_counted(write_files, generated_code):
+    path = write_files({"design.vhd": generated_code})["design.vhd"]
+    policy = DFACachePolicy(max_states=10 ** 9)
+    set_dfa_policy(policy)
+    try:
+        units = iter_units(path)
+        next(units)
+        units.close()
+        iter_units(path).close()
+        assert policy.documents == 0
+        list(iter_units(path))
+        assert policy.documents == 1
+    finally:
+        set_dfa_policy(None)